@@ -0,0 +1,90 @@
+"""Compare transfer compression codecs between the server and ClickHouse.
+
+For every codec the benchmark reports the compressed response size (bytes on
+the wire) and the end-to-end latency of the same query through
+clickhouse_connect, including decompression. The connection is configured
+from the usual CLICKHOUSE_* environment variables.
+
+Usage:
+    python benchmarks/compression.py [--query SQL] [--runs N]
+
+The default query reads the widest metadata the tools return, system.tables
+with create_table_query and engine_full.
+"""
+
+import argparse
+import base64
+import statistics
+import ssl
+import time
+import urllib.parse
+import urllib.request
+
+import clickhouse_connect
+from dotenv import load_dotenv
+
+from mcp_clickhouse.mcp_env import COMPRESSION_METHODS, get_config
+
+DEFAULT_QUERY = (
+    "SELECT database, name, engine, engine_full, create_table_query, sorting_key FROM system.tables"
+)
+
+
+def wire_bytes(query: str, codec: str) -> int:
+    """Fetch the query result over plain HTTP and return the undecoded body size."""
+    config = get_config()
+    host, port = config.endpoints[0]
+    scheme = "https" if config.secure else "http"
+    params = {"query": f"{query} FORMAT Native", "enable_http_compression": "1"}
+    request = urllib.request.Request(
+        f"{scheme}://{host}:{port}/{config.proxy_path or ''}?{urllib.parse.urlencode(params)}"
+    )
+    credentials = base64.b64encode(f"{config.username}:{config.password}".encode()).decode()
+    request.add_header("Authorization", f"Basic {credentials}")
+    if codec != "none":
+        request.add_header("Accept-Encoding", codec)
+    context = None
+    if config.secure and not config.verify:
+        context = ssl._create_unverified_context()
+    with urllib.request.urlopen(request, context=context) as response:
+        return len(response.read())
+
+
+def latency(query: str, codec: str, runs: int) -> float:
+    """Return the median query latency in milliseconds with the given codec."""
+    client_config = get_config().get_client_config()
+    client_config["compress"] = False if codec == "none" else codec
+    client = clickhouse_connect.get_client(**client_config)
+    try:
+        client.query(query)  # warm up the connection
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            client.query(query)
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--query", default=DEFAULT_QUERY)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    load_dotenv()
+    baseline = wire_bytes(args.query, "none")
+    print(f"{'codec':<8} {'bytes':>12} {'ratio':>7} {'median ms':>10}")
+    for codec in ["none"] + COMPRESSION_METHODS:
+        try:
+            size = wire_bytes(args.query, codec)
+            millis = latency(args.query, codec, args.runs)
+        except Exception as err:
+            print(f"{codec:<8} skipped: {err}")
+            continue
+        print(f"{codec:<8} {size:>12} {baseline / size:>6.1f}x {millis:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Compare the default tool result serialization with per-column converters.
+
+Builds a synthetic result with the column types that are most expensive to
+serialize (DateTime64, Decimal, UUID, IPv4, nullable strings, floats) and
+times turning it into an MCP tool result both ways:
+
+    default    run_select_query's dict handed to the framework's convert_result
+    converters columns_to_rows + json_tool_result, as the server does now
+
+No ClickHouse server is needed.
+
+Usage:
+    python benchmarks/serialization.py [--rows N] [--runs N]
+"""
+
+import argparse
+import datetime
+import decimal
+import ipaddress
+import statistics
+import time
+import uuid
+
+from clickhouse_connect.datatypes.registry import get_from_name
+from fastmcp.tools import Tool
+
+from mcp_clickhouse.serialization import columns_to_rows, json_tool_result, orjson
+
+COLUMNS = [
+    ("id", "UInt64"),
+    ("event_time", "DateTime64(3)"),
+    ("amount", "Decimal(18, 4)"),
+    ("session", "UUID"),
+    ("client_ip", "IPv4"),
+    ("referrer", "Nullable(String)"),
+    ("score", "Float64"),
+]
+
+
+def make_rows(count: int):
+    start = datetime.datetime(2024, 1, 1)
+    return [
+        (
+            i,
+            start + datetime.timedelta(milliseconds=i),
+            decimal.Decimal(i) / 100,
+            uuid.UUID(int=i),
+            ipaddress.IPv4Address(i),
+            None if i % 3 else f"https://example.com/{i}",
+            i / 7,
+        )
+        for i in range(count)
+    ]
+
+
+def timed(fn, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    names = [name for name, _ in COLUMNS]
+    column_types = [get_from_name(type_name) for _, type_name in COLUMNS]
+    rows = make_rows(args.rows)
+    columns = [list(column) for column in zip(*rows)]
+    tool = Tool.from_function(lambda: None, name="run_select_query")
+
+    def default():
+        return tool.convert_result({"columns": names, "rows": rows})
+
+    def converters():
+        return json_tool_result({"columns": names, "rows": columns_to_rows(column_types, columns)})
+
+    default_ms = timed(default, args.runs)
+    converters_ms = timed(converters, args.runs)
+    encoder = "orjson" if orjson is not None else "json"
+    print(f"{args.rows} rows x {len(COLUMNS)} columns, median of {args.runs} runs")
+    print(f"default             {default_ms:>9.1f} ms")
+    print(
+        f"converters ({encoder:<6}) {converters_ms:>9.1f} ms  ({default_ms / converters_ms:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
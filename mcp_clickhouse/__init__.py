@@ -4,12 +4,22 @@ from .mcp_server import (
     create_clickhouse_client,
     list_databases,
     list_tables,
+    describe_database_compact,
+    search_schema,
+    sample_table,
+    column_stats,
+    analyze_query,
     run_select_query,
+    run_select_queries,
+    submit_query,
+    get_query_status,
+    fetch_query_result,
+    cancel_query,
     create_chdb_client,
     run_chdb_select_query,
+    materialize_source,
     chdb_initial_prompt,
-    table_pagination_cache,
-    fetch_table_names_from_system,
+    count_tables,
     get_paginated_table_data,
     create_page_token,
 )
@@ -25,13 +35,23 @@ if os.getenv("MCP_CLICKHOUSE_TRUSTSTORE_DISABLE", None) != "1":
 __all__ = [
     "list_databases",
     "list_tables",
+    "describe_database_compact",
+    "search_schema",
+    "sample_table",
+    "column_stats",
+    "analyze_query",
     "run_select_query",
+    "run_select_queries",
+    "submit_query",
+    "get_query_status",
+    "fetch_query_result",
+    "cancel_query",
     "create_clickhouse_client",
     "create_chdb_client",
     "run_chdb_select_query",
+    "materialize_source",
     "chdb_initial_prompt",
-    "table_pagination_cache",
-    "fetch_table_names_from_system",
+    "count_tables",
     "get_paginated_table_data",
     "create_page_token",
 ]
@@ -0,0 +1,267 @@
+"""Local copies of remote chDB table-function sources.
+
+Querying url(), s3() or file() in place re-reads and re-parses the source on
+every query. materialize_source loads a source once into a MergeTree table of
+the chDB session, so follow-up queries run on local columnar data. Each table
+is recorded in a registry table with the source's version (HTTP ETag,
+Last-Modified and size, or file mtime and size) and is reloaded when the source
+changes. Sources whose version cannot be checked are reloaded once they are
+older than CHDB_MATERIALIZE_TTL.
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from clickhouse_connect.driver.binding import format_query_value
+
+logger = logging.getLogger("mcp-clickhouse")
+
+# chDB database holding materialized tables and their registry
+MATERIALIZED_DATABASE = "materialized"
+REGISTRY_TABLE = "_sources"
+
+# Seconds to wait for a HEAD request when checking whether a remote source changed
+PROBE_TIMEOUT = 10
+
+# Table-function calls, and those with a quoted first argument like url('https://...', 'Parquet')
+TABLE_FUNCTION_PATTERN = re.compile(r"^\s*\w+\s*\(.*\)\s*$", re.DOTALL)
+SOURCE_PATTERN = re.compile(r"^\s*(\w+)\s*\(\s*'((?:[^'\\]|\\.)*)'.*\)\s*$", re.DOTALL)
+TABLE_NAME_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+GLOB_CHARACTERS = set("*?{}[]")
+
+# One lock per table name serializes loads into the same table, so concurrent calls
+# for a source load it once while loads of other sources proceed in parallel
+_LOAD_LOCKS: Dict[str, threading.Lock] = {}
+_LOAD_LOCKS_LOCK = threading.Lock()
+
+
+def _load_lock(name: str) -> threading.Lock:
+    with _LOAD_LOCKS_LOCK:
+        return _LOAD_LOCKS.setdefault(name, threading.Lock())
+
+
+class MaterializeError(Exception):
+    """Raised when a source cannot be materialized."""
+
+
+@dataclass
+class SourceVersion:
+    """What identifies the current contents of a source. Empty fields are unknown."""
+
+    etag: str = ""
+    last_modified: str = ""
+    size: int = 0
+
+    @property
+    def known(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+
+def source_location(source: str) -> Optional[Tuple[str, str]]:
+    """Split a table-function call into its function name and first argument."""
+    match = SOURCE_PATTERN.match(source)
+    if not match:
+        return None
+    return match.group(1).lower(), match.group(2).replace("\\'", "'")
+
+
+def probe_url(url: str) -> SourceVersion:
+    """Read the version of a remote object from the headers of a HEAD request."""
+    request = urllib.request.Request(url, method="HEAD")
+    try:
+        with urllib.request.urlopen(request, timeout=PROBE_TIMEOUT) as response:
+            headers = response.headers
+    except (urllib.error.URLError, OSError, ValueError) as err:
+        logger.info(f"Cannot check version of {url}: {err}")
+        return SourceVersion()
+    return SourceVersion(
+        etag=headers.get("ETag", ""),
+        last_modified=headers.get("Last-Modified", ""),
+        size=int(headers.get("Content-Length") or 0),
+    )
+
+
+def probe_files(pattern: str) -> SourceVersion:
+    """Read the version of local files from their modification times and sizes."""
+    if "{" in pattern:
+        # Brace expansion is ClickHouse syntax that Python's glob does not support
+        return SourceVersion()
+    paths = sorted(glob.glob(pattern, recursive=True))
+    if not paths:
+        return SourceVersion()
+    stats = [os.stat(path) for path in paths]
+    # Adding or removing a matched file changes the fingerprint as well
+    fingerprint = hashlib.sha256("\n".join(paths).encode()).hexdigest()[:16]
+    return SourceVersion(
+        etag=f"{len(paths)}:{fingerprint}" if len(paths) > 1 else "",
+        last_modified=repr(max(stat.st_mtime for stat in stats)),
+        size=sum(stat.st_size for stat in stats),
+    )
+
+
+def probe_source(source: str) -> SourceVersion:
+    """Find the version of a url(), s3() or file() source without reading it.
+
+    Other table functions, globbed URLs and objects that need credentials have no
+    checkable version and are refreshed by age instead.
+    """
+    location = source_location(source)
+    if location is None:
+        return SourceVersion()
+    function, target = location
+    if function == "file":
+        return probe_files(target)
+    if function not in ("url", "s3") or GLOB_CHARACTERS & set(target):
+        return SourceVersion()
+    if target.startswith("s3://"):
+        bucket, _, key = target[len("s3://") :].partition("/")
+        target = f"https://{bucket}.s3.amazonaws.com/{key}"
+    if not target.startswith(("http://", "https://")):
+        return SourceVersion()
+    return probe_url(target)
+
+
+def default_table_name(source: str) -> str:
+    """Derive a stable table name for a source."""
+    return "source_" + hashlib.sha256(source.strip().encode()).hexdigest()[:16]
+
+
+class MaterializedSources:
+    """Materialized copies of table-function sources in a chDB session.
+
+    Args:
+        session: chDB session to store the tables in
+        ttl: Seconds a source without a checkable version is reused, 0 to reuse it
+            until a refresh is requested
+        timeout: Seconds a load may take, and a call may wait for another load of the
+            same table, 0 for no limit
+    """
+
+    def __init__(self, session, ttl: float = 3600, timeout: float = 600):
+        self.session = session
+        self.ttl = ttl
+        self.timeout = timeout
+
+    def _query(self, query: str, fmt: str = "CSV") -> str:
+        return str(self.session.query(query, fmt))
+
+    def _ensure_registry(self) -> None:
+        self._query(f"CREATE DATABASE IF NOT EXISTS {MATERIALIZED_DATABASE}")
+        self._query(f"""
+            CREATE TABLE IF NOT EXISTS {MATERIALIZED_DATABASE}.{REGISTRY_TABLE} (
+                name String,
+                source String,
+                etag String,
+                last_modified String,
+                size UInt64,
+                rows UInt64,
+                loaded_at Float64
+            ) ENGINE = ReplacingMergeTree ORDER BY name
+        """)
+
+    def lookup(self, name: str) -> Optional[Dict[str, Any]]:
+        """Get the registry entry of a materialized table, or None."""
+        data = self._query(
+            "SELECT name, source, etag, last_modified, size, rows, loaded_at "
+            f"FROM {MATERIALIZED_DATABASE}.{REGISTRY_TABLE} FINAL "
+            f"WHERE name = {format_query_value(name)}",
+            "JSONEachRow",
+        ).strip()
+        if not data:
+            return None
+        entry = json.loads(data.splitlines()[0])
+        entry["size"] = int(entry["size"])
+        entry["rows"] = int(entry["rows"])
+        return entry
+
+    def _is_current(self, entry: Dict[str, Any], source: str, version: SourceVersion) -> bool:
+        if entry["source"] != source:
+            return False
+        if version.known:
+            return (entry["etag"], entry["last_modified"], entry["size"]) == (
+                version.etag,
+                version.last_modified,
+                version.size,
+            )
+        return not self.ttl or time.time() - entry["loaded_at"] < self.ttl
+
+    def materialize(
+        self,
+        source: str,
+        name: Optional[str] = None,
+        order_by: Optional[str] = None,
+        refresh: bool = False,
+    ) -> Dict[str, Any]:
+        """Load a source into a local table, or reuse the table if the source is unchanged.
+
+        Raises:
+            MaterializeError: For an invalid source or table name, or a failed or timed
+                out load
+        """
+        if not TABLE_FUNCTION_PATTERN.match(source):
+            raise MaterializeError(
+                "Source must be a table function call such as "
+                "url('https://example.com/data.parquet', 'Parquet')"
+            )
+        name = name or default_table_name(source)
+        if not TABLE_NAME_PATTERN.match(name) or name == REGISTRY_TABLE:
+            raise MaterializeError(f"Invalid table name '{name}'")
+        table = f"{MATERIALIZED_DATABASE}.{name}"
+
+        lock = _load_lock(name)
+        if not lock.acquire(timeout=self.timeout if self.timeout > 0 else -1):
+            raise MaterializeError(
+                f"{table} is still being loaded by another call after {self.timeout:g}s"
+            )
+        try:
+            self._ensure_registry()
+            entry = self.lookup(name)
+            version = probe_source(source)
+            if entry is not None and not refresh and self._is_current(entry, source, version):
+                logger.info(f"Reusing {table} materialized from {source}")
+                return {"table": table, "status": "reused", **entry}
+
+            logger.info(f"Materializing {source} into {table}")
+            start = time.monotonic()
+            limit = f" SETTINGS max_execution_time = {self.timeout:g}" if self.timeout > 0 else ""
+            try:
+                # Replacing the table is atomic, so queries never see a partial load,
+                # and a load that times out leaves the previous table in place
+                self._query(
+                    f"CREATE OR REPLACE TABLE {table} ENGINE = MergeTree "
+                    f"ORDER BY {order_by or 'tuple()'} SETTINGS allow_nullable_key = 1 "
+                    f"AS SELECT * FROM {source}{limit}"
+                )
+                rows = int(self._query(f"SELECT count() FROM {table}").strip() or 0)
+            except Exception as err:
+                raise MaterializeError(f"Loading {source} failed: {err}") from err
+            loaded = {
+                "name": name,
+                "source": source,
+                "etag": version.etag,
+                "last_modified": version.last_modified,
+                "size": version.size,
+                "rows": rows,
+                "loaded_at": time.time(),
+            }
+            self._query(
+                f"INSERT INTO {MATERIALIZED_DATABASE}.{REGISTRY_TABLE} VALUES "
+                f"({', '.join(str(format_query_value(value)) for value in loaded.values())})"
+            )
+            logger.info(
+                f"Materialized {rows} rows of {source} into {table} "
+                f"in {time.monotonic() - start:.1f}s"
+            )
+            return {"table": table, "status": "loaded" if entry is None else "refreshed", **loaded}
+        finally:
+            lock.release()
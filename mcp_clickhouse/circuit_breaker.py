@@ -0,0 +1,160 @@
+"""Circuit breaker guarding connections to ClickHouse.
+
+After a configured number of consecutive connection failures the breaker opens
+and every call fails fast for a cool-down period instead of waiting out the
+connect timeout. Once the cool-down has elapsed a single probe is let through
+(half-open); its outcome either closes the breaker or opens it again.
+"""
+
+import logging
+import threading
+import time
+from enum import Enum
+from typing import Any, Dict, Optional
+
+from clickhouse_connect.driver.exceptions import OperationalError
+
+from mcp_clickhouse.mcp_env import get_config
+
+logger = logging.getLogger("mcp-clickhouse")
+
+
+class CircuitState(str, Enum):
+    """States of the circuit breaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of connecting while the circuit breaker is open."""
+
+
+def is_connection_error(err: BaseException) -> bool:
+    """Check whether an exception means ClickHouse could not be reached.
+
+    Errors returned by the server itself (syntax errors, unknown tables, ...) do
+    not count against the breaker.
+    """
+    return isinstance(err, (OperationalError, ConnectionError, TimeoutError))
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    Args:
+        failure_threshold: Consecutive failures that open the breaker. 0 disables it.
+        cooldown_seconds: How long the breaker stays open before allowing a probe
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown_seconds: float = 30):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.consecutive_failures = 0
+        self.times_opened = 0
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_threshold > 0
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now: float) -> CircuitState:
+        if self._state == CircuitState.OPEN and now - self._opened_at >= self.cooldown_seconds:
+            return CircuitState.HALF_OPEN
+        return self._state
+
+    def before_call(self) -> None:
+        """Check whether a call may proceed.
+
+        Raises:
+            CircuitOpenError: If the breaker is open, or half-open with a probe
+                already in flight.
+        """
+        if not self.enabled:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            if state == CircuitState.CLOSED:
+                return
+
+            retry_in = max(0.0, self.cooldown_seconds - (now - self._opened_at))
+            if state == CircuitState.HALF_OPEN:
+                # A probe that never reported back is abandoned after another cool-down
+                probe_stale = (
+                    self._probe_started is not None
+                    and now - self._probe_started >= self.cooldown_seconds
+                )
+                if self._probe_started is None or probe_stale:
+                    self._state = CircuitState.HALF_OPEN
+                    self._probe_started = now
+                    logger.info("Circuit breaker half-open, letting a probe through to ClickHouse")
+                    return
+                retry_in = self.cooldown_seconds - (now - self._probe_started)
+
+        raise CircuitOpenError(
+            f"ClickHouse is unavailable (circuit breaker open after "
+            f"{self.consecutive_failures} consecutive failures), retry in {retry_in:.0f}s"
+        )
+
+    def record_success(self) -> None:
+        """Record a successful call, closing the breaker."""
+        with self._lock:
+            if self._state != CircuitState.CLOSED:
+                logger.info("Circuit breaker closed, ClickHouse is reachable again")
+            self._state = CircuitState.CLOSED
+            self._probe_started = None
+            self.consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the breaker once the threshold is reached."""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self.consecutive_failures += 1
+            if self._state == CircuitState.HALF_OPEN or (
+                self._state == CircuitState.CLOSED
+                and self.consecutive_failures >= self.failure_threshold
+            ):
+                self._state = CircuitState.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_started = None
+                self.times_opened += 1
+                logger.warning(
+                    f"Circuit breaker opened after {self.consecutive_failures} consecutive "
+                    f"failures, failing fast for {self.cooldown_seconds}s"
+                )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a point-in-time view of the breaker for health and metrics reporting."""
+        with self._lock:
+            return {
+                "state": self._current_state(time.monotonic()).value,
+                "consecutive_failures": self.consecutive_failures,
+                "times_opened": self.times_opened,
+            }
+
+
+_CIRCUIT_BREAKER_INSTANCE = None
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Gets the singleton circuit breaker guarding ClickHouse connections."""
+    global _CIRCUIT_BREAKER_INSTANCE
+    if _CIRCUIT_BREAKER_INSTANCE is None:
+        config = get_config()
+        _CIRCUIT_BREAKER_INSTANCE = CircuitBreaker(
+            config.circuit_breaker_threshold, config.circuit_breaker_cooldown
+        )
+    return _CIRCUIT_BREAKER_INSTANCE
@@ -0,0 +1,195 @@
+"""Endpoint selection for ClickHouse deployments with several replicas.
+
+This module keeps per-endpoint health and load statistics and decides which
+endpoint a new client should connect to. Endpoints that fail to connect are
+ejected for a cool-down period and become eligible again afterwards, at which
+point the next connection attempt acts as a re-probe.
+"""
+
+import logging
+import random
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from mcp_clickhouse.mcp_env import LoadBalancingStrategy, get_config
+
+logger = logging.getLogger("mcp-clickhouse")
+
+WORKLOAD_QUERY = "query"
+WORKLOAD_METADATA = "metadata"
+
+
+@dataclass
+class Endpoint:
+    host: str
+    port: int
+    in_flight: int = 0
+    latency_ewma: Optional[float] = None
+    consecutive_failures: int = 0
+    ejected_until: float = 0.0
+
+    @property
+    def address(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    def is_ejected(self, now: float) -> bool:
+        return self.ejected_until > now
+
+
+class EndpointPool:
+    """A set of interchangeable ClickHouse endpoints with health-aware ordering.
+
+    Args:
+        addresses: List of (host, port) tuples
+        strategy: One of the LoadBalancingStrategy values
+        eject_seconds: How long an endpoint is skipped after a failed connection
+    """
+
+    # Weight given to the newest latency sample in the moving average
+    LATENCY_EWMA_ALPHA = 0.3
+
+    def __init__(
+        self,
+        addresses: List[Tuple[str, int]],
+        strategy: str = LoadBalancingStrategy.ROUND_ROBIN.value,
+        eject_seconds: float = 30,
+    ):
+        if not addresses:
+            raise ValueError("An endpoint pool needs at least one endpoint")
+        self.endpoints = [Endpoint(host, port) for host, port in addresses]
+        self.strategy = strategy
+        self.eject_seconds = eject_seconds
+        self._lock = threading.Lock()
+        self._next_index = 0
+
+    def candidates(self) -> List[Endpoint]:
+        """Return the endpoints in the order they should be tried.
+
+        Healthy endpoints come first, ordered by the configured strategy. Ejected
+        endpoints follow, soonest-to-recover first, so that a request still has
+        somewhere to go when every endpoint is currently ejected.
+        """
+        now = time.monotonic()
+        with self._lock:
+            healthy = [e for e in self.endpoints if not e.is_ejected(now)]
+            ejected = sorted(
+                (e for e in self.endpoints if e.is_ejected(now)),
+                key=lambda e: e.ejected_until,
+            )
+            return self._order(healthy) + ejected
+
+    def _order(self, healthy: List[Endpoint]) -> List[Endpoint]:
+        if not healthy:
+            return []
+
+        # Rotating the starting point spreads ties evenly for every strategy
+        offset = self._next_index % len(healthy)
+        self._next_index += 1
+        rotated = healthy[offset:] + healthy[:offset]
+
+        if self.strategy == LoadBalancingStrategy.LEAST_IN_FLIGHT.value:
+            return sorted(rotated, key=lambda e: e.in_flight)
+
+        if self.strategy == LoadBalancingStrategy.LATENCY_WEIGHTED.value:
+            known = [e.latency_ewma for e in rotated if e.latency_ewma]
+            # Endpoints without samples get the best known latency so they are probed
+            default_latency = min(known) if known else 1.0
+            remaining = list(rotated)
+            ordered = []
+            while remaining:
+                weights = [1.0 / (e.latency_ewma or default_latency) for e in remaining]
+                chosen = random.choices(remaining, weights=weights)[0]
+                remaining.remove(chosen)
+                ordered.append(chosen)
+            return ordered
+
+        return rotated
+
+    def record_success(self, endpoint: Endpoint, latency: float) -> None:
+        """Record a successful round trip and its latency in seconds."""
+        with self._lock:
+            if endpoint.latency_ewma is None:
+                endpoint.latency_ewma = latency
+            else:
+                endpoint.latency_ewma = (
+                    self.LATENCY_EWMA_ALPHA * latency
+                    + (1 - self.LATENCY_EWMA_ALPHA) * endpoint.latency_ewma
+                )
+            if endpoint.ejected_until:
+                logger.info(f"ClickHouse endpoint {endpoint.address} is healthy again")
+            endpoint.consecutive_failures = 0
+            endpoint.ejected_until = 0.0
+
+    def record_failure(self, endpoint: Endpoint) -> None:
+        """Record a failed connection and eject the endpoint for the cool-down period."""
+        with self._lock:
+            endpoint.consecutive_failures += 1
+            endpoint.ejected_until = time.monotonic() + self.eject_seconds
+        logger.warning(
+            f"Ejecting ClickHouse endpoint {endpoint.address} for {self.eject_seconds}s "
+            f"after {endpoint.consecutive_failures} consecutive failure(s)"
+        )
+
+    def track(self, client: Any, endpoint: Endpoint) -> None:
+        """Count a client as in flight against an endpoint until it is released.
+
+        The tools create one client per call, so a client is released when the
+        call returns and the client is garbage collected.
+        """
+        with self._lock:
+            endpoint.in_flight += 1
+        weakref.finalize(client, self._release, endpoint)
+
+    def _release(self, endpoint: Endpoint) -> None:
+        with self._lock:
+            endpoint.in_flight -= 1
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Get a point-in-time view of every endpoint for health reporting."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "address": e.address,
+                    "healthy": not e.is_ejected(now),
+                    "in_flight": e.in_flight,
+                    "latency_ms": round(e.latency_ewma * 1000, 1) if e.latency_ewma else None,
+                    "consecutive_failures": e.consecutive_failures,
+                }
+                for e in self.endpoints
+            ]
+
+
+# Pools are created lazily, one per workload
+_ENDPOINT_POOLS: Dict[str, EndpointPool] = {}
+_ENDPOINT_POOLS_LOCK = threading.Lock()
+
+
+def get_endpoint_pool(workload: str = WORKLOAD_QUERY) -> EndpointPool:
+    """Gets the endpoint pool serving a workload.
+
+    Metadata tools use CLICKHOUSE_METADATA_HOST when it is set and otherwise share
+    the pool used for queries.
+
+    Args:
+        workload: WORKLOAD_QUERY or WORKLOAD_METADATA
+
+    Returns:
+        EndpointPool: The pool for the workload
+    """
+    config = get_config()
+    if workload == WORKLOAD_METADATA and not config.metadata_endpoints:
+        workload = WORKLOAD_QUERY
+
+    with _ENDPOINT_POOLS_LOCK:
+        if workload not in _ENDPOINT_POOLS:
+            addresses = (
+                config.metadata_endpoints if workload == WORKLOAD_METADATA else config.endpoints
+            )
+            _ENDPOINT_POOLS[workload] = EndpointPool(
+                addresses, config.load_balancing, config.endpoint_eject_seconds
+            )
+        return _ENDPOINT_POOLS[workload]
@@ -0,0 +1,182 @@
+"""Negotiated response compression for the HTTP and SSE transports.
+
+zstd is preferred when the client accepts it and the optional zstandard
+package is installed, gzip is used otherwise. Streamed responses, which is how
+the streamable HTTP transport returns tool results, are flushed after every
+chunk so events still reach the client as soon as they are sent.
+"""
+
+import zlib
+from typing import List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware import Middleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from mcp_clickhouse.mcp_env import get_mcp_config
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the installed extras
+    zstandard = None
+
+# Already compressed payloads. Event streams are compressed because they carry
+# the tool results.
+EXCLUDED_CONTENT_TYPES = (
+    "application/gzip",
+    "application/x-gzip",
+    "application/zip",
+    "application/zstd",
+    "audio/",
+    "font/woff",
+    "font/woff2",
+    "image/",
+    "video/",
+)
+
+
+class GzipCompressor:
+    content_encoding = "gzip"
+
+    def __init__(self, level: int):
+        # wbits=31 writes the gzip header and trailer
+        self._compressobj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        flush_mode = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        return self._compressobj.compress(data) + self._compressobj.flush(flush_mode)
+
+
+class ZstdCompressor:
+    content_encoding = "zstd"
+
+    def __init__(self, level: int):
+        self._compressobj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if final:
+            return self._compressobj.compress(data) + self._compressobj.flush()
+        return self._compressobj.compress(data) + self._compressobj.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+
+class CompressingSend:
+    """Wraps the ASGI send of one response and compresses its body.
+
+    The response start is held back until the first body message shows whether
+    the response is complete or streamed. Complete responses smaller than
+    minimum_size are sent as is, and streamed chunks are flushed one by one.
+    """
+
+    def __init__(self, send: Send, compressor, minimum_size: int):
+        self.send = send
+        self.compressor = compressor
+        self.minimum_size = minimum_size
+        self.start_message: Optional[Message] = None
+        self.compressing: Optional[bool] = None
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            if "content-encoding" in headers or content_type.startswith(EXCLUDED_CONTENT_TYPES):
+                self.compressing = False
+                await self.send(message)
+            return
+        if message["type"] != "http.response.body" or self.compressing is False:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressing is None:
+            if not more_body and len(body) < self.minimum_size:
+                self.compressing = False
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+            self.compressing = True
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers["Content-Encoding"] = self.compressor.content_encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                body = self.compressor.compress(body, final=True)
+                headers["Content-Length"] = str(len(body))
+                await self.send(self.start_message)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            await self.send(self.start_message)
+
+        await self.send(
+            {
+                "type": "http.response.body",
+                "body": self.compressor.compress(body, final=not more_body),
+                "more_body": more_body,
+            }
+        )
+
+
+def _accepted_encodings(header: str) -> set:
+    """Get the encodings of an Accept-Encoding header, without those refused with q=0."""
+    encodings = set()
+    for part in header.lower().split(","):
+        name, _, params = part.partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        encodings.add(name.strip())
+    return encodings
+
+
+class CompressionMiddleware:
+    """Compress responses with zstd or gzip, whichever the client accepts.
+
+    Args:
+        app: The ASGI app to wrap
+        minimum_size: Complete responses smaller than this many bytes are sent as is
+        gzip_level: gzip compression level
+        zstd_level: zstd compression level
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        zstd_level: int = 3,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = _accepted_encodings(Headers(scope=scope).get("Accept-Encoding", ""))
+        if zstandard is not None and "zstd" in accepted:
+            compressor = ZstdCompressor(self.zstd_level)
+        elif "gzip" in accepted:
+            compressor = GzipCompressor(self.gzip_level)
+        else:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, CompressingSend(send, compressor, self.minimum_size))
+
+
+def get_http_middleware() -> Optional[List[Middleware]]:
+    """Get the middleware for the HTTP and SSE transports based on the server configuration."""
+    mcp_config = get_mcp_config()
+    if not mcp_config.http_compression:
+        return None
+    return [Middleware(CompressionMiddleware, minimum_size=mcp_config.http_compression_min_size)]
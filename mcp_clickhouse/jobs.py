@@ -0,0 +1,189 @@
+"""Background query jobs.
+
+A job runs one query on its own worker thread, independent of the MCP request
+that submitted it, and keeps the result in memory so that it can be fetched
+page by page afterwards. Finished jobs are dropped after a retention period,
+and the number of jobs kept at once is bounded. Jobs live in the server
+process: they are not shared between worker processes and do not survive a
+restart.
+"""
+
+import atexit
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from mcp_clickhouse.mcp_env import get_mcp_config
+
+logger = logging.getLogger("mcp-clickhouse")
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+
+class JobError(Exception):
+    """Raised for unknown job ids and when no more jobs can be accepted."""
+
+
+@dataclass
+class QueryJob:
+    job_id: str
+    query: str
+    submitted_at: float
+    status: str = JOB_QUEUED
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    # Client running the query, used to look up its progress on the same server
+    client: Any = field(default=None, repr=False)
+    future: Optional[Future] = field(default=None, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    @property
+    def elapsed_seconds(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+
+class JobManager:
+    """Runs query jobs on a bounded worker pool and retains their results.
+
+    Args:
+        max_running: Jobs running at the same time; further jobs wait in the queue
+        retention_seconds: How long a finished job and its result are kept
+        max_jobs: Jobs kept at once, queued, running and finished together. When
+            full, the oldest finished job is dropped to make room.
+    """
+
+    def __init__(self, max_running: int = 4, retention_seconds: float = 3600, max_jobs: int = 100):
+        self.retention_seconds = retention_seconds
+        self.max_jobs = max_jobs
+        self._jobs: Dict[str, QueryJob] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_running, thread_name_prefix="query-job")
+        atexit.register(lambda: self._executor.shutdown(wait=False, cancel_futures=True))
+
+    def submit(self, query: str, run: Callable[[QueryJob], Dict[str, Any]]) -> QueryJob:
+        """Queue a job.
+
+        Args:
+            query: The query, kept for reporting
+            run: Runs the job's query and returns its result; called on a worker thread
+
+        Raises:
+            JobError: If max_jobs jobs are queued or running
+        """
+        job = QueryJob(job_id=str(uuid.uuid4()), query=query, submitted_at=time.time())
+        with self._lock:
+            self._prune()
+            if len(self._jobs) >= self.max_jobs and not self._evict_oldest_finished():
+                raise JobError(
+                    f"Too many query jobs in progress (limit {self.max_jobs}), "
+                    "wait for some to finish or cancel them"
+                )
+            self._jobs[job.job_id] = job
+            job.future = self._executor.submit(self._run, job, run)
+        logger.info(f"Submitted query job {job.job_id}")
+        return job
+
+    def _run(self, job: QueryJob, run: Callable[[QueryJob], Dict[str, Any]]) -> None:
+        with self._lock:
+            if job.cancel_requested:
+                return
+            job.status = JOB_RUNNING
+            job.started_at = time.time()
+        try:
+            result = run(job)
+        except Exception as err:
+            with self._lock:
+                job.status = JOB_CANCELLED if job.cancel_requested else JOB_FAILED
+                job.error = None if job.cancel_requested else str(err)
+                job.finished_at = time.time()
+                job.client = None
+            logger.info(f"Query job {job.job_id} {job.status}: {err}")
+            return
+        with self._lock:
+            job.result = result
+            job.status = JOB_SUCCEEDED
+            job.finished_at = time.time()
+            job.client = None
+        logger.info(f"Query job {job.job_id} succeeded after {job.elapsed_seconds:.1f}s")
+
+    def get(self, job_id: str) -> QueryJob:
+        """Look up a job.
+
+        Raises:
+            JobError: If there is no such job, or it has expired
+        """
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise JobError(f"Unknown or expired query job {job_id}")
+        return job
+
+    def cancel(self, job_id: str, kill: Callable[[QueryJob], None]) -> QueryJob:
+        """Cancel a job.
+
+        A queued job is removed from the queue. For a running job kill is called
+        to stop its query on the server; the job is marked cancelled once the
+        query has returned. Finished jobs are left as they are.
+        """
+        job = self.get(job_id)
+        with self._lock:
+            if job.finished:
+                return job
+            job.cancel_requested = True
+            if job.status == JOB_QUEUED:
+                job.future.cancel()
+                job.status = JOB_CANCELLED
+                job.finished_at = time.time()
+                return job
+        kill(job)
+        return job
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retention_seconds
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _evict_oldest_finished(self) -> bool:
+        finished = [job for job in self._jobs.values() if job.finished]
+        if not finished:
+            return False
+        oldest = min(finished, key=lambda job: job.finished_at)
+        del self._jobs[oldest.job_id]
+        return True
+
+
+_JOB_MANAGER_INSTANCE = None
+
+
+def get_job_manager() -> JobManager:
+    """Gets the singleton manager of query jobs."""
+    global _JOB_MANAGER_INSTANCE
+    if _JOB_MANAGER_INSTANCE is None:
+        config = get_mcp_config()
+        _JOB_MANAGER_INSTANCE = JobManager(
+            config.job_max_running, config.job_retention, config.job_max_jobs
+        )
+    return _JOB_MANAGER_INSTANCE
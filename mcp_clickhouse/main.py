@@ -1,6 +1,53 @@
+import logging
+import os
+import secrets
+
+import uvicorn
+
+from .http_compression import get_http_middleware
 from .mcp_server import mcp
+from .quotas import get_quota_tracker
 from .mcp_env import get_mcp_config, TransportType
 
+logger = logging.getLogger("mcp-clickhouse")
+
+
+def create_app():
+    """Create the ASGI app served by each worker in multi-worker mode.
+
+    Workers run in stateless HTTP mode: every request carries everything needed to
+    serve it, so the kernel can hand any request to any worker.
+    """
+    return mcp.http_app(
+        transport=TransportType.HTTP.value,
+        stateless_http=True,
+        middleware=get_http_middleware(),
+    )
+
+
+def run_workers(host: str, port: int, workers: int):
+    """Serve the HTTP transport from several worker processes sharing one socket.
+
+    Each worker imports the server afresh and therefore gets its own query
+    executor and ClickHouse connections.
+    """
+    # Page tokens issued by one worker must verify on every other worker
+    if not get_mcp_config().page_token_secret:
+        os.environ["CLICKHOUSE_MCP_PAGE_TOKEN_SECRET"] = secrets.token_hex(32)
+    if get_quota_tracker().limits.enabled:
+        logger.warning(
+            "Quotas are counted per worker and stateless requests have no lasting session, "
+            "so with several workers only credential quotas apply, once per worker"
+        )
+
+    uvicorn.run(
+        "mcp_clickhouse.main:create_app",
+        factory=True,
+        host=host,
+        port=port,
+        workers=workers,
+    )
+
 
 def main():
     mcp_config = get_mcp_config()
@@ -9,9 +56,23 @@ def main():
     # For HTTP and SSE transports, we need to specify host and port
     http_transports = [TransportType.HTTP.value, TransportType.SSE.value]
     if transport in http_transports:
+        if mcp_config.workers > 1:
+            if transport != TransportType.HTTP.value:
+                raise ValueError(
+                    "CLICKHOUSE_MCP_WORKERS > 1 requires the http transport, "
+                    f"'{transport}' sessions are bound to a single process"
+                )
+            run_workers(mcp_config.bind_host, mcp_config.bind_port, mcp_config.workers)
+            return
+
         # Use the configured bind host (defaults to 127.0.0.1, can be set to 0.0.0.0)
         # and bind port (defaults to 8000)
-        mcp.run(transport=transport, host=mcp_config.bind_host, port=mcp_config.bind_port)
+        mcp.run(
+            transport=transport,
+            host=mcp_config.bind_host,
+            port=mcp_config.bind_port,
+            middleware=get_http_middleware(),
+        )
     else:
         # For stdio transport, no host or port is needed
         mcp.run(transport=transport)
@@ -6,7 +6,7 @@ and type conversion.
 
 from dataclasses import dataclass
 import os
-from typing import Optional
+from typing import List, Optional, Tuple, Union
 from enum import Enum
 
 
@@ -23,6 +23,23 @@ class TransportType(str, Enum):
         return [transport.value for transport in cls]
 
 
+# Codecs clickhouse-connect can use for HTTP transfer compression
+COMPRESSION_METHODS = ["lz4", "zstd", "br", "gzip", "deflate"]
+
+
+class LoadBalancingStrategy(str, Enum):
+    """Supported strategies for spreading load across ClickHouse endpoints."""
+
+    ROUND_ROBIN = "round_robin"
+    LEAST_IN_FLIGHT = "least_in_flight"
+    LATENCY_WEIGHTED = "latency_weighted"
+
+    @classmethod
+    def values(cls) -> list[str]:
+        """Get all valid strategy values."""
+        return [strategy.value for strategy in cls]
+
+
 @dataclass
 class ClickHouseConfig:
     """Configuration for ClickHouse connection settings.
@@ -31,7 +48,8 @@ class ClickHouseConfig:
     and type conversion. It provides typed methods for accessing each configuration value.
 
     Required environment variables (only when CLICKHOUSE_ENABLED=true):
-        CLICKHOUSE_HOST: The hostname of the ClickHouse server
+        CLICKHOUSE_HOST: The hostname of the ClickHouse server, or a comma-separated
+            list of host[:port] replicas to load balance across
         CLICKHOUSE_USER: The username for authentication
         CLICKHOUSE_PASSWORD: The password for authentication
 
@@ -45,6 +63,25 @@ class ClickHouseConfig:
         CLICKHOUSE_DATABASE: Default database to use (default: None)
         CLICKHOUSE_PROXY_PATH: Path to be added to the host URL. For instance, for servers behind an HTTP proxy (default: None)
         CLICKHOUSE_ENABLED: Enable ClickHouse server (default: true)
+        CLICKHOUSE_METADATA_HOST: Comma-separated host[:port] replicas for metadata tools
+            (default: None, metadata tools use CLICKHOUSE_HOST)
+        CLICKHOUSE_LOAD_BALANCING: "round_robin", "least_in_flight" or "latency_weighted"
+            (default: round_robin)
+        CLICKHOUSE_ENDPOINT_EJECT_SECONDS: How long a failing endpoint is skipped before
+            it is probed again (default: 30)
+        CLICKHOUSE_CIRCUIT_BREAKER_THRESHOLD: Consecutive connection failures before
+            failing fast, 0 disables the breaker (default: 5)
+        CLICKHOUSE_CIRCUIT_BREAKER_COOLDOWN: Seconds to fail fast before probing
+            ClickHouse again (default: 30)
+        CLICKHOUSE_RETRY_ATTEMPTS: Retries for idempotent reads failing with a transient
+            error (default: 2)
+        CLICKHOUSE_RETRY_BACKOFF: Base retry backoff in seconds, doubled per retry (default: 0.2)
+        CLICKHOUSE_RETRY_MAX_BACKOFF: Maximum retry backoff in seconds (default: 2)
+        CLICKHOUSE_HEDGE_METADATA: Send a hedged second request for slow metadata
+            queries (default: false)
+        CLICKHOUSE_HEDGE_MIN_DELAY_MS: Lower bound for the p95-based hedging delay (default: 50)
+        CLICKHOUSE_COMPRESS: Transfer compression, "lz4", "zstd", "br", "gzip", "deflate",
+            "auto" to let ClickHouse pick, or "none" (default: lz4)
     """
 
     def __init__(self):
@@ -76,6 +113,121 @@ class ClickHouseConfig:
             return int(os.environ["CLICKHOUSE_PORT"])
         return 8443 if self.secure else 8123
 
+    @property
+    def endpoints(self) -> List[Tuple[str, int]]:
+        """Get the (host, port) pairs listed in CLICKHOUSE_HOST.
+
+        Entries without an explicit port use the port property.
+        """
+        return self._parse_endpoints(self.host)
+
+    @property
+    def metadata_endpoints(self) -> List[Tuple[str, int]]:
+        """Get the (host, port) pairs dedicated to metadata tools.
+
+        Default: [] (metadata tools share the query endpoints)
+        """
+        return self._parse_endpoints(os.getenv("CLICKHOUSE_METADATA_HOST", ""))
+
+    @property
+    def load_balancing(self) -> str:
+        """Get the load balancing strategy used across endpoints.
+
+        Default: round_robin
+        """
+        strategy = os.getenv(
+            "CLICKHOUSE_LOAD_BALANCING", LoadBalancingStrategy.ROUND_ROBIN.value
+        ).lower()
+        if strategy not in LoadBalancingStrategy.values():
+            valid_options = ", ".join(f'"{s}"' for s in LoadBalancingStrategy.values())
+            raise ValueError(
+                f"Invalid load balancing strategy '{strategy}'. Valid options: {valid_options}"
+            )
+        return strategy
+
+    @property
+    def endpoint_eject_seconds(self) -> float:
+        """Get how long a failing endpoint is ejected before being probed again.
+
+        Default: 30
+        """
+        return float(os.getenv("CLICKHOUSE_ENDPOINT_EJECT_SECONDS", "30"))
+
+    @property
+    def circuit_breaker_threshold(self) -> int:
+        """Get the number of consecutive connection failures that open the circuit breaker.
+
+        Default: 5 (0 disables the circuit breaker)
+        """
+        return int(os.getenv("CLICKHOUSE_CIRCUIT_BREAKER_THRESHOLD", "5"))
+
+    @property
+    def circuit_breaker_cooldown(self) -> float:
+        """Get how long the circuit breaker fails fast before letting a probe through.
+
+        Default: 30
+        """
+        return float(os.getenv("CLICKHOUSE_CIRCUIT_BREAKER_COOLDOWN", "30"))
+
+    @property
+    def retry_attempts(self) -> int:
+        """Get the number of retries for idempotent reads that hit a transient error.
+
+        Default: 2
+        """
+        return int(os.getenv("CLICKHOUSE_RETRY_ATTEMPTS", "2"))
+
+    @property
+    def retry_backoff(self) -> float:
+        """Get the base retry backoff in seconds.
+
+        Default: 0.2
+        """
+        return float(os.getenv("CLICKHOUSE_RETRY_BACKOFF", "0.2"))
+
+    @property
+    def retry_max_backoff(self) -> float:
+        """Get the maximum retry backoff in seconds.
+
+        Default: 2
+        """
+        return float(os.getenv("CLICKHOUSE_RETRY_MAX_BACKOFF", "2"))
+
+    @property
+    def hedge_metadata(self) -> bool:
+        """Get whether slow metadata queries are hedged with a second request.
+
+        Default: False
+        """
+        return os.getenv("CLICKHOUSE_HEDGE_METADATA", "false").lower() == "true"
+
+    @property
+    def hedge_min_delay(self) -> float:
+        """Get the minimum delay in seconds before a hedged request is sent.
+
+        Default: 0.05
+        """
+        return int(os.getenv("CLICKHOUSE_HEDGE_MIN_DELAY_MS", "50")) / 1000
+
+    @property
+    def compression(self) -> Union[bool, str]:
+        """Get the compression passed to clickhouse_connect as the compress option.
+
+        Returns a codec name, True to advertise every available codec and let the
+        server choose, or False to disable compression.
+
+        Default: lz4
+        """
+        method = os.getenv("CLICKHOUSE_COMPRESS", "lz4").lower()
+        if method in ("auto", "true"):
+            return True
+        if method in ("none", "false"):
+            return False
+        if method not in COMPRESSION_METHODS:
+            valid_options = ", ".join(f'"{m}"' for m in COMPRESSION_METHODS + ["auto", "none"])
+            raise ValueError(f"Invalid compression '{method}'. Valid options: {valid_options}")
+        return method
+
     @property
     def username(self) -> str:
         """Get the ClickHouse username."""
@@ -132,15 +284,20 @@ class ClickHouseConfig:
     def proxy_path(self) -> str:
         return os.getenv("CLICKHOUSE_PROXY_PATH")
 
-    def get_client_config(self) -> dict:
+    def get_client_config(self, endpoint: Optional[Tuple[str, int]] = None) -> dict:
         """Get the configuration dictionary for clickhouse_connect client.
 
+        Args:
+            endpoint: Optional (host, port) pair to connect to. Defaults to the
+                first endpoint in CLICKHOUSE_HOST.
+
         Returns:
             dict: Configuration ready to be passed to clickhouse_connect.get_client()
         """
+        host, port = endpoint or self.endpoints[0]
         config = {
-            "host": self.host,
-            "port": self.port,
+            "host": host,
+            "port": port,
             "username": self.username,
             "password": self.password,
             "interface": "https" if self.secure else "http",
@@ -149,6 +306,10 @@ class ClickHouseConfig:
             "connect_timeout": self.connect_timeout,
             "send_receive_timeout": self.send_receive_timeout,
             "client_name": "mcp_clickhouse",
+            "compress": self.compression,
+            # Tools never rely on session state, and without a session the same client
+            # can run a retried or hedged query while an earlier attempt is still running
+            "autogenerate_session_id": False,
         }
 
         # Add optional role if set
@@ -164,6 +325,26 @@ class ClickHouseConfig:
 
         return config
 
+    def _parse_endpoints(self, value: str) -> List[Tuple[str, int]]:
+        """Parse a comma-separated list of host[:port] entries.
+
+        IPv6 addresses with a port must be bracketed, e.g. [::1]:8123.
+        """
+        endpoints = []
+        for entry in value.split(","):
+            entry = entry.strip()
+            if not entry:
+                continue
+            if entry.startswith("["):
+                host, _, rest = entry[1:].partition("]")
+                port = rest.lstrip(":")
+            elif entry.count(":") == 1:
+                host, port = entry.split(":")
+            else:
+                host, port = entry, ""
+            endpoints.append((host, int(port) if port else self.port))
+        return endpoints
+
     def _validate_required_vars(self) -> None:
         """Validate that all required environment variables are set.
 
@@ -188,6 +369,12 @@ class ChDBConfig:
 
     Required environment variables:
         CHDB_DATA_PATH: The path to the chDB data directory (only required if CHDB_ENABLED=true)
+
+    Optional environment variables (with defaults):
+        CHDB_MATERIALIZE_TTL: Seconds a materialized source whose version cannot be
+            checked is reused, 0 to reuse it until a refresh is requested (default: 3600)
+        CHDB_MATERIALIZE_TIMEOUT: Seconds a materialize_source load may take, 0 for no
+            limit (default: 600)
     """
 
     def __init__(self):
@@ -208,6 +395,22 @@ class ChDBConfig:
         """Get the chDB data path."""
         return os.getenv("CHDB_DATA_PATH", ":memory:")
 
+    @property
+    def materialize_ttl(self) -> float:
+        """Get the seconds a materialized source without a checkable version is reused.
+
+        Default: 3600 (0 reuses it until a refresh is requested)
+        """
+        return float(os.getenv("CHDB_MATERIALIZE_TTL", "3600"))
+
+    @property
+    def materialize_timeout(self) -> float:
+        """Get the maximum time of a materialize_source load in seconds.
+
+        Default: 600
+        """
+        return float(os.getenv("CHDB_MATERIALIZE_TIMEOUT", "600"))
+
     def get_client_config(self) -> dict:
         """Get the configuration dictionary for chDB client.
 
@@ -269,7 +472,62 @@ class MCPServerConfig:
         CLICKHOUSE_MCP_SERVER_TRANSPORT: "stdio", "http", or "sse" (default: stdio)
         CLICKHOUSE_MCP_BIND_HOST: Bind host for HTTP/SSE (default: 127.0.0.1)
         CLICKHOUSE_MCP_BIND_PORT: Bind port for HTTP/SSE (default: 8000)
+        CLICKHOUSE_MCP_WORKERS: Number of worker processes for the HTTP transport; query job
+            tools are only registered with a single worker (default: 1)
         CLICKHOUSE_MCP_QUERY_TIMEOUT: SELECT tool timeout in seconds (default: 30)
+        CLICKHOUSE_MCP_SCHEMA_DIGEST_TTL: Seconds a describe_database_compact digest is
+            reused, 0 disables caching (default: 300)
+        CLICKHOUSE_MCP_COLUMN_STATS_TTL: Seconds column_stats results are reused while the
+            table's data parts are unchanged, 0 disables caching (default: 3600)
+        CLICKHOUSE_MCP_SCHEMA_INDEX_REFRESH: Seconds between search_schema index
+            refreshes (default: 60)
+        CLICKHOUSE_MCP_PROGRESS_INTERVAL: Seconds between progress notifications sent during
+            a run_select_query, 0 disables them (default: 1)
+        CLICKHOUSE_MCP_QUERY_SETTINGS_ALLOWLIST: JSON object of the settings callers may pass
+            to run_select_query, with "min"/"max" bounds or allowed "values" per setting
+            (default: max_threads, max_memory_usage, max_block_size, use_query_cache and
+            optimize_read_in_order with built-in bounds)
+        CLICKHOUSE_MCP_QUERY_PROFILES: JSON object of named settings profiles callers may
+            select (default: "interactive" and "heavy")
+        CLICKHOUSE_MCP_QUOTA_WINDOW: Length in seconds of the rolling window quotas are
+            counted over (default: 3600)
+        CLICKHOUSE_MCP_QUOTA_MAX_READ_ROWS: Rows each session or credential may read per
+            window, 0 for no limit (default: 0)
+        CLICKHOUSE_MCP_QUOTA_MAX_READ_BYTES: Bytes each session or credential may read per
+            window, 0 for no limit (default: 0)
+        CLICKHOUSE_MCP_QUOTA_MAX_QUERY_SECONDS: Query execution seconds each session or
+            credential may use per window, 0 for no limit (default: 0)
+        CLICKHOUSE_MCP_QUOTA_MODE: "reject" or "throttle" queries over quota (default: reject)
+            Quotas are counted per worker process; with CLICKHOUSE_MCP_WORKERS above 1 every
+            request is its own session, so only credential quotas take effect
+        CLICKHOUSE_MCP_ESCALATE_READONLY: Run queries written by callers with readonly=2
+            when they call table functions like numbers(), which readonly=1 forbids
+            (default: false)
+        CLICKHOUSE_MCP_COALESCE_QUERIES: Share the result of an in-flight run_select_query
+            or list_tables call with identical calls arriving meanwhile (default: true)
+        CLICKHOUSE_MCP_PREVIEW_MAX_ROWS_TO_READ: Rows a run_select_query in preview mode
+            reads at most (default: 10000000)
+        CLICKHOUSE_MCP_PREVIEW_MAX_BYTES_TO_READ: Uncompressed bytes a run_select_query in
+            preview mode reads at most (default: 1000000000)
+        CLICKHOUSE_MCP_PREVIEW_MAX_EXECUTION_TIME: Seconds after which a run_select_query in
+            preview mode returns what it has, 0 disables (default: 0)
+        CLICKHOUSE_MCP_JOB_MAX_RUNNING: Query jobs running at the same time (default: 4)
+        CLICKHOUSE_MCP_JOB_MAX_JOBS: Query jobs kept at once, including finished ones
+            (default: 100)
+        CLICKHOUSE_MCP_JOB_RETENTION: Seconds a finished query job's result is kept
+            (default: 3600)
+        CLICKHOUSE_MCP_JOB_TIMEOUT: Maximum execution time of a query job in seconds
+            (default: 3600)
+        CLICKHOUSE_MCP_JOB_MAX_RESULT_ROWS: Rows kept of a query job's result
+            (default: 100000)
+        CLICKHOUSE_MCP_JOB_MAX_RESULT_BYTES: JSON-encoded bytes kept of a query job's
+            result (default: 100000000)
+        CLICKHOUSE_MCP_HTTP_COMPRESSION: Compress HTTP/SSE responses with zstd or gzip when
+            the client accepts it (default: true)
+        CLICKHOUSE_MCP_HTTP_COMPRESSION_MIN_SIZE: Smallest response in bytes worth
+            compressing (default: 1024)
+        CLICKHOUSE_MCP_PAGE_TOKEN_SECRET: Secret used to sign page tokens. Must be shared
+            by all server processes that serve the same clients (default: random per process)
     """
 
     @property
@@ -288,10 +546,120 @@ class MCPServerConfig:
     def bind_port(self) -> int:
         return int(os.getenv("CLICKHOUSE_MCP_BIND_PORT", "8000"))
 
+    @property
+    def workers(self) -> int:
+        workers = int(os.getenv("CLICKHOUSE_MCP_WORKERS", "1"))
+        if workers < 1:
+            raise ValueError(f"Invalid worker count {workers}, CLICKHOUSE_MCP_WORKERS must be >= 1")
+        return workers
+
     @property
     def query_timeout(self) -> int:
         return int(os.getenv("CLICKHOUSE_MCP_QUERY_TIMEOUT", "30"))
 
+    @property
+    def schema_digest_ttl(self) -> int:
+        return int(os.getenv("CLICKHOUSE_MCP_SCHEMA_DIGEST_TTL", "300"))
+
+    @property
+    def column_stats_ttl(self) -> int:
+        return int(os.getenv("CLICKHOUSE_MCP_COLUMN_STATS_TTL", "3600"))
+
+    @property
+    def schema_index_refresh(self) -> float:
+        return float(os.getenv("CLICKHOUSE_MCP_SCHEMA_INDEX_REFRESH", "60"))
+
+    @property
+    def progress_interval(self) -> float:
+        return float(os.getenv("CLICKHOUSE_MCP_PROGRESS_INTERVAL", "1"))
+
+    @property
+    def query_settings_allowlist(self) -> Optional[str]:
+        return os.getenv("CLICKHOUSE_MCP_QUERY_SETTINGS_ALLOWLIST")
+
+    @property
+    def query_profiles(self) -> Optional[str]:
+        return os.getenv("CLICKHOUSE_MCP_QUERY_PROFILES")
+
+    @property
+    def quota_window(self) -> float:
+        return float(os.getenv("CLICKHOUSE_MCP_QUOTA_WINDOW", "3600"))
+
+    @property
+    def quota_max_read_rows(self) -> int:
+        return int(os.getenv("CLICKHOUSE_MCP_QUOTA_MAX_READ_ROWS", "0"))
+
+    @property
+    def quota_max_read_bytes(self) -> int:
+        return int(os.getenv("CLICKHOUSE_MCP_QUOTA_MAX_READ_BYTES", "0"))
+
+    @property
+    def quota_max_query_seconds(self) -> float:
+        return float(os.getenv("CLICKHOUSE_MCP_QUOTA_MAX_QUERY_SECONDS", "0"))
+
+    @property
+    def quota_mode(self) -> str:
+        mode = os.getenv("CLICKHOUSE_MCP_QUOTA_MODE", "reject").lower()
+        if mode not in ("reject", "throttle"):
+            raise ValueError(f"Invalid quota mode '{mode}'. Valid options: reject, throttle")
+        return mode
+
+    @property
+    def escalate_readonly(self) -> bool:
+        return os.getenv("CLICKHOUSE_MCP_ESCALATE_READONLY", "false").lower() == "true"
+
+    @property
+    def coalesce_queries(self) -> bool:
+        return os.getenv("CLICKHOUSE_MCP_COALESCE_QUERIES", "true").lower() == "true"
+
+    @property
+    def preview_max_rows_to_read(self) -> int:
+        return int(os.getenv("CLICKHOUSE_MCP_PREVIEW_MAX_ROWS_TO_READ", "10000000"))
+
+    @property
+    def preview_max_bytes_to_read(self) -> int:
+        return int(os.getenv("CLICKHOUSE_MCP_PREVIEW_MAX_BYTES_TO_READ", "1000000000"))
+
+    @property
+    def preview_max_execution_time(self) -> float:
+        return float(os.getenv("CLICKHOUSE_MCP_PREVIEW_MAX_EXECUTION_TIME", "0"))
+
+    @property
+    def job_max_running(self) -> int:
+        return int(os.getenv("CLICKHOUSE_MCP_JOB_MAX_RUNNING", "4"))
+
+    @property
+    def job_max_jobs(self) -> int:
+        return int(os.getenv("CLICKHOUSE_MCP_JOB_MAX_JOBS", "100"))
+
+    @property
+    def job_retention(self) -> float:
+        return float(os.getenv("CLICKHOUSE_MCP_JOB_RETENTION", "3600"))
+
+    @property
+    def job_timeout(self) -> float:
+        return float(os.getenv("CLICKHOUSE_MCP_JOB_TIMEOUT", "3600"))
+
+    @property
+    def job_max_result_rows(self) -> int:
+        return int(os.getenv("CLICKHOUSE_MCP_JOB_MAX_RESULT_ROWS", "100000"))
+
+    @property
+    def job_max_result_bytes(self) -> int:
+        return int(os.getenv("CLICKHOUSE_MCP_JOB_MAX_RESULT_BYTES", "100000000"))
+
+    @property
+    def http_compression(self) -> bool:
+        return os.getenv("CLICKHOUSE_MCP_HTTP_COMPRESSION", "true").lower() == "true"
+
+    @property
+    def http_compression_min_size(self) -> int:
+        return int(os.getenv("CLICKHOUSE_MCP_HTTP_COMPRESSION_MIN_SIZE", "1024"))
+
+    @property
+    def page_token_secret(self) -> Optional[str]:
+        return os.getenv("CLICKHOUSE_MCP_PAGE_TOKEN_SECRET")
+
 
 _MCP_CONFIG_INSTANCE = None
 
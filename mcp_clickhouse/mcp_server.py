@@ -1,26 +1,65 @@
+import asyncio
 import logging
 import json
-from typing import Optional, List, Any, Dict, Union
+from typing import Optional, List, Any, Callable, Dict, Tuple, Union
 import concurrent.futures
 import atexit
+import functools
+import hashlib
 import os
+import re
+import threading
+import time
 import uuid
 
 import clickhouse_connect
+from cachetools import TTLCache
 import chdb.session as chs
-from clickhouse_connect.driver.binding import format_query_value
+from clickhouse_connect.driver.binding import format_query_value, quote_identifier
 from dotenv import load_dotenv
-from fastmcp import FastMCP
-from cachetools import TTLCache
-from fastmcp.tools import Tool
+from fastmcp import Context, FastMCP
+from fastmcp.tools import Tool, ToolResult
 from fastmcp.prompts import Prompt
 from fastmcp.exceptions import ToolError
-from dataclasses import dataclass, field, asdict, is_dataclass
+from dataclasses import dataclass, field, fields, asdict
 from starlette.requests import Request
 from starlette.responses import PlainTextResponse
 
 from mcp_clickhouse.mcp_env import get_config, get_chdb_config, get_mcp_config
+from mcp_clickhouse.endpoints import WORKLOAD_METADATA, WORKLOAD_QUERY, get_endpoint_pool
+from mcp_clickhouse.circuit_breaker import (
+    CircuitOpenError,
+    CircuitState,
+    get_circuit_breaker,
+    is_connection_error,
+)
+from mcp_clickhouse.retry import LatencyTracker, hedged_call, retry_call
+from mcp_clickhouse.page_tokens import decode_page_token, encode_page_token
+from mcp_clickhouse.schema_index import KIND_COLUMN, KIND_TABLE, get_schema_index
+from mcp_clickhouse.serialization import columns_to_rows, dumps, json_tool_result
+from mcp_clickhouse.jobs import (
+    JOB_FAILED,
+    JOB_RUNNING,
+    JOB_SUCCEEDED,
+    JobError,
+    QueryJob,
+    get_job_manager,
+)
+from mcp_clickhouse.query_settings import (
+    external_table_functions,
+    has_settings_clause,
+    resolve_query_settings,
+    table_functions,
+)
+from mcp_clickhouse.quotas import (
+    QUOTA_MODE_THROTTLE,
+    QuotaExceededError,
+    Usage,
+    get_quota_tracker,
+)
+from mcp_clickhouse.singleflight import call_key, get_single_flight, normalize_query
 from mcp_clickhouse.chdb_prompt import CHDB_PROMPT
+from mcp_clickhouse.chdb_materialize import MaterializedSources, MaterializeError
 
 
 @dataclass
@@ -38,23 +77,47 @@ class Column:
 class Table:
     database: str
     name: str
-    engine: str
-    create_table_query: str
-    dependencies_database: str
-    dependencies_table: str
-    engine_full: str
-    sorting_key: str
-    primary_key: str
-    total_rows: int
-    total_bytes: int
-    total_bytes_uncompressed: int
-    parts: int
-    active_parts: int
-    total_marks: int
+    engine: Optional[str] = None
+    create_table_query: Optional[str] = None
+    dependencies_database: Optional[str] = None
+    dependencies_table: Optional[str] = None
+    engine_full: Optional[str] = None
+    sorting_key: Optional[str] = None
+    primary_key: Optional[str] = None
+    total_rows: Optional[int] = None
+    total_bytes: Optional[int] = None
+    total_bytes_uncompressed: Optional[int] = None
+    parts: Optional[int] = None
+    active_parts: Optional[int] = None
+    total_marks: Optional[int] = None
     comment: Optional[str] = None
     columns: List[Column] = field(default_factory=list)
 
 
+# system.tables columns that can be requested through list_tables' fields parameter
+TABLE_FIELDS = [f.name for f in fields(Table) if f.name != "columns"]
+
+# Named field projections for list_tables; database and name are always included
+TABLE_FIELD_PRESETS = {
+    "minimal": ["database", "name", "engine", "comment"],
+    "stats": [
+        "database",
+        "name",
+        "engine",
+        "sorting_key",
+        "primary_key",
+        "total_rows",
+        "total_bytes",
+        "total_bytes_uncompressed",
+        "parts",
+        "active_parts",
+        "total_marks",
+        "comment",
+    ],
+    "full": TABLE_FIELDS,
+}
+
+
 MCP_SERVER_NAME = "mcp-clickhouse"
 
 # Configure logging
@@ -66,8 +129,48 @@ logger = logging.getLogger(MCP_SERVER_NAME)
 QUERY_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=10)
 atexit.register(lambda: QUERY_EXECUTOR.shutdown(wait=True))
 
+# Hedged metadata requests run here so they never queue behind slow SELECTs
+HEDGE_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=10)
+atexit.register(lambda: HEDGE_EXECUTOR.shutdown(wait=False))
+
+# Recent metadata query latencies, used to derive the hedging delay
+METADATA_LATENCY = LatencyTracker()
+
+# Clients running run_select_query calls that report progress and run_select_queries
+# queries, by query id
+RUNNING_QUERIES: Dict[str, Any] = {}
+
+# run_select_query modes: full results, or a bounded read for a quick approximate answer
+QUERY_MODE_FULL = "full"
+QUERY_MODE_PREVIEW = "preview"
+QUERY_MODES = (QUERY_MODE_FULL, QUERY_MODE_PREVIEW)
+
+# Most queries one run_select_queries call may run; they share QUERY_EXECUTOR with other calls
+MAX_BATCH_QUERIES = 10
+
+# sample_table bounds: rows returned, data parts read and rows read per returned row
+SAMPLE_MAX_ROWS = 10000
+SAMPLE_MAX_PARTS = 4
+SAMPLE_MIN_ROWS_TO_READ = 8192
+SAMPLE_READ_FACTOR = 4
+
+# column_stats bounds: rows sampled per table and most frequent values returned per column
+COLUMN_STATS_SAMPLE_ROWS = 100000
+COLUMN_STATS_MAX_TOP_K = 100
+
+# analyze_query hints when a read of more than this many granules selects at least this fraction
+ANALYZE_MIN_GRANULES = 2
+ANALYZE_POOR_PRUNING_RATIO = 0.5
+
 load_dotenv()
 
+# Caches are created after load_dotenv() so their TTLs can be set in .env.
+# Schema digests built by describe_database_compact, keyed by database and filters
+schema_digest_cache = TTLCache(maxsize=100, ttl=max(get_mcp_config().schema_digest_ttl, 1))
+
+# Statistics computed by column_stats, keyed by column and stored with the table's parts fingerprint
+column_stats_cache = TTLCache(maxsize=1000, ttl=max(get_mcp_config().column_stats_ttl, 1))
+
 mcp = FastMCP(name=MCP_SERVER_NAME)
 
 
@@ -75,7 +178,8 @@ mcp = FastMCP(name=MCP_SERVER_NAME)
 async def health_check(request: Request) -> PlainTextResponse:
     """Health check endpoint for monitoring server status.
 
-    Returns OK if the server is running and can connect to ClickHouse.
+    Returns OK if the server is running and can connect to ClickHouse. While the
+    circuit breaker is open the endpoint reports 503 without attempting a connection.
     """
     try:
         # Check if ClickHouse is enabled by trying to create config
@@ -94,8 +198,16 @@ async def health_check(request: Request) -> PlainTextResponse:
                     status_code=503,
                 )
 
+        breaker = get_circuit_breaker()
+        if breaker.state == CircuitState.OPEN:
+            return PlainTextResponse(
+                f"ERROR - Circuit breaker {breaker.state.value}, "
+                f"ClickHouse unavailable after {breaker.consecutive_failures} consecutive failures",
+                status_code=503,
+            )
+
         # Try to create a client connection to verify ClickHouse connectivity
-        client = create_clickhouse_client()
+        client = create_clickhouse_client(WORKLOAD_METADATA)
         version = client.server_version
         return PlainTextResponse(f"OK - Connected to ClickHouse {version}")
     except Exception as e:
@@ -103,6 +215,43 @@ async def health_check(request: Request) -> PlainTextResponse:
         return PlainTextResponse(f"ERROR - Cannot connect to ClickHouse: {str(e)}", status_code=503)
 
 
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> PlainTextResponse:
+    """Expose connection health metrics in the Prometheus text format."""
+    lines = []
+    if os.getenv("CLICKHOUSE_ENABLED", "true").lower() == "true":
+        breaker = get_circuit_breaker().snapshot()
+        lines.append("# TYPE mcp_clickhouse_circuit_breaker_state gauge")
+        for state in CircuitState:
+            value = 1 if breaker["state"] == state.value else 0
+            lines.append(f'mcp_clickhouse_circuit_breaker_state{{state="{state.value}"}} {value}')
+        lines.append("# TYPE mcp_clickhouse_circuit_breaker_consecutive_failures gauge")
+        lines.append(
+            f"mcp_clickhouse_circuit_breaker_consecutive_failures {breaker['consecutive_failures']}"
+        )
+        lines.append("# TYPE mcp_clickhouse_circuit_breaker_opened_total counter")
+        lines.append(f"mcp_clickhouse_circuit_breaker_opened_total {breaker['times_opened']}")
+
+        pools = {WORKLOAD_QUERY: get_endpoint_pool(WORKLOAD_QUERY)}
+        metadata_pool = get_endpoint_pool(WORKLOAD_METADATA)
+        if metadata_pool is not pools[WORKLOAD_QUERY]:
+            pools[WORKLOAD_METADATA] = metadata_pool
+
+        lines.append("# TYPE mcp_clickhouse_endpoint_healthy gauge")
+        lines.append("# TYPE mcp_clickhouse_endpoint_in_flight gauge")
+        for workload, pool in pools.items():
+            for endpoint in pool.snapshot():
+                labels = f'workload="{workload}",endpoint="{endpoint["address"]}"'
+                lines.append(
+                    f"mcp_clickhouse_endpoint_healthy{{{labels}}} {int(endpoint['healthy'])}"
+                )
+                lines.append(f"mcp_clickhouse_endpoint_in_flight{{{labels}}} {endpoint['in_flight']}")
+
+        lines.append("# TYPE mcp_clickhouse_coalesced_calls_total counter")
+        lines.append(f"mcp_clickhouse_coalesced_calls_total {get_single_flight().coalesced}")
+    return PlainTextResponse("\n".join(lines) + "\n")
+
+
 def result_to_table(query_columns, result) -> List[Table]:
     return [Table(**dict(zip(query_columns, row))) for row in result]
 
@@ -111,14 +260,68 @@ def result_to_column(query_columns, result) -> List[Column]:
     return [Column(**dict(zip(query_columns, row))) for row in result]
 
 
-def to_json(obj: Any) -> str:
-    if is_dataclass(obj):
-        return json.dumps(asdict(obj), default=to_json)
-    elif isinstance(obj, list):
-        return [to_json(item) for item in obj]
-    elif isinstance(obj, dict):
-        return {key: to_json(value) for key, value in obj.items()}
-    return obj
+def query_with_retry(
+    client,
+    query: str,
+    settings: Optional[Dict[str, Any]] = None,
+    workload: str = WORKLOAD_METADATA,
+    hedge: bool = False,
+    parameters: Optional[Dict[str, Any]] = None,
+):
+    """Run an idempotent query, retrying transient errors and optionally hedging it.
+
+    A retry after a connection error uses a new client so that it can fail over
+    to another endpoint. Hedging only applies when CLICKHOUSE_HEDGE_METADATA is
+    enabled and enough latency samples exist to estimate the p95. Queries with a
+    query_id setting are sent only once: the first attempt may still be running on
+    the server, which rejects a second query with the same id.
+
+    Args:
+        client: ClickHouse client used for the first attempt
+        query: The query to run
+        settings: Optional ClickHouse settings for the query
+        workload: Workload used when a new client is needed
+        hedge: Whether the query is latency sensitive and may be hedged
+        parameters: Optional values for {name:Type} placeholders, bound server-side
+
+    Returns:
+        The clickhouse_connect QueryResult
+    """
+    config = get_config()
+    current = {"client": client}
+    fixed_id = bool(settings and settings.get("query_id"))
+
+    def reconnect(err: BaseException) -> None:
+        if is_connection_error(err):
+            current["client"] = create_clickhouse_client(workload)
+
+    def attempt():
+        target = current["client"]
+        hedged = hedge and config.hedge_metadata and not fixed_id
+        p95 = METADATA_LATENCY.percentile(95) if hedged else None
+        started = time.monotonic()
+        if p95 is None:
+            result = target.query(query, parameters=parameters, settings=settings)
+        else:
+            result = hedged_call(
+                lambda: target.query(query, parameters=parameters, settings=settings),
+                lambda: create_clickhouse_client(workload).query(
+                    query, parameters=parameters, settings=settings
+                ),
+                max(p95, config.hedge_min_delay),
+                HEDGE_EXECUTOR,
+            )
+        if hedge:
+            METADATA_LATENCY.record(time.monotonic() - started)
+        return result
+
+    return retry_call(
+        attempt,
+        0 if fixed_id else config.retry_attempts,
+        config.retry_backoff,
+        config.retry_max_backoff,
+        on_retry=reconnect,
+    )
 
 
 def list_databases(
@@ -137,7 +340,7 @@ def list_databases(
         JSON array of database names
     """
     logger.info("Listing databases with like=%s, not_like=%s", like, not_like)
-    client = create_clickhouse_client()
+    client = create_clickhouse_client(WORKLOAD_METADATA)
 
     # Use system.databases for filtering support
     query = "SELECT name FROM system.databases WHERE 1=1"
@@ -154,161 +357,274 @@ def list_databases(
         not_like_conditions = [f"name NOT LIKE {format_query_value(pattern)}" for pattern in not_like_patterns]
         query += f" AND ({' AND '.join(not_like_conditions)})"
 
-    result = client.query(query)
+    result = query_with_retry(client, query, hedge=True)
     databases = [row[0] for row in result.result_rows]
 
     logger.info(f"Found {len(databases)} databases")
     return json.dumps(databases)
 
 
-# Store pagination state for list_tables with 1-hour expiry
-# Using TTLCache from cachetools to automatically expire entries after 1 hour
-table_pagination_cache: TTLCache = TTLCache(maxsize=100, ttl=3600)  # 3600 seconds = 1 hour
-
-
-def fetch_table_names_from_system(
-    client,
-    database: str,
+def build_table_filter(
+    database: Optional[Union[str, List[str]]],
     like: Optional[Union[str, List[str]]] = None,
     not_like: Optional[Union[str, List[str]]] = None,
-) -> List[str]:
-    """Get list of table names from system.tables.
+    database_like: Optional[Union[str, List[str]]] = None,
+) -> str:
+    """Build the system.tables WHERE condition for databases and name filters.
 
     Args:
-        client: ClickHouse client
-        database: Database name
+        database: Database name, or a list of database names
         like: Optional pattern(s) to filter table names (LIKE). Can be a single string or list of strings.
               Multiple patterns are combined with OR logic.
         not_like: Optional pattern(s) to filter out table names (NOT LIKE). Can be a single string or list of strings.
                   Multiple patterns are combined with OR logic.
+        database_like: Optional LIKE pattern(s) selecting databases. Can be a single string or list
+              of strings. Multiple patterns are combined with OR logic.
 
     Returns:
-        List of table names
+        SQL condition usable after WHERE
     """
-    query = f"SELECT name FROM system.tables WHERE database = {format_query_value(database)}"
+    conditions = []
+    if isinstance(database, str):
+        conditions.append(f"database = {format_query_value(database)}")
+    elif database is not None:
+        conditions.append(f"database IN {format_query_value(list(database))}")
+
+    if database_like:
+        database_patterns = [database_like] if isinstance(database_like, str) else database_like
+        database_conditions = [
+            f"database LIKE {format_query_value(pattern)}" for pattern in database_patterns
+        ]
+        conditions.append(f"({' OR '.join(database_conditions)})")
+    condition = " AND ".join(conditions) or "1"
 
     # Handle like patterns (single string or list)
     if like:
         like_patterns = [like] if isinstance(like, str) else like
         like_conditions = [f"name LIKE {format_query_value(pattern)}" for pattern in like_patterns]
-        query += f" AND ({' OR '.join(like_conditions)})"
+        condition += f" AND ({' OR '.join(like_conditions)})"
 
     # Handle not_like patterns (single string or list)
     if not_like:
         not_like_patterns = [not_like] if isinstance(not_like, str) else not_like
         not_like_conditions = [f"name NOT LIKE {format_query_value(pattern)}" for pattern in not_like_patterns]
-        query += f" AND ({' AND '.join(not_like_conditions)})"
+        condition += f" AND ({' AND '.join(not_like_conditions)})"
+
+    return condition
+
+
+def count_tables(
+    client,
+    database: Optional[Union[str, List[str]]],
+    like: Optional[Union[str, List[str]]] = None,
+    not_like: Optional[Union[str, List[str]]] = None,
+    database_like: Optional[Union[str, List[str]]] = None,
+) -> int:
+    """Count the tables matching database and name filters.
+
+    Args:
+        client: ClickHouse client
+        database: Database name, or a list of database names
+        like: Optional LIKE pattern(s) to filter table names
+        not_like: Optional NOT LIKE pattern(s) to exclude table names
+        database_like: Optional LIKE pattern(s) selecting databases
+
+    Returns:
+        Number of matching tables
+    """
+    condition = build_table_filter(database, like, not_like, database_like)
+    query = f"SELECT count() FROM system.tables WHERE {condition}"
+    result = query_with_retry(client, query, hedge=True)
+    return result.result_rows[0][0]
+
 
-    result = client.query(query)
-    table_names = [row[0] for row in result.result_rows]
-    return table_names
+def resolve_table_fields(table_fields: Optional[Union[str, List[str]]] = None) -> List[str]:
+    """Resolve a list_tables field projection to system.tables column names.
+
+    Args:
+        table_fields: A preset name ("minimal", "stats" or "full"), a list of Table
+            field names, or None for all fields
+
+    Returns:
+        The requested fields in Table order, always including database and name
+
+    Raises:
+        ToolError: If the preset or a field name is unknown
+    """
+    if table_fields is None:
+        return TABLE_FIELDS
+    if isinstance(table_fields, str):
+        if table_fields not in TABLE_FIELD_PRESETS:
+            valid_options = ", ".join(f'"{p}"' for p in TABLE_FIELD_PRESETS)
+            raise ToolError(
+                f"Unknown fields preset '{table_fields}'. Valid options: {valid_options}"
+            )
+        return TABLE_FIELD_PRESETS[table_fields]
+
+    unknown = sorted(set(table_fields) - set(TABLE_FIELDS))
+    if unknown:
+        raise ToolError(
+            f"Unknown table fields: {', '.join(unknown)}. Valid fields: {', '.join(TABLE_FIELDS)}"
+        )
+    requested = {"database", "name", *table_fields}
+    return [name for name in TABLE_FIELDS if name in requested]
+
+
+def fetch_table_columns(client, tables: List[Table]) -> None:
+    """Fill in the columns of tables with a single system.columns query.
+
+    Args:
+        client: ClickHouse client
+        tables: Tables whose columns attribute is replaced
+    """
+    for table in tables:
+        table.columns = []
+    if not tables:
+        return
+
+    keys = ", ".join(
+        f"({format_query_value(table.database)}, {format_query_value(table.name)})"
+        for table in tables
+    )
+    column_data_query = f"""
+        SELECT database, table, name, type AS column_type, default_kind, default_expression, comment
+        FROM system.columns
+        WHERE (database, table) IN ({keys})
+        ORDER BY database, table, position
+    """
+    column_data_query_result = query_with_retry(client, column_data_query, hedge=True)
+    tables_by_key = {(table.database, table.name): table for table in tables}
+    for column in result_to_column(
+        column_data_query_result.column_names,
+        column_data_query_result.result_rows,
+    ):
+        tables_by_key[(column.database, column.table)].columns.append(column)
 
 
 def get_paginated_table_data(
     client,
-    database: str,
-    table_names: List[str],
-    start_idx: int,
+    database: Optional[Union[str, List[str]]],
+    like: Optional[Union[str, List[str]]],
+    not_like: Optional[Union[str, List[str]]],
+    after_name: Optional[str],
     page_size: int,
     include_detailed_columns: bool = True,
-) -> tuple[List[Table], int, bool]:
-    """Get detailed information for a page of tables.
+    table_fields: Optional[List[str]] = None,
+    database_like: Optional[Union[str, List[str]]] = None,
+    after_database: Optional[str] = None,
+) -> tuple[List[Table], Optional[str], bool]:
+    """Get detailed information for the page of tables that follows a cursor.
+
+    Tables are paginated by (database, name) (keyset pagination): each page
+    selects the first page_size tables that sort after the last table of the
+    previous page.
 
     Args:
         client: ClickHouse client
-        database: Database name
-        table_names: List of all table names to paginate
-        start_idx: Starting index for pagination
+        database: Database name, or a list of database names
+        like: LIKE pattern(s) to filter table names
+        not_like: NOT LIKE pattern(s) to exclude table names
+        after_name: Last table name of the previous page, or None for the first page
         page_size: Number of tables per page
         include_detailed_columns: Whether to include detailed column metadata (default: True)
+        table_fields: system.tables columns to read, as returned by resolve_table_fields
+            (default: all). Fields that are not read are left as None.
+        database_like: LIKE pattern(s) selecting databases
+        after_database: Database of the last table of the previous page. When None,
+            after_name is compared within a single database.
 
     Returns:
-        Tuple of (list of Table objects, end index, has more pages)
+        Tuple of (list of Table objects, last table name on the page, has more pages)
     """
-    end_idx = min(start_idx + page_size, len(table_names))
-    current_page_table_names = table_names[start_idx:end_idx]
-
-    if not current_page_table_names:
-        return [], end_idx, False
+    condition = build_table_filter(database, like, not_like, database_like)
+    if after_name is not None:
+        if after_database is None:
+            condition += f" AND name > {format_query_value(after_name)}"
+        else:
+            condition += (
+                f" AND (database, name) > "
+                f"({format_query_value(after_database)}, {format_query_value(after_name)})"
+            )
 
+    # Fetch one extra row to find out whether another page follows
     query = f"""
-        SELECT database, name, engine, create_table_query, dependencies_database,
-               dependencies_table, engine_full, sorting_key, primary_key, total_rows,
-               total_bytes, total_bytes_uncompressed, parts, active_parts, total_marks, comment
+        SELECT {", ".join(table_fields or TABLE_FIELDS)}
         FROM system.tables
-        WHERE database = {format_query_value(database)}
-        AND name IN ({", ".join(format_query_value(name) for name in current_page_table_names)})
+        WHERE {condition}
+        ORDER BY database, name
+        LIMIT {int(page_size) + 1}
     """
 
-    result = client.query(query)
+    result = query_with_retry(client, query, hedge=True)
     tables = result_to_table(result.column_names, result.result_rows)
+    has_more = len(tables) > page_size
+    tables = tables[:page_size]
 
     if include_detailed_columns:
-        for table in tables:
-            column_data_query = f"""
-                SELECT database, table, name, type AS column_type, default_kind, default_expression, comment
-                FROM system.columns
-                WHERE database = {format_query_value(database)}
-                AND table = {format_query_value(table.name)}
-            """
-            column_data_query_result = client.query(column_data_query)
-            table.columns = result_to_column(
-                column_data_query_result.column_names,
-                column_data_query_result.result_rows,
-            )
+        fetch_table_columns(client, tables)
     else:
         for table in tables:
             table.columns = []
 
-    return tables, end_idx, end_idx < len(table_names)
+    last_name = tables[-1].name if tables else after_name
+    return tables, last_name, has_more
 
 
 def create_page_token(
-    database: str,
+    database: Optional[Union[str, List[str]]],
     like: Optional[Union[str, List[str]]],
     not_like: Optional[Union[str, List[str]]],
-    table_names: List[str],
-    end_idx: int,
+    last_name: str,
     include_detailed_columns: bool,
+    table_fields: Optional[List[str]] = None,
+    database_like: Optional[Union[str, List[str]]] = None,
+    last_database: Optional[str] = None,
 ) -> str:
-    """Create a new page token and store it in the cache.
+    """Create a signed page token holding the complete pagination state.
 
     Args:
-        database: Database name
+        database: Database name, or list of database names
         like: LIKE pattern(s) used to filter tables
         not_like: NOT LIKE pattern(s) used to filter tables
-        table_names: List of all table names
-        end_idx: Index to start from for the next page
+        last_name: Name of the last table returned, the next page starts after it
         include_detailed_columns: Whether to include detailed column metadata
+        table_fields: Resolved field projection of the listing
+        database_like: LIKE pattern(s) used to select databases
+        last_database: Database of the last table returned
 
     Returns:
         New page token
     """
-    token = str(uuid.uuid4())
-    table_pagination_cache[token] = {
-        "database": database,
-        "like": like,
-        "not_like": not_like,
-        "table_names": table_names,
-        "start_idx": end_idx,
-        "include_detailed_columns": include_detailed_columns,
-    }
-    return token
+    return encode_page_token(
+        {
+            "database": database,
+            "database_like": database_like,
+            "like": like,
+            "not_like": not_like,
+            "last_database": last_database,
+            "last_name": last_name,
+            "include_detailed_columns": include_detailed_columns,
+            "fields": table_fields,
+        }
+    )
 
 
 def list_tables(
-    database: str,
+    database: Optional[Union[str, List[str]]] = None,
     like: Optional[Union[str, List[str]]] = None,
     not_like: Optional[Union[str, List[str]]] = None,
     page_token: Optional[str] = None,
     page_size: int = 50,
     include_detailed_columns: bool = True,
+    fields: Optional[Union[str, List[str]]] = None,
+    database_like: Optional[Union[str, List[str]]] = None,
 ) -> Dict[str, Any]:
-    """List available ClickHouse tables in a database, including schema, comment,
-    row count, and column count.
+    """List available ClickHouse tables in one or more databases, including schema,
+    comment, row count, and column count.
 
     Args:
-        database: The database to list tables from
+        database: The database to list tables from, or a list of databases. Tables of
+            several databases are listed together in one paginated result.
         like: Optional LIKE pattern(s) to filter table names. Can be a single string or list of strings.
               Multiple patterns are combined with OR logic.
         not_like: Optional NOT LIKE pattern(s) to exclude table names. Can be a single string or list of strings.
@@ -318,123 +634,462 @@ def list_tables(
         include_detailed_columns: Whether to include detailed column metadata (default: True).
             When False, the columns array will be empty but create_table_query still contains
             all column information. This reduces payload size for large schemas.
+        fields: Table fields to return (default: all). Either a preset, "minimal"
+            (database, name, engine, comment), "stats" (adds keys, row, byte, part and
+            mark counts) or "full", or a list of field names. Leaving out
+            create_table_query and engine_full makes a table inventory much cheaper.
+        database_like: Optional LIKE pattern(s) selecting the databases to list tables
+            from, e.g. "analytics_%". Can be used instead of, or together with, database.
 
     Returns:
         A dictionary containing:
-        - tables: List of table information (as dictionaries)
+        - tables: List of table information (as dictionaries), ordered by database and name
         - next_page_token: Token for the next page, or None if no more pages
         - total_tables: Total number of tables matching the filters
     """
     logger.info(
-        "Listing tables in database '%s' with like=%s, not_like=%s, "
-        "page_token=%s, page_size=%s, include_detailed_columns=%s",
+        "Listing tables in database %s with database_like=%s, like=%s, not_like=%s, "
+        "page_token=%s, page_size=%s, include_detailed_columns=%s, fields=%s",
         database,
+        database_like,
         like,
         not_like,
         page_token,
         page_size,
         include_detailed_columns,
+        fields,
     )
-    client = create_clickhouse_client()
+    if database is None and not database_like:
+        raise ToolError("Either database or database_like must be given")
+    table_fields = resolve_table_fields(fields)
+    args = (
+        database,
+        like,
+        not_like,
+        page_token,
+        page_size,
+        include_detailed_columns,
+        table_fields,
+        database_like,
+    )
+    if not get_mcp_config().coalesce_queries:
+        return fetch_tables_page(*args)
+    return get_single_flight().do(call_key("list_tables", *args), lambda: fetch_tables_page(*args))
 
-    if page_token and page_token in table_pagination_cache:
-        cached_state = table_pagination_cache[page_token]
-        cached_include_detailed = cached_state.get("include_detailed_columns", True)
 
-        if (
-            cached_state["database"] != database
-            or cached_state["like"] != like
-            or cached_state["not_like"] != not_like
-            or cached_include_detailed != include_detailed_columns
+def fetch_tables_page(
+    database: Optional[Union[str, List[str]]],
+    like: Optional[Union[str, List[str]]],
+    not_like: Optional[Union[str, List[str]]],
+    page_token: Optional[str],
+    page_size: int,
+    include_detailed_columns: bool,
+    table_fields: List[str],
+    database_like: Optional[Union[str, List[str]]],
+) -> Dict[str, Any]:
+    """Fetch one page of list_tables results."""
+    client = create_clickhouse_client(WORKLOAD_METADATA)
+
+    after_name = None
+    after_database = None
+    if page_token:
+        token_state = decode_page_token(page_token)
+        if token_state is None:
+            logger.warning(
+                "Page token %s is invalid or expired. Starting from beginning.", page_token
+            )
+        elif (
+            token_state["database"] != database
+            or token_state.get("database_like") != database_like
+            or token_state["like"] != like
+            or token_state["not_like"] != not_like
+            or token_state["include_detailed_columns"] != include_detailed_columns
+            or token_state.get("fields") != table_fields
         ):
             logger.warning(
                 "Page token %s is for a different database, filter, or metadata setting. "
                 "Ignoring token and starting from beginning.",
                 page_token,
             )
-            page_token = None
         else:
-            table_names = cached_state["table_names"]
-            start_idx = cached_state["start_idx"]
-
-            tables, end_idx, has_more = get_paginated_table_data(
-                client,
-                database,
-                table_names,
-                start_idx,
-                page_size,
-                include_detailed_columns,
-            )
-
-            next_page_token = None
-            if has_more:
-                next_page_token = create_page_token(
-                    database, like, not_like, table_names, end_idx, include_detailed_columns
-                )
+            after_name = token_state["last_name"]
+            after_database = token_state.get("last_database")
 
-            del table_pagination_cache[page_token]
-
-            logger.info(
-                "Returned page with %s tables (total: %s), next_page_token=%s",
-                len(tables),
-                len(table_names),
-                next_page_token,
-            )
-            return {
-                "tables": [asdict(table) for table in tables],
-                "next_page_token": next_page_token,
-                "total_tables": len(table_names),
-            }
-
-    table_names = fetch_table_names_from_system(client, database, like, not_like)
-
-    start_idx = 0
-    tables, end_idx, has_more = get_paginated_table_data(
+    total_tables = count_tables(client, database, like, not_like, database_like)
+    tables, last_name, has_more = get_paginated_table_data(
         client,
         database,
-        table_names,
-        start_idx,
+        like,
+        not_like,
+        after_name,
         page_size,
         include_detailed_columns,
+        table_fields,
+        database_like,
+        after_database,
     )
 
     next_page_token = None
     if has_more:
         next_page_token = create_page_token(
-            database, like, not_like, table_names, end_idx, include_detailed_columns
+            database,
+            like,
+            not_like,
+            last_name,
+            include_detailed_columns,
+            table_fields,
+            database_like,
+            tables[-1].database,
         )
 
     logger.info(
         "Found %s tables, returning %s with next_page_token=%s",
-        len(table_names),
+        total_tables,
         len(tables),
         next_page_token,
     )
 
+    # Only serialize the requested fields, plus the column list
+    returned_fields = set(table_fields) | {"columns"}
     return {
-        "tables": [asdict(table) for table in tables],
+        "tables": [
+            {key: value for key, value in asdict(table).items() if key in returned_fields}
+            for table in tables
+        ],
         "next_page_token": next_page_token,
-        "total_tables": len(table_names),
+        "total_tables": total_tables,
     }
 
 
-def execute_query(query: str):
-    client = create_clickhouse_client()
+def build_schema_digest(
+    client,
+    database: str,
+    like: Optional[Union[str, List[str]]] = None,
+    not_like: Optional[Union[str, List[str]]] = None,
+) -> List[str]:
+    """Build one condensed line per table from a single grouped metadata query.
+
+    Each line reads ``name engine ORDER BY key rows=N: col Type, col Type, ...``.
+
+    Args:
+        client: ClickHouse client
+        database: Database name
+        like: Optional LIKE pattern(s) to filter table names
+        not_like: Optional NOT LIKE pattern(s) to exclude table names
+
+    Returns:
+        Digest lines ordered by table name
+    """
+    query = f"""
+        SELECT t.name, t.engine, t.sorting_key, t.total_rows, c.columns
+        FROM system.tables AS t
+        LEFT JOIN (
+            -- groupArray keeps no order, so sort each table's columns by position
+            SELECT
+                table,
+                arrayMap(x -> x.2, arraySort(groupArray((position, concat(name, ' ', type)))))
+                    AS columns
+            FROM system.columns
+            WHERE database = {format_query_value(database)}
+            GROUP BY table
+        ) AS c ON c.table = t.name
+        WHERE {build_table_filter(database, like, not_like)}
+        ORDER BY t.name
+    """
+    result = query_with_retry(client, query, hedge=True)
+
+    lines = []
+    for name, engine, sorting_key, total_rows, columns in result.result_rows:
+        line = f"{name} {engine}"
+        if sorting_key:
+            line += f" ORDER BY {sorting_key}"
+        if total_rows is not None:
+            line += f" rows={total_rows}"
+        lines.append(f"{line}: {', '.join(columns)}")
+    return lines
+
+
+def describe_database_compact(
+    database: str,
+    like: Optional[Union[str, List[str]]] = None,
+    not_like: Optional[Union[str, List[str]]] = None,
+    max_bytes: int = 20000,
+    use_cache: bool = True,
+) -> Dict[str, Any]:
+    """Describe all tables of a ClickHouse database in a compact, token-efficient form.
+
+    Returns one line per table with its engine, sorting key, row count and
+    column names and types, fetched in a single round trip. Use this to get an
+    overview of a database before looking at individual tables with list_tables.
+
+    Args:
+        database: The database to describe
+        like: Optional LIKE pattern(s) to filter table names
+        not_like: Optional NOT LIKE pattern(s) to exclude table names
+        max_bytes: Maximum size of the returned schema text (default: 20000). Tables
+            that do not fit are counted in omitted_tables.
+        use_cache: Whether a recently built digest may be reused (default: True)
+
+    Returns:
+        A dictionary containing:
+        - database: The described database
+        - schema: Newline-separated table lines ordered by table name
+        - total_tables: Number of tables matching the filters
+        - omitted_tables: Number of tables left out to stay within max_bytes
+    """
+    logger.info(
+        "Describing database '%s' with like=%s, not_like=%s, max_bytes=%s",
+        database,
+        like,
+        not_like,
+        max_bytes,
+    )
+    cache_key = json.dumps([database, like, not_like])
+    lines = schema_digest_cache.get(cache_key) if use_cache else None
+    if lines is None:
+        client = create_clickhouse_client(WORKLOAD_METADATA)
+        lines = build_schema_digest(client, database, like, not_like)
+        if get_mcp_config().schema_digest_ttl > 0:
+            schema_digest_cache[cache_key] = lines
+
+    included = []
+    size = 0
+    for line in lines:
+        size += len(line.encode()) + 1
+        if size > max_bytes:
+            break
+        included.append(line)
+
+    return {
+        "database": database,
+        "schema": "\n".join(included),
+        "total_tables": len(lines),
+        "omitted_tables": len(lines) - len(included),
+    }
+
+
+def search_schema(
+    query: str,
+    database: Optional[str] = None,
+    kind: Optional[str] = None,
+    limit: int = 50,
+) -> Dict[str, Any]:
+    """Search all databases for tables and columns by name or comment.
+
+    Matches names containing the query as a substring (e.g. "user_id" finds
+    "buyer_user_id") and names or comments containing all words of the query.
+    Use this to find where data lives instead of listing every database's tables.
+
+    Args:
+        query: Text to search for, case-insensitive
+        database: Optional database to restrict the search to
+        kind: Optional "table" or "column" to return only that kind of match
+        limit: Maximum number of matches to return (default: 50)
+
+    Returns:
+        A dictionary containing:
+        - matches: Matching tables and columns, best matches first. Exact name
+          matches rank above prefix matches, other name matches and comment matches.
+        - total_matches: Number of matches before applying limit
+        - indexed_tables / indexed_columns: Size of the searched index
+    """
+    logger.info(
+        "Searching schema for '%s' with database=%s, kind=%s, limit=%s",
+        query,
+        database,
+        kind,
+        limit,
+    )
+    if kind is not None and kind not in (KIND_TABLE, KIND_COLUMN):
+        raise ToolError(f"Invalid kind '{kind}'. Valid options: {KIND_TABLE}, {KIND_COLUMN}")
+
+    index = get_schema_index()
+    if index.is_stale(get_mcp_config().schema_index_refresh):
+        client = create_clickhouse_client(WORKLOAD_METADATA)
+        index.refresh(lambda index_query: query_with_retry(client, index_query))
+
+    matches, total = index.search(query, database=database, kind=kind, limit=limit)
+    return {
+        "matches": [
+            {
+                "kind": entry.kind,
+                "database": entry.database,
+                "table": entry.table,
+                "column": entry.column,
+                "column_type": entry.column_type,
+                "comment": entry.comment,
+            }
+            for entry in matches
+        ],
+        "total_matches": total,
+        **index.stats(),
+    }
+
+
+def get_preview_settings() -> Dict[str, Any]:
+    """Get the read limits applied to queries run in preview mode.
+
+    With the overflow modes set to 'break', ClickHouse stops reading once a limit
+    is reached and returns the result computed so far instead of an error.
+    """
+    config = get_mcp_config()
+    settings = {
+        "max_rows_to_read": config.preview_max_rows_to_read,
+        "max_bytes_to_read": config.preview_max_bytes_to_read,
+        "read_overflow_mode": "break",
+    }
+    if config.preview_max_execution_time > 0:
+        settings["max_execution_time"] = config.preview_max_execution_time
+        settings["timeout_overflow_mode"] = "break"
+    return settings
+
+
+def is_partial_result(summary: Dict[str, Any], settings: Dict[str, Any]) -> bool:
+    """Check from a query summary whether a read limit in settings cut the query short."""
+    read_rows = int(summary.get("read_rows", 0))
+    read_bytes = int(summary.get("read_bytes", 0))
+    elapsed_seconds = int(summary.get("elapsed_ns", 0)) / 1e9
+    max_rows = settings.get("max_rows_to_read")
+    max_bytes = settings.get("max_bytes_to_read")
+    max_time = settings.get("max_execution_time")
+    return bool(
+        (max_rows and read_rows >= max_rows)
+        or (max_bytes and read_bytes >= max_bytes)
+        or (max_time and elapsed_seconds >= max_time)
+    )
+
+
+def check_query_parameters(query: str, parameters: Dict[str, Any]) -> None:
+    """Check that every parameter has a {name:Type} placeholder in the query.
+
+    clickhouse_connect would otherwise fall back to formatting values into the
+    query text on the client, which defeats the point of binding them.
+    """
+    missing = [
+        name for name in parameters if not re.search(r"\{\s*" + re.escape(name) + r"\s*:", query)
+    ]
+    if missing:
+        raise ToolError(
+            f"No {{name:Type}} placeholder for parameters {', '.join(missing)}. "
+            "Refer to parameters as e.g. {user_id:UInt64} in the query."
+        )
+
+
+def execute_query(
+    query: str,
+    mode: str = QUERY_MODE_FULL,
+    query_id: Optional[str] = None,
+    query_settings: Optional[Dict[str, Any]] = None,
+    on_usage: Optional[Callable[[Usage], None]] = None,
+    parameters: Optional[Dict[str, Any]] = None,
+):
     try:
-        read_only = get_readonly_setting(client)
-        res = client.query(query, settings={"readonly": read_only})
-        logger.info(f"Query returned {len(res.result_rows)} rows")
-        return {"columns": res.column_names, "rows": res.result_rows}
+        client = create_clickhouse_client()
+    except CircuitOpenError as err:
+        raise ToolError(f"Query execution failed: {str(err)}")
+    if query_id:
+        RUNNING_QUERIES[query_id] = client
+    try:
+        extra = dict(query_settings or {})
+        if mode == QUERY_MODE_PREVIEW:
+            # Preview read limits override caller settings. If they cannot be applied,
+            # get_caller_query_settings fails rather than running the query unbounded.
+            extra.update(get_preview_settings())
+        settings = get_caller_query_settings(client, query, extra)
+        if query_id:
+            settings["query_id"] = query_id
+        started = time.monotonic()
+        res = query_with_retry(
+            client, query, settings=settings, workload=WORKLOAD_QUERY, parameters=parameters
+        )
+        logger.info(f"Query returned {res.row_count} rows")
+        if on_usage is not None:
+            on_usage(Usage.from_summary(res.summary or {}, time.monotonic() - started))
+        result = {
+            "columns": res.column_names,
+            "rows": columns_to_rows(res.column_types, res.result_columns),
+        }
+        if mode == QUERY_MODE_PREVIEW:
+            summary = res.summary or {}
+            result["partial"] = is_partial_result(summary, settings)
+            result["read_rows"] = int(summary.get("read_rows", 0))
+            result["read_bytes"] = int(summary.get("read_bytes", 0))
+        return result
+    except ToolError:
+        raise
     except Exception as err:
         logger.error(f"Error executing query: {err}")
+        if is_connection_error(err):
+            get_circuit_breaker().record_failure()
         raise ToolError(f"Query execution failed: {str(err)}")
+    finally:
+        if query_id:
+            RUNNING_QUERIES.pop(query_id, None)
+
+
+def run_select_query(
+    query: str,
+    mode: str = QUERY_MODE_FULL,
+    settings: Optional[Dict[str, Any]] = None,
+    profile: Optional[str] = None,
+    parameters: Optional[Dict[str, Any]] = None,
+    query_id: Optional[str] = None,
+    on_usage: Optional[Callable[[Usage], None]] = None,
+):
+    """Run a SELECT query in a ClickHouse database
+
+    Set mode to "preview" for a fast approximate answer on large tables: the query
+    stops reading after a bounded number of rows and bytes and returns the result
+    computed so far. Preview results include "partial" (true if reading stopped
+    early, so aggregates only cover part of the data), "read_rows" and "read_bytes".
+    Preview queries fail when the server cannot apply the read limits.
+
+    Optionally tune the query with a settings profile, e.g. "interactive" for cheap
+    queries or "heavy" for large analytics, and with individual ClickHouse settings
+    such as {"max_threads": 4}. Only settings allowed by the server can be used.
+
+    Pass literal values as parameters instead of writing them into the query: use
+    {name:Type} placeholders, e.g. "SELECT count() FROM events WHERE user_id = {user:UInt64}"
+    with parameters {"user": 42}. Values are bound by ClickHouse, and queries that
+    only differ in their values share the same text and caches.
+    """
+    logger.info(
+        f"Executing SELECT query in {mode} mode with profile={profile}, settings={settings}: "
+        f"{query}"
+    )
+    if mode not in QUERY_MODES:
+        raise ToolError(f"Invalid mode '{mode}'. Valid options: {', '.join(QUERY_MODES)}")
+    try:
+        query_settings = resolve_query_settings(settings, profile)
+    except ValueError as err:
+        raise ToolError(str(err))
+    if parameters:
+        check_query_parameters(query, parameters)
+
+    def run():
+        return run_query_with_timeout(
+            query, mode, query_id, query_settings, on_usage, parameters=parameters
+        )
 
+    if not get_mcp_config().coalesce_queries:
+        return run()
+    key = call_key("run_select_query", normalize_query(query), mode, query_settings, parameters)
+    return get_single_flight().do(key, run)
 
-def run_select_query(query: str):
-    """Run a SELECT query in a ClickHouse database"""
-    logger.info(f"Executing SELECT query: {query}")
+
+def run_query_with_timeout(
+    query: str,
+    mode: str = QUERY_MODE_FULL,
+    query_id: Optional[str] = None,
+    query_settings: Optional[Dict[str, Any]] = None,
+    on_usage: Optional[Callable[[Usage], None]] = None,
+    parameters: Optional[Dict[str, Any]] = None,
+):
+    """Run a SELECT query on the query executor, bounded by the configured timeout."""
     try:
-        future = QUERY_EXECUTOR.submit(execute_query, query)
+        future = QUERY_EXECUTOR.submit(
+            execute_query, query, mode, query_id, query_settings, on_usage, parameters
+        )
         try:
             timeout_secs = get_mcp_config().query_timeout
             result = future.result(timeout=timeout_secs)
@@ -459,25 +1114,967 @@ def run_select_query(query: str):
         raise RuntimeError(f"Unexpected error during query execution: {str(e)}")
 
 
-def create_clickhouse_client():
-    client_config = get_config().get_client_config()
+def read_query_progress(query_id: str) -> Optional[Tuple[int, int]]:
+    """Read how far a running run_select_query has got from system.processes.
+
+    Returns:
+        Tuple of (rows read, estimated total rows to read), or None if the query
+        is not running (yet)
+    """
+    client = RUNNING_QUERIES.get(query_id)
+    if client is None:
+        return None
+    try:
+        rows = client.query(
+            "SELECT read_rows, total_rows_approx FROM system.processes "
+            f"WHERE query_id = {format_query_value(query_id)}"
+        ).result_rows
+    except Exception as err:
+        logger.debug(f"Could not read progress of query {query_id}: {err}")
+        return None
+    return rows[0] if rows else None
+
+
+def kill_running_query(query_id: str) -> None:
+    """Stop a query registered in RUNNING_QUERIES on the server with KILL QUERY."""
+    client = RUNNING_QUERIES.get(query_id)
+    if client is None:
+        return
+    try:
+        client.command(f"KILL QUERY WHERE query_id = {format_query_value(query_id)} ASYNC")
+    except Exception as err:
+        logger.warning(f"Could not kill query {query_id}: {err}")
+
+
+def quota_callers(ctx: Optional[Context]) -> List[str]:
+    """Identify who a tool call is charged to: its MCP session and, if the HTTP
+    request carries an Authorization header, that credential (by hash)."""
+    if ctx is None:
+        return []
+    callers = []
+    try:
+        callers.append(f"session {ctx.session_id}")
+    except RuntimeError:
+        pass
+    request_context = ctx.request_context
+    request = request_context.request if request_context is not None else None
+    authorization = request.headers.get("authorization") if request is not None else None
+    if authorization:
+        digest = hashlib.sha256(authorization.encode()).hexdigest()[:16]
+        callers.append(f"credential {digest}")
+    return callers
+
+
+async def enforce_quota(ctx: Optional[Context]) -> Optional[Callable[[Usage], None]]:
+    """Check the quotas of the caller of a tool before it runs a query.
+
+    In "throttle" mode a caller over quota waits until enough of its usage has
+    aged out of the window, for at most CLICKHOUSE_MCP_QUERY_TIMEOUT seconds; in
+    "reject" mode, or when it would have to wait longer, the call fails.
+
+    Returns:
+        A callback charging the usage of the query to the caller, or None when
+        quotas are disabled
+    """
+    tracker = get_quota_tracker()
+    callers = quota_callers(ctx)
+    if not tracker.limits.enabled or not callers:
+        return None
+
+    config = get_mcp_config()
+    waited = 0.0
+    for caller in callers:
+        while True:
+            try:
+                tracker.check(caller)
+                break
+            except QuotaExceededError as err:
+                if config.quota_mode != QUOTA_MODE_THROTTLE or (
+                    waited + err.retry_after > config.query_timeout
+                ):
+                    logger.warning(str(err))
+                    raise ToolError(f"{err}. Retry in {err.retry_after:.0f}s")
+                logger.info(f"{err}, delaying query by {err.retry_after:.1f}s")
+                await asyncio.sleep(err.retry_after)
+                waited += err.retry_after
+
+    def charge(usage: Usage) -> None:
+        for caller in callers:
+            tracker.record(caller, usage)
+
+    return charge
+
+
+def wants_progress(ctx: Optional[Context]) -> bool:
+    """Check whether the client asked for progress notifications for this request."""
+    request_context = ctx.request_context if ctx is not None else None
+    meta = request_context.meta if request_context is not None else None
+    if meta is None:
+        return False
+    # mcp 1.x parses the request meta into a model, later versions keep it a dict
+    token = meta.get("progressToken") if isinstance(meta, dict) else meta.progressToken
+    return token is not None
+
+
+async def run_select_query_tool(
+    query: str,
+    mode: str = QUERY_MODE_FULL,
+    settings: Optional[Dict[str, Any]] = None,
+    profile: Optional[str] = None,
+    parameters: Optional[Dict[str, Any]] = None,
+    ctx: Optional[Context] = None,
+) -> ToolResult:
+    """Run a SELECT query in a ClickHouse database"""
+    on_usage = await enforce_quota(ctx)
+    run = functools.partial(
+        run_select_query, query, mode, settings, profile, parameters, on_usage=on_usage
+    )
+    interval = get_mcp_config().progress_interval
+    if interval <= 0 or not wants_progress(ctx):
+        result = await asyncio.to_thread(run)
+    else:
+        # Poll the query's progress while it runs and forward changes to the client
+        query_id = str(uuid.uuid4())
+        task = asyncio.ensure_future(asyncio.to_thread(run, query_id=query_id))
+        reported = None
+        while not task.done():
+            await asyncio.wait({task}, timeout=interval)
+            if task.done():
+                break
+            progress = await asyncio.to_thread(read_query_progress, query_id)
+            if progress is not None and progress != reported:
+                read_rows, total_rows = progress
+                await ctx.report_progress(
+                    read_rows, total_rows or None, f"Read {read_rows} of ~{total_rows} rows"
+                )
+                reported = progress
+        result = task.result()
+    # Rows are already JSON-native, so the result is encoded once instead of going
+    # through the framework's generic serialization
+    return json_tool_result(result)
+
+
+def run_select_queries(
+    queries: List[str],
+    mode: str = QUERY_MODE_FULL,
+    on_usage: Optional[Callable[[Usage], None]] = None,
+) -> Dict[str, Any]:
+    """Run several independent SELECT queries concurrently in a ClickHouse database
+
+    Use this instead of consecutive run_select_query calls when a question needs
+    several aggregates: the queries run in parallel, so the call takes about as
+    long as the slowest query. All queries share one deadline. A failing or timed
+    out query does not affect the others.
+
+    Args:
+        queries: SELECT queries to run (at most 10)
+        mode: "full" or "preview", applied to every query as in run_select_query
+
+    Returns:
+        A dictionary containing:
+        - results: One entry per query, in the order given. Successful entries have
+          status "success" plus the fields returned by run_select_query; failed ones
+          have status "error" and an error message.
+        - failed: Number of queries that failed or timed out
+    """
+    logger.info(f"Executing {len(queries)} SELECT queries in {mode} mode")
+    if mode not in QUERY_MODES:
+        raise ToolError(f"Invalid mode '{mode}'. Valid options: {', '.join(QUERY_MODES)}")
+    if not queries:
+        raise ToolError("At least one query must be given")
+    if len(queries) > MAX_BATCH_QUERIES:
+        raise ToolError(f"At most {MAX_BATCH_QUERIES} queries can be run in one call")
+
+    timeout_secs = get_mcp_config().query_timeout
+    # Query ids let timed out queries be killed, which also frees their executor threads
+    query_ids = [str(uuid.uuid4()) for _ in queries]
+    futures = [
+        QUERY_EXECUTOR.submit(execute_query, query, mode, query_id, on_usage=on_usage)
+        for query, query_id in zip(queries, query_ids)
+    ]
+    # One deadline for the whole batch rather than one timeout per query
+    concurrent.futures.wait(futures, timeout=timeout_secs)
+
+    results = []
+    for query, query_id, future in zip(queries, query_ids, futures):
+        if not future.done():
+            if not future.cancel():
+                kill_running_query(query_id)
+            logger.warning(f"Query timed out after {timeout_secs} seconds: {query}")
+            results.append(
+                {"status": "error", "error": f"Query timed out after {timeout_secs} seconds"}
+            )
+            continue
+        try:
+            results.append({"status": "success", **future.result()})
+        except Exception as err:
+            results.append({"status": "error", "error": str(err)})
+    failed = sum(1 for result in results if result["status"] == "error")
+    logger.info(f"Batch finished with {len(queries) - failed} succeeded and {failed} failed")
+    return {"results": results, "failed": failed}
+
+
+async def run_select_queries_tool(
+    queries: List[str], mode: str = QUERY_MODE_FULL, ctx: Optional[Context] = None
+) -> ToolResult:
+    """Run several independent SELECT queries concurrently in a ClickHouse database"""
+    on_usage = await enforce_quota(ctx)
+    result = await asyncio.to_thread(run_select_queries, queries, mode, on_usage)
+    return json_tool_result(result)
+
+
+def run_job_query(
+    job: QueryJob, on_usage: Optional[Callable[[Usage], None]] = None
+) -> Dict[str, Any]:
+    """Run the query of a background job, keeping at most the configured result size.
+
+    The result is streamed and reading stops once it exceeds the configured rows or
+    bytes, and the query is killed after the job timeout, so the limits hold even
+    when they cannot be sent to the server as query settings.
+    """
+    config = get_mcp_config()
+    max_rows = config.job_max_result_rows
+    job.client = create_clickhouse_client()
+    limits = {
+        "max_execution_time": config.job_timeout,
+        # One row more than is kept tells a result of exactly max_rows rows from a cut one
+        "max_result_rows": max_rows + 1,
+        "result_overflow_mode": "break",
+    }
+    try:
+        settings = get_caller_query_settings(job.client, job.query, limits)
+    except ToolError as err:
+        logger.info(f"Limiting query job {job.job_id} client-side only: {err}")
+        settings = get_caller_query_settings(job.client, job.query)
+    # The job id doubles as query id, to find the query in system.processes and KILL it
+    settings["query_id"] = job.job_id
+
+    timed_out = threading.Event()
+
+    def kill_on_timeout() -> None:
+        timed_out.set()
+        kill_job_query(job)
+
+    timer = threading.Timer(config.job_timeout, kill_on_timeout)
+    timer.daemon = True
+    timer.start()
+    started = time.monotonic()
+    rows: List[List[Any]] = []
+    result_bytes = 0
+    try:
+        with job.client.query_column_block_stream(job.query, settings=settings) as stream:
+            source = stream.source
+            for block in stream:
+                block_rows = columns_to_rows(source.column_types, block)
+                rows.extend(block_rows)
+                result_bytes += len(dumps(block_rows))
+                if len(rows) > max_rows or result_bytes > config.job_max_result_bytes:
+                    break
+    except Exception as err:
+        if timed_out.is_set():
+            raise RuntimeError(f"Query job timed out after {config.job_timeout:g} seconds") from err
+        if is_connection_error(err):
+            get_circuit_breaker().record_failure()
+        raise
+    finally:
+        timer.cancel()
+    summary = source.summary or {}
+    if on_usage is not None:
+        on_usage(Usage.from_summary(summary, time.monotonic() - started))
+    truncated = len(rows) > max_rows or result_bytes > config.job_max_result_bytes
+    return {
+        "columns": list(source.column_names),
+        "rows": rows[:max_rows],
+        "truncated": truncated,
+        "read_rows": int(summary.get("read_rows", 0)),
+        "read_bytes": int(summary.get("read_bytes", 0)),
+    }
+
+
+def submit_query(query: str, on_usage: Optional[Callable[[Usage], None]] = None) -> Dict[str, Any]:
+    """Start a SELECT query in the background and return a job id right away.
+
+    Use this for queries that may take longer than run_select_query allows. Poll
+    get_query_status with the job id, then page through the result with
+    fetch_query_result. cancel_query stops a job that is no longer needed.
+
+    Args:
+        query: The SELECT query to run
+
+    Returns:
+        A dictionary containing job_id and status
+    """
+    logger.info(f"Submitting query job: {query}")
+    try:
+        job = get_job_manager().submit(query, functools.partial(run_job_query, on_usage=on_usage))
+    except JobError as err:
+        raise ToolError(str(err))
+    return {"job_id": job.job_id, "status": job.status}
+
+
+async def submit_query_tool(query: str, ctx: Optional[Context] = None) -> Dict[str, Any]:
+    """Start a SELECT query in the background and return a job id right away"""
+    on_usage = await enforce_quota(ctx)
+    return submit_query(query, on_usage)
+
+
+def get_query_status(job_id: str) -> Dict[str, Any]:
+    """Get the status and progress of a query job started with submit_query.
+
+    Args:
+        job_id: Id returned by submit_query
+
+    Returns:
+        A dictionary containing:
+        - status: "queued", "running", "succeeded", "failed" or "cancelled"
+        - elapsed_seconds: Time the query has been running
+        - read_rows / read_bytes: Data read so far
+        - total_rows_approx: While running, estimated rows the query will read
+        - result_rows / truncated: Once succeeded, rows available to fetch_query_result
+          and whether the result was cut at the server's result size limit
+        - error: Error message of a failed job
+    """
+    try:
+        job = get_job_manager().get(job_id)
+    except JobError as err:
+        raise ToolError(str(err))
+
+    status = {
+        "job_id": job.job_id,
+        "status": job.status,
+        "elapsed_seconds": round(job.elapsed_seconds, 3),
+    }
+    client = job.client
+    if job.status == JOB_RUNNING and client is not None:
+        try:
+            progress = client.query(
+                "SELECT read_rows, read_bytes, total_rows_approx FROM system.processes "
+                f"WHERE query_id = {format_query_value(job.job_id)}"
+            ).result_rows
+        except Exception as err:
+            logger.warning(f"Could not read progress of query job {job_id}: {err}")
+            progress = []
+        if progress:
+            read_rows, read_bytes, total_rows_approx = progress[0]
+            status.update(
+                read_rows=read_rows, read_bytes=read_bytes, total_rows_approx=total_rows_approx
+            )
+    elif job.status == JOB_SUCCEEDED:
+        status.update(
+            read_rows=job.result["read_rows"],
+            read_bytes=job.result["read_bytes"],
+            result_rows=len(job.result["rows"]),
+            truncated=job.result["truncated"],
+        )
+    elif job.status == JOB_FAILED:
+        status["error"] = job.error
+    return status
+
+
+def fetch_query_result(job_id: str, offset: int = 0, limit: int = 1000) -> Dict[str, Any]:
+    """Fetch rows of the result of a succeeded query job started with submit_query.
+
+    Args:
+        job_id: Id returned by submit_query
+        offset: Index of the first row to return (default: 0)
+        limit: Number of rows to return (default: 1000)
+
+    Returns:
+        A dictionary containing columns, rows, total_rows, truncated (the stored
+        result was cut at the server's result size limit), and next_offset, the
+        offset of the next page or null after the last one
+    """
+    try:
+        job = get_job_manager().get(job_id)
+    except JobError as err:
+        raise ToolError(str(err))
+    if job.status != JOB_SUCCEEDED:
+        raise ToolError(
+            f"Query job {job_id} is {job.status}, results are only available once it succeeded"
+        )
+
+    rows = job.result["rows"]
+    offset = max(offset, 0)
+    end = offset + max(limit, 1)
+    return {
+        "columns": job.result["columns"],
+        "rows": rows[offset:end],
+        "total_rows": len(rows),
+        "truncated": job.result["truncated"],
+        "next_offset": end if end < len(rows) else None,
+    }
+
+
+def fetch_query_result_tool(job_id: str, offset: int = 0, limit: int = 1000) -> ToolResult:
+    """Fetch rows of the result of a succeeded query job started with submit_query."""
+    return json_tool_result(fetch_query_result(job_id, offset, limit))
+
+
+def kill_job_query(job: QueryJob) -> None:
+    client = job.client
+    if client is None:
+        return
+    try:
+        client.command(f"KILL QUERY WHERE query_id = {format_query_value(job.job_id)} ASYNC")
+    except Exception as err:
+        logger.warning(f"Could not kill query of job {job.job_id}: {err}")
+
+
+def cancel_query(job_id: str) -> Dict[str, Any]:
+    """Cancel a query job started with submit_query.
+
+    Args:
+        job_id: Id returned by submit_query
+
+    Returns:
+        A dictionary containing job_id and status. A running job reports
+        "running" until its query has stopped on the server.
+    """
+    logger.info(f"Cancelling query job {job_id}")
+    try:
+        job = get_job_manager().cancel(job_id, kill_job_query)
+    except JobError as err:
+        raise ToolError(str(err))
+    return {"job_id": job.job_id, "status": job.status}
+
+
+def build_sample_query(
+    client,
+    database: str,
+    table: str,
+    engine: str,
+    sampling_key: str,
+    total_rows: Optional[int],
+    projection: str,
+    rows: int,
+) -> Tuple[str, Optional[str]]:
+    """Build a query reading about `rows` rows of a table without scanning all of it.
+
+    Returns:
+        The sampling method ("sample", "parts" or "limit") and the query, which is
+        None when a MergeTree table has no data parts yet
+    """
+    source = f"{quote_identifier(database)}.{quote_identifier(table)}"
+    if sampling_key and total_rows:
+        # Oversample a little since SAMPLE works on whole granules
+        ratio = min(1.0, rows * SAMPLE_READ_FACTOR / total_rows)
+        return "sample", f"SELECT {projection} FROM {source} SAMPLE {ratio:.10f} LIMIT {rows}"
+    if engine.endswith("MergeTree"):
+        parts = query_with_retry(
+            client,
+            "SELECT name FROM system.parts "
+            f"WHERE database = {format_query_value(database)} "
+            f"AND table = {format_query_value(table)} AND active "
+            f"ORDER BY rand() LIMIT {SAMPLE_MAX_PARTS}",
+        ).result_rows
+        if not parts:
+            return "parts", None
+        per_part = -(-rows // len(parts))
+        return "parts", (
+            f"SELECT {projection} FROM {source} "
+            f"WHERE _part IN {format_query_value([row[0] for row in parts])} "
+            f"LIMIT {per_part} BY _part LIMIT {rows}"
+        )
+    return "limit", f"SELECT {projection} FROM {source} LIMIT {rows}"
+
+
+def sample_read_limits(rows: int) -> Dict[str, Any]:
+    """Settings that stop a sample query once enough rows were seen instead of
+    failing or scanning everything."""
+    return {
+        "max_rows_to_read": max(rows, SAMPLE_MIN_ROWS_TO_READ) * SAMPLE_READ_FACTOR,
+        "read_overflow_mode": "break",
+    }
+
+
+def sample_table(
+    database: str,
+    table: str,
+    columns: Optional[List[str]] = None,
+    rows: int = 100,
+    on_usage: Optional[Callable[[Usage], None]] = None,
+) -> Dict[str, Any]:
+    """Fetch a small, representative sample of rows from a table without scanning it.
+
+    Use this instead of SELECT * ... LIMIT to preview the data of a table, however
+    large. Tables with a sampling key are read with SAMPLE; other MergeTree tables
+    are read from a few randomly chosen data parts with a bounded number of rows read.
+
+    Args:
+        database: Database of the table
+        table: Table to sample
+        columns: Optional list of columns to return (default: all columns)
+        rows: Number of rows to return (default: 100, at most 10000)
+
+    Returns:
+        A dictionary containing:
+        - columns: Column names
+        - rows: Sampled rows
+        - method: "sample" (SAMPLE clause), "parts" (subset of data parts) or "limit"
+          (table engines without data parts)
+        - total_rows: Approximate number of rows in the table, if known
+    """
+    logger.info(f"Sampling {rows} rows of {database}.{table} with columns={columns}")
+    rows = max(1, min(int(rows), SAMPLE_MAX_ROWS))
+    client = create_clickhouse_client()
+
+    info = query_with_retry(
+        client,
+        "SELECT engine, sampling_key, total_rows FROM system.tables "
+        f"WHERE database = {format_query_value(database)} AND name = {format_query_value(table)}",
+    ).result_rows
+    if not info:
+        raise ToolError(f"Table {database}.{table} does not exist")
+    engine, sampling_key, total_rows = info[0]
+
+    projection = ", ".join(quote_identifier(column) for column in columns) if columns else "*"
+    method, query = build_sample_query(
+        client, database, table, engine, sampling_key, total_rows, projection, rows
+    )
+    if query is None:
+        return {"columns": [], "rows": [], "method": method, "total_rows": total_rows}
+
+    started = time.monotonic()
+    try:
+        res = query_with_retry(
+            client,
+            query,
+            settings=get_query_settings(client, sample_read_limits(rows)),
+            workload=WORKLOAD_QUERY,
+        )
+    except Exception as err:
+        logger.error(f"Error sampling {database}.{table}: {err}")
+        if is_connection_error(err):
+            get_circuit_breaker().record_failure()
+        raise ToolError(f"Sampling failed: {str(err)}")
+    if on_usage is not None:
+        on_usage(Usage.from_summary(res.summary or {}, time.monotonic() - started))
+
+    logger.info(f"Sampled {res.row_count} rows of {database}.{table} using {method}")
+    return {
+        "columns": res.column_names,
+        "rows": columns_to_rows(res.column_types, res.result_columns),
+        "method": method,
+        "total_rows": total_rows,
+    }
+
+
+async def sample_table_tool(
+    database: str,
+    table: str,
+    columns: Optional[List[str]] = None,
+    rows: int = 100,
+    ctx: Optional[Context] = None,
+) -> Dict[str, Any]:
+    """Fetch a small, representative sample of rows from a table without scanning it"""
+    on_usage = await enforce_quota(ctx)
+    return await asyncio.to_thread(sample_table, database, table, columns, rows, on_usage)
+
+
+def table_parts_fingerprint(client, database: str, table: str) -> Optional[str]:
+    """Fingerprint the active data parts of a MergeTree table.
+
+    Inserts, merges and mutations all replace parts, so an unchanged fingerprint
+    means the table's data is unchanged. Returns None for tables without parts.
+    """
+    res = query_with_retry(
+        client,
+        "SELECT count(), sum(rows), groupBitXor(cityHash64(name)) FROM system.parts "
+        f"WHERE database = {format_query_value(database)} "
+        f"AND table = {format_query_value(table)} AND active",
+    )
+    parts, rows, names_hash = res.result_rows[0]
+    if not parts:
+        return None
+    return f"{parts}:{rows}:{names_hash}"
+
+
+def primary_index_range(client, database: str, table: str, column: str) -> Optional[List[Any]]:
+    """Read the exact min and max of a table's first primary key column from its index.
+
+    The primary index holds the first row of every granule and the last row of
+    each part, so this reads a few values per granule instead of the column.
+    Returns None when the server cannot read the index (mergeTreeIndex needs 24.3+).
+    """
+    query = (
+        f"SELECT min({quote_identifier(column)}), max({quote_identifier(column)}) "
+        f"FROM mergeTreeIndex({format_query_value(database)}, {format_query_value(table)})"
+    )
+    try:
+        # Table functions need readonly=2, which get_query_settings switches to
+        settings = get_query_settings(
+            client, {"max_execution_time": get_mcp_config().query_timeout}
+        )
+        res = query_with_retry(client, query, settings=settings, workload=WORKLOAD_QUERY)
+    except Exception as err:
+        logger.info(f"Cannot read primary index of {database}.{table}: {err}")
+        return None
+    return columns_to_rows(res.column_types, res.result_columns)[0]
+
+
+def column_stats(
+    database: str,
+    table: str,
+    columns: Optional[List[str]] = None,
+    top_k: int = 10,
+    on_usage: Optional[Callable[[Usage], None]] = None,
+) -> Dict[str, Any]:
+    """Get value ranges, cardinality, null fraction and most frequent values of columns.
+
+    Use this before writing queries to learn what a table's columns contain instead
+    of running exploratory scans. Statistics are computed from a bounded sample of
+    the table (see sample_table), so except for small tables they are estimates;
+    min and max of the first primary key column are read exactly from the primary
+    index. Results are cached until the table's data parts change.
+
+    Args:
+        database: Database of the table
+        table: Table to describe
+        columns: Optional list of columns (default: all columns)
+        top_k: Number of most frequent values to return per column (default: 10, at most 100)
+
+    Returns:
+        A dictionary containing:
+        - total_rows: Approximate number of rows in the table, if known
+        - columns: One entry per column with name, type, compressed_bytes and
+          uncompressed_bytes on disk, min, max, distinct (approximate number of
+          distinct values), null_fraction, top_values, sampled_rows, exact (whether
+          the sample covered the whole table) and min_max_source ("primary_index"
+          or "sample")
+    """
+    logger.info(f"Computing column statistics of {database}.{table} for columns={columns}")
+    top_k = max(1, min(int(top_k), COLUMN_STATS_MAX_TOP_K))
+    client = create_clickhouse_client()
+
+    info = query_with_retry(
+        client,
+        "SELECT engine, sampling_key, total_rows, primary_key FROM system.tables "
+        f"WHERE database = {format_query_value(database)} AND name = {format_query_value(table)}",
+    ).result_rows
+    if not info:
+        raise ToolError(f"Table {database}.{table} does not exist")
+    engine, sampling_key, total_rows, primary_key = info[0]
+
+    # Column sizes are kept by ClickHouse per data part, so they cost no scan
+    table_columns = {
+        row[0]: row[1:]
+        for row in query_with_retry(
+            client,
+            "SELECT name, type, data_compressed_bytes, data_uncompressed_bytes "
+            f"FROM system.columns WHERE database = {format_query_value(database)} "
+            f"AND table = {format_query_value(table)} ORDER BY position",
+        ).result_rows
+    }
+    columns = columns or list(table_columns)
+    unknown = [column for column in columns if column not in table_columns]
+    if unknown:
+        raise ToolError(f"Unknown columns in {database}.{table}: {', '.join(unknown)}")
+
+    fingerprint = table_parts_fingerprint(client, database, table)
+    stats = {}
+    for column in columns:
+        cached = column_stats_cache.get(json.dumps([database, table, column, top_k]))
+        if fingerprint is not None and cached is not None and cached[0] == fingerprint:
+            stats[column] = cached[1]
+    missing = [column for column in columns if column not in stats]
+
+    if missing:
+        stats.update(
+            compute_column_stats(
+                client,
+                database,
+                table,
+                missing,
+                top_k,
+                (engine, sampling_key, total_rows, primary_key),
+                on_usage,
+            )
+        )
+        if fingerprint is not None and get_mcp_config().column_stats_ttl > 0:
+            for column in missing:
+                cache_key = json.dumps([database, table, column, top_k])
+                column_stats_cache[cache_key] = (fingerprint, stats[column])
+
     logger.info(
-        f"Creating ClickHouse client connection to {client_config['host']}:{client_config['port']} "
-        f"as {client_config['username']} "
-        f"(secure={client_config['secure']}, verify={client_config['verify']}, "
-        f"connect_timeout={client_config['connect_timeout']}s, "
-        f"send_receive_timeout={client_config['send_receive_timeout']}s)"
+        f"Column statistics of {database}.{table}: {len(columns) - len(missing)} cached, "
+        f"{len(missing)} computed"
     )
+    return {
+        "total_rows": total_rows,
+        "columns": [
+            {
+                "name": column,
+                "type": table_columns[column][0],
+                "compressed_bytes": table_columns[column][1],
+                "uncompressed_bytes": table_columns[column][2],
+                **stats[column],
+            }
+            for column in columns
+        ],
+    }
+
 
+async def column_stats_tool(
+    database: str,
+    table: str,
+    columns: Optional[List[str]] = None,
+    top_k: int = 10,
+    ctx: Optional[Context] = None,
+) -> Dict[str, Any]:
+    """Get value ranges, cardinality, null fraction and most frequent values of columns"""
+    on_usage = await enforce_quota(ctx)
+    return await asyncio.to_thread(column_stats, database, table, columns, top_k, on_usage)
+
+
+def compute_column_stats(
+    client,
+    database: str,
+    table: str,
+    columns: List[str],
+    top_k: int,
+    table_info: Tuple[str, str, Optional[int], str],
+    on_usage: Optional[Callable[[Usage], None]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Compute the statistics of column_stats from a sample of a table."""
+    engine, sampling_key, total_rows, primary_key = table_info
+    projection = ", ".join(quote_identifier(column) for column in columns)
+    rows = COLUMN_STATS_SAMPLE_ROWS
+    method, sample_query = build_sample_query(
+        client, database, table, engine, sampling_key, total_rows, projection, rows
+    )
+
+    aggregates = ["count()"]
+    for column in columns:
+        name = quote_identifier(column)
+        aggregates += [
+            f"min({name})",
+            f"max({name})",
+            f"uniqCombined({name})",
+            f"countIf(isNull({name}))",
+            f"topK({top_k})({name})",
+        ]
+    values = None
+    if sample_query is not None:
+        started = time.monotonic()
+        try:
+            res = query_with_retry(
+                client,
+                f"SELECT {', '.join(aggregates)} FROM ({sample_query})",
+                settings=get_query_settings(client, sample_read_limits(rows)),
+                workload=WORKLOAD_QUERY,
+            )
+        except Exception as err:
+            logger.error(f"Error computing column statistics of {database}.{table}: {err}")
+            if is_connection_error(err):
+                get_circuit_breaker().record_failure()
+            raise ToolError(f"Computing column statistics failed: {str(err)}")
+        if on_usage is not None:
+            on_usage(Usage.from_summary(res.summary or {}, time.monotonic() - started))
+        values = columns_to_rows(res.column_types, res.result_columns)[0]
+    sampled_rows = values[0] if values else 0
+
+    # Only the first primary key column is sorted across each part
+    key_column = primary_key.split(",")[0].strip() if primary_key else None
+    index_range = None
+    if key_column in columns and method != "limit":
+        index_range = primary_index_range(client, database, table, key_column)
+
+    stats = {}
+    for i, column in enumerate(columns):
+        if sampled_rows:
+            minimum, maximum, distinct, nulls, top_values = values[1 + 5 * i : 6 + 5 * i]
+        else:
+            minimum, maximum, distinct, nulls, top_values = None, None, 0, 0, []
+        source = "sample"
+        if column == key_column and index_range is not None and sampled_rows:
+            (minimum, maximum), source = index_range, "primary_index"
+        stats[column] = {
+            "min": minimum,
+            "max": maximum,
+            "distinct": distinct,
+            "null_fraction": nulls / sampled_rows if sampled_rows else None,
+            "top_values": top_values,
+            "sampled_rows": sampled_rows,
+            "exact": total_rows is not None and sampled_rows >= total_rows,
+            "min_max_source": source,
+        }
+    return stats
+
+
+def iter_merge_tree_reads(plan: Dict[str, Any]):
+    """Yield the ReadFromMergeTree steps of an EXPLAIN json=1 query plan."""
+    if plan.get("Node Type") == "ReadFromMergeTree":
+        yield plan
+    for child in plan.get("Plans", []):
+        yield from iter_merge_tree_reads(child)
+
+
+def pruning_hint(read: Dict[str, Any], sorting_key: str, partition_key: str) -> Optional[str]:
+    """Suggest how to make a table read skip more data, or None if it already prunes well."""
+    selected, total = read["selected_granules"], read["total_granules"]
+    if not sorting_key or total is None or total < ANALYZE_MIN_GRANULES:
+        return None
+    if selected < total * ANALYZE_POOR_PRUNING_RATIO:
+        return None
+    leading_column = sorting_key.split(",")[0].strip()
+    used = {index["type"] for index in read["indexes"] if index.get("keys")}
+    share = f"{selected} of {total} granules ({100 * selected / total:.0f}%) of {read['table']}"
+    if "PrimaryKey" not in used:
+        hint = (
+            f"The query reads {share} because the WHERE clause does not use the primary key. "
+            f"Filter on the sorting key ({sorting_key}), starting with {leading_column}, "
+            "to let ClickHouse skip granules."
+        )
+    else:
+        hint = (
+            f"The query reads {share}. Conditions on the sorting key ({sorting_key}) skip "
+            f"the most data when they restrict its leading column {leading_column}; "
+            "add a more selective condition on it."
+        )
+    if partition_key and "Partition" not in used:
+        hint += f" Filtering on the partition key ({partition_key}) would skip whole partitions."
+    return hint
+
+
+def analyze_query(query: str, parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Show how much data a SELECT query would read, without running it.
+
+    Runs EXPLAIN indexes = 1 and reports, for every MergeTree table the query
+    reads, how many data parts and granules the partition key, primary key and
+    skip indexes select out of the total. When a read keeps most granules, a hint
+    names the sorting key columns to filter on. Use this to check that a query on
+    a large table reads a small fraction of it before running it.
+
+    Args:
+        query: The SELECT query to analyze
+        parameters: Optional values for {name:Type} placeholders, as in run_select_query
+
+    Returns:
+        A dictionary containing:
+        - tables: One entry per table read with table, selected_parts, total_parts,
+          selected_granules, total_granules, sorting_key, indexes (type, name for skip
+          indexes, keys used, condition, selected_parts and selected_granules after the
+          index) and hint when pruning is poor
+        - selected_granules / total_granules: Sums over all tables read
+    """
+    logger.info(f"Analyzing query: {query}")
+    if parameters:
+        check_query_parameters(query, parameters)
+    client = create_clickhouse_client()
     try:
-        client = clickhouse_connect.get_client(**client_config)
-        # Test the connection
-        version = client.server_version
+        res = query_with_retry(
+            client,
+            f"EXPLAIN json = 1, indexes = 1 {query}",
+            settings=get_query_settings(client),
+            parameters=parameters,
+        )
+    except Exception as err:
+        logger.error(f"Error analyzing query: {err}")
+        if is_connection_error(err):
+            get_circuit_breaker().record_failure()
+        raise ToolError(f"Query analysis failed: {str(err)}")
+    plans = json.loads("\n".join(row[0] for row in res.result_rows))
+
+    reads = []
+    for read in (read for plan in plans for read in iter_merge_tree_reads(plan["Plan"])):
+        indexes = read.get("Indexes", [])
+        reads.append(
+            {
+                "table": read.get("Description"),
+                "selected_parts": indexes[-1].get("Selected Parts") if indexes else None,
+                "total_parts": indexes[0].get("Initial Parts") if indexes else None,
+                "selected_granules": indexes[-1].get("Selected Granules") if indexes else None,
+                "total_granules": indexes[0].get("Initial Granules") if indexes else None,
+                "indexes": [
+                    {
+                        "type": index.get("Type"),
+                        **({"name": index["Name"]} if "Name" in index else {}),
+                        "keys": index.get("Keys", []),
+                        "condition": index.get("Condition"),
+                        "selected_parts": index.get("Selected Parts"),
+                        "selected_granules": index.get("Selected Granules"),
+                    }
+                    for index in indexes
+                ],
+            }
+        )
+
+    keys = {}
+    if reads:
+        keys = {
+            row[0]: row[1:]
+            for row in query_with_retry(
+                client,
+                "SELECT concat(database, '.', name), sorting_key, partition_key FROM system.tables "
+                "WHERE concat(database, '.', name) IN "
+                f"{format_query_value(sorted({read['table'] for read in reads}))}",
+            ).result_rows
+        }
+    for read in reads:
+        sorting_key, partition_key = keys.get(read["table"], ("", ""))
+        read["sorting_key"] = sorting_key
+        hint = pruning_hint(read, sorting_key, partition_key)
+        if hint:
+            read["hint"] = hint
+
+    return {
+        "tables": reads,
+        "selected_granules": sum(read["selected_granules"] or 0 for read in reads),
+        "total_granules": sum(read["total_granules"] or 0 for read in reads),
+    }
+
+
+def create_clickhouse_client(workload: str = WORKLOAD_QUERY):
+    """Create a ClickHouse client connected to a healthy endpoint.
+
+    Endpoints are tried in the order chosen by the workload's endpoint pool. An
+    endpoint that fails to connect is ejected and the next one is tried. When no
+    endpoint can be reached the failure counts against the circuit breaker.
+
+    Args:
+        workload: WORKLOAD_QUERY for SELECT traffic or WORKLOAD_METADATA for metadata tools
+
+    Returns:
+        A connected clickhouse_connect client
+
+    Raises:
+        CircuitOpenError: If the circuit breaker is open and the call fails fast
+    """
+    config = get_config()
+    pool = get_endpoint_pool(workload)
+    breaker = get_circuit_breaker()
+    breaker.before_call()
+    last_error = None
+
+    for endpoint in pool.candidates():
+        client_config = config.get_client_config((endpoint.host, endpoint.port))
+        logger.info(
+            f"Creating ClickHouse client connection to {client_config['host']}:{client_config['port']} "
+            f"as {client_config['username']} "
+            f"(secure={client_config['secure']}, verify={client_config['verify']}, "
+            f"connect_timeout={client_config['connect_timeout']}s, "
+            f"send_receive_timeout={client_config['send_receive_timeout']}s)"
+        )
+
+        started = time.monotonic()
+        try:
+            client = clickhouse_connect.get_client(**client_config)
+            # Test the connection
+            version = client.server_version
+        except Exception as e:
+            logger.error(f"Failed to connect to ClickHouse at {endpoint.address}: {str(e)}")
+            pool.record_failure(endpoint)
+            last_error = e
+            continue
+
+        pool.record_success(endpoint, time.monotonic() - started)
+        pool.track(client, endpoint)
+        breaker.record_success()
         logger.info(f"Successfully connected to ClickHouse server version {version}")
         return client
-    except Exception as e:
-        logger.error(f"Failed to connect to ClickHouse: {str(e)}")
-        raise
+
+    breaker.record_failure()
+    raise last_error
 
 
 def get_readonly_setting(client) -> str:
@@ -502,7 +2099,7 @@ def get_readonly_setting(client) -> str:
     """
     read_only = client.server_settings.get("readonly")
     if read_only:
-        if read_only == "0":
+        if read_only.value == "0":
             return "1"  # Force read-only mode if server has it disabled
         else:
             return read_only.value  # Respect server's readonly setting (likely 2)
@@ -510,6 +2107,86 @@ def get_readonly_setting(client) -> str:
         return "1"  # Default to basic read-only mode if setting isn't present
 
 
+def get_query_settings(client, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Get the settings for a read-only query built by this server that also changes
+    other settings.
+
+    readonly=1 forbids table functions like mergeTreeIndex, so when this server
+    enforces read-only mode itself it uses readonly=2 instead, which still only
+    allows reads. If the user's profile already pins readonly=1, the extra
+    settings cannot be applied and are dropped. Queries written by tool callers
+    use get_caller_query_settings instead.
+
+    Args:
+        client: ClickHouse client connection
+        extra: Optional settings to apply besides readonly
+
+    Returns:
+        Settings to pass with the query
+    """
+    settings = {"readonly": get_readonly_setting(client)}
+    if not extra:
+        return settings
+    if settings["readonly"] == "1":
+        server_read_only = client.server_settings.get("readonly")
+        if server_read_only and server_read_only.value == "1":
+            logger.warning(f"Server enforces readonly=1, ignoring query settings {extra}")
+            return settings
+        settings["readonly"] = "2"
+    settings.update(extra)
+    return settings
+
+
+def get_caller_query_settings(
+    client, query: str, extra: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Get the settings for a query written by a tool caller.
+
+    Caller queries run with readonly=1 unless the server's profile says otherwise.
+    ClickHouse checks settings sent along with a query against the profile's
+    readonly value, so extra settings (profiles, preview and job limits) apply at
+    readonly=1 as long as the profile itself doesn't pin it; a SETTINGS clause in
+    the query is checked against readonly=1 and is rejected here anyway. Only table
+    functions like numbers() need readonly=2, which also allows url() or remote(),
+    so queries calling table functions only escalate when
+    CLICKHOUSE_MCP_ESCALATE_READONLY is enabled, and never with such external ones.
+
+    Args:
+        client: ClickHouse client connection
+        query: The caller's query
+        extra: Optional settings to apply besides readonly
+
+    Returns:
+        Settings to pass with the query
+
+    Raises:
+        ToolError: If the query has a SETTINGS clause or the extra settings cannot be
+            applied to it
+    """
+    # A SETTINGS clause would get around the settings allowlist and the extra settings
+    if has_settings_clause(query):
+        raise ToolError(
+            "Queries cannot have a SETTINGS clause; use the settings or profile argument"
+        )
+    settings = {"readonly": get_readonly_setting(client)}
+    if settings["readonly"] == "1":
+        server_read_only = client.server_settings.get("readonly")
+        if server_read_only and server_read_only.value == "1":
+            if extra:
+                raise ToolError(
+                    "The ClickHouse user is pinned to readonly=1, so query settings, "
+                    "profiles and preview limits cannot be applied"
+                )
+        elif get_mcp_config().escalate_readonly and table_functions(query):
+            functions = external_table_functions(query)
+            if functions:
+                raise ToolError(f"Table functions {', '.join(functions)} cannot be used in queries")
+            settings["readonly"] = "2"
+    if extra:
+        settings.update(extra)
+    return settings
+
+
 def create_chdb_client():
     """Create a chDB client connection."""
     if not get_chdb_config().enabled:
@@ -570,6 +2247,47 @@ def run_chdb_select_query(query: str):
         return {"status": "error", "message": f"Unexpected error: {e}"}
 
 
+def materialize_source(
+    source: str,
+    name: Optional[str] = None,
+    order_by: Optional[str] = None,
+    refresh: bool = False,
+) -> Dict[str, Any]:
+    """Load a chDB table function's data into a local table for repeated, fast queries.
+
+    Querying url(), s3() or file() directly re-reads the source on every query.
+    Use this when you will run several queries on the same source, then query the
+    returned table with run_chdb_select_query. Calling it again with the same source
+    reuses the table, and reloads it if the source changed (ETag, Last-Modified or
+    size for url() and s3(), modification time for file()).
+
+    Args:
+        source: Table function call, e.g. "url('https://example.com/data.parquet', 'Parquet')"
+        name: Optional table name (default: derived from the source)
+        order_by: Optional sorting key for the table, e.g. "(country, date)", to speed
+            up filters on those columns (default: no sorting)
+        refresh: Reload the source even if it looks unchanged (default: False)
+
+    Returns:
+        A dictionary containing:
+        - table: Table to query, e.g. materialized.sales
+        - status: "loaded", "reused" or "refreshed"
+        - source, etag, last_modified and size: The source and the version loaded
+        - rows: Number of rows in the table
+        - loaded_at: Unix time of the load
+    """
+    logger.info(f"Materializing chDB source {source} as name={name}, refresh={refresh}")
+    chdb_config = get_chdb_config()
+    sources = MaterializedSources(
+        create_chdb_client(), chdb_config.materialize_ttl, chdb_config.materialize_timeout
+    )
+    try:
+        return sources.materialize(source, name, order_by, refresh)
+    except MaterializeError as err:
+        logger.error(f"Error materializing {source}: {err}")
+        raise ToolError(str(err))
+
+
 def chdb_initial_prompt() -> str:
     """This prompt helps users understand how to interact and perform common operations in chDB"""
     return CHDB_PROMPT
@@ -597,7 +2315,48 @@ def _init_chdb_client():
 if os.getenv("CLICKHOUSE_ENABLED", "true").lower() == "true":
     mcp.add_tool(Tool.from_function(list_databases))
     mcp.add_tool(Tool.from_function(list_tables))
-    mcp.add_tool(Tool.from_function(run_select_query))
+    mcp.add_tool(Tool.from_function(describe_database_compact))
+    mcp.add_tool(Tool.from_function(search_schema))
+    mcp.add_tool(
+        Tool.from_function(sample_table_tool, name="sample_table", description=sample_table.__doc__)
+    )
+    mcp.add_tool(
+        Tool.from_function(column_stats_tool, name="column_stats", description=column_stats.__doc__)
+    )
+    mcp.add_tool(Tool.from_function(analyze_query))
+    mcp.add_tool(
+        Tool.from_function(
+            run_select_query_tool,
+            name="run_select_query",
+            description=run_select_query.__doc__,
+        )
+    )
+    # Jobs live in the memory of the worker that accepted them, and workers share one
+    # socket, so follow-up calls would mostly reach a worker that does not know the job
+    if get_mcp_config().workers > 1:
+        logger.warning("Query job tools are disabled because CLICKHOUSE_MCP_WORKERS > 1")
+    else:
+        mcp.add_tool(
+            Tool.from_function(
+                submit_query_tool, name="submit_query", description=submit_query.__doc__
+            )
+        )
+        mcp.add_tool(Tool.from_function(get_query_status))
+        mcp.add_tool(
+            Tool.from_function(
+                fetch_query_result_tool,
+                name="fetch_query_result",
+                description=fetch_query_result.__doc__,
+            )
+        )
+        mcp.add_tool(Tool.from_function(cancel_query))
+    mcp.add_tool(
+        Tool.from_function(
+            run_select_queries_tool,
+            name="run_select_queries",
+            description=run_select_queries.__doc__,
+        )
+    )
     logger.info("ClickHouse tools registered")
 
 
@@ -607,6 +2366,7 @@ if os.getenv("CHDB_ENABLED", "false").lower() == "true":
         atexit.register(lambda: _chdb_client.close())
 
     mcp.add_tool(Tool.from_function(run_chdb_select_query))
+    mcp.add_tool(Tool.from_function(materialize_source))
     chdb_prompt = Prompt.from_function(
         chdb_initial_prompt,
         name="chdb_initial_prompt",
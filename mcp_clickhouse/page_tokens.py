@@ -0,0 +1,92 @@
+"""Self-contained, signed page tokens for paginated tools.
+
+A page token carries the complete pagination state (filters and cursor) as
+base64url-encoded JSON followed by an HMAC-SHA256 signature, so any server
+process holding the same secret can continue a listing without shared memory.
+"""
+
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import logging
+import secrets
+import time
+from typing import Any, Dict, Optional
+
+from mcp_clickhouse.mcp_env import get_mcp_config
+
+logger = logging.getLogger("mcp-clickhouse")
+
+# Page tokens stop being accepted one hour after they were issued
+PAGE_TOKEN_TTL_SECONDS = 3600
+
+# Used when CLICKHOUSE_MCP_PAGE_TOKEN_SECRET is not set; only valid in this process
+_PROCESS_SECRET = secrets.token_bytes(32)
+_warned_about_secret = False
+
+
+def _secret() -> bytes:
+    global _warned_about_secret
+    configured = get_mcp_config().page_token_secret
+    if configured:
+        return configured.encode()
+    if not _warned_about_secret:
+        logger.warning(
+            "CLICKHOUSE_MCP_PAGE_TOKEN_SECRET is not set, page tokens are only valid "
+            "within this server process"
+        )
+        _warned_about_secret = True
+    return _PROCESS_SECRET
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def encode_page_token(state: Dict[str, Any], ttl: int = PAGE_TOKEN_TTL_SECONDS) -> str:
+    """Encode and sign pagination state.
+
+    Args:
+        state: JSON-serializable pagination state
+        ttl: Seconds until the token expires
+
+    Returns:
+        The page token
+    """
+    payload = json.dumps(
+        {**state, "expires": int(time.time()) + ttl}, separators=(",", ":")
+    ).encode()
+    signature = hmac.new(_secret(), payload, hashlib.sha256).digest()
+    return f"{_b64encode(payload)}.{_b64encode(signature)}"
+
+
+def decode_page_token(token: str) -> Optional[Dict[str, Any]]:
+    """Verify and decode a page token.
+
+    Args:
+        token: Token produced by encode_page_token
+
+    Returns:
+        The pagination state, or None if the token is malformed, tampered with or expired
+    """
+    try:
+        encoded_payload, encoded_signature = token.split(".")
+        payload = _b64decode(encoded_payload)
+        signature = _b64decode(encoded_signature)
+    except (ValueError, binascii.Error):
+        return None
+
+    expected = hmac.new(_secret(), payload, hashlib.sha256).digest()
+    if not hmac.compare_digest(signature, expected):
+        return None
+
+    state = json.loads(payload)
+    if state.pop("expires", 0) < time.time():
+        return None
+    return state
@@ -0,0 +1,198 @@
+"""Per-query ClickHouse settings that callers may choose.
+
+Callers can tune a query with settings from an operator-controlled allowlist,
+each bounded to a range or a set of values, and with named profiles that
+bundle settings the operator chose (for example few threads for interactive
+queries, more memory and parallelism for heavy analytics).
+
+Both are configured as JSON:
+
+    CLICKHOUSE_MCP_QUERY_SETTINGS_ALLOWLIST='{"max_threads": {"min": 1, "max": 8},
+        "join_algorithm": {"values": ["hash", "grace_hash"]}}'
+    CLICKHOUSE_MCP_QUERY_PROFILES='{"interactive": {"max_threads": 2},
+        "heavy": {"max_threads": 16, "max_memory_usage": 20000000000}}'
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from mcp_clickhouse.mcp_env import get_mcp_config
+
+# Settings the server itself controls, which neither callers nor profiles may set
+PROTECTED_SETTINGS = {"readonly", "query_id", "allow_ddl", "allow_introspection_functions"}
+
+# Table functions that reach outside the server's own tables. readonly=1 forbids
+# them, so queries that call one are never run with readonly=2.
+EXTERNAL_TABLE_FUNCTIONS = {
+    name.lower()
+    for name in (
+        "url", "urlCluster", "s3", "s3Cluster", "gcs", "oss", "cosn", "file", "fileCluster",
+        "remote", "remoteSecure", "cluster", "clusterAllReplicas", "mysql", "postgresql",
+        "mongodb", "redis", "sqlite", "odbc", "jdbc", "hdfs", "hdfsCluster", "azureBlobStorage",
+        "azureBlobStorageCluster", "executable", "input", "iceberg", "icebergS3",
+        "icebergAzure", "icebergHDFS", "icebergLocal", "deltaLake", "deltaLakeAzure", "hudi",
+    )
+}  # fmt: skip
+
+# String literals, quoted identifiers and comments, which are blanked out before
+# looking for keywords and function calls in a query
+_NON_CODE_RE = re.compile(
+    r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`(?:[^`\\]|\\.)*`|--[^\n]*|/\*.*?\*/",
+    re.DOTALL,
+)
+# A SETTINGS keyword followed by "name =". Columns and tables named settings, like
+# system.settings or system.query_log's Settings, are never followed by that.
+_SETTINGS_CLAUSE_RE = re.compile(r"(?<![\w.])SETTINGS\s+[A-Za-z_][A-Za-z0-9_]*\s*=", re.IGNORECASE)
+_TABLE_KEYWORD_END_RE = re.compile(r"\b(?:FROM|JOIN)\s*$", re.IGNORECASE)
+_FUNCTION_CALL_RE = re.compile(r"\b([A-Za-z_][A-Za-z0-9_]*)\s*\(")
+_TABLE_FUNCTION_RE = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_][A-Za-z0-9_]*)\s*\(", re.IGNORECASE)
+
+
+@dataclass
+class SettingRule:
+    """Values a caller may use for one setting: a numeric range or a list of values."""
+
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    values: Optional[List[Any]] = None
+
+    def check(self, name: str, value: Any) -> Any:
+        """Validate a value for the setting.
+
+        Raises:
+            ValueError: If the value is outside the allowed range or values
+        """
+        if isinstance(value, bool):
+            value = int(value)
+        if self.values is not None:
+            if value not in self.values:
+                raise ValueError(
+                    f"Invalid value {value!r} for setting {name}. Allowed values: {self.values}"
+                )
+            return value
+        if not isinstance(value, (int, float)):
+            raise ValueError(f"Setting {name} must be a number, got {value!r}")
+        if (self.minimum is not None and value < self.minimum) or (
+            self.maximum is not None and value > self.maximum
+        ):
+            raise ValueError(
+                f"Value {value} for setting {name} is outside the allowed range "
+                f"[{self.minimum}, {self.maximum}]"
+            )
+        return value
+
+
+DEFAULT_ALLOWLIST = {
+    "max_threads": SettingRule(1, 16),
+    "max_memory_usage": SettingRule(100_000_000, 10_000_000_000),
+    "max_block_size": SettingRule(1024, 1_048_576),
+    "use_query_cache": SettingRule(values=[0, 1]),
+    "optimize_read_in_order": SettingRule(values=[0, 1]),
+}
+
+DEFAULT_PROFILES = {
+    "interactive": {"max_threads": 2, "max_memory_usage": 2_000_000_000},
+    "heavy": {"max_threads": 16, "max_memory_usage": 10_000_000_000},
+}
+
+
+def _check_not_protected(name: str) -> None:
+    if name in PROTECTED_SETTINGS:
+        raise ValueError(f"Setting {name} is controlled by the server and cannot be set")
+
+
+def _code_only(query: str) -> str:
+    return _NON_CODE_RE.sub(" ", query)
+
+
+def has_settings_clause(query: str) -> bool:
+    """Check whether a query sets ClickHouse settings in its own SETTINGS clause."""
+    code = _code_only(query)
+    return any(
+        not _TABLE_KEYWORD_END_RE.search(code, 0, match.start())
+        for match in _SETTINGS_CLAUSE_RE.finditer(code)
+    )
+
+
+def external_table_functions(query: str) -> List[str]:
+    """Find calls of table functions that read data from outside the server's tables."""
+    calls = _FUNCTION_CALL_RE.findall(_code_only(query))
+    return sorted({name for name in calls if name.lower() in EXTERNAL_TABLE_FUNCTIONS})
+
+
+def table_functions(query: str) -> List[str]:
+    """Find the table functions a query reads from, like numbers() in FROM numbers(10)."""
+    return sorted(set(_TABLE_FUNCTION_RE.findall(_code_only(query))))
+
+
+def parse_allowlist(text: str) -> Dict[str, SettingRule]:
+    """Parse an allowlist from its JSON configuration.
+
+    Raises:
+        ValueError: If the JSON is invalid or allows a protected setting
+    """
+    allowlist = {}
+    for name, rule in json.loads(text).items():
+        _check_not_protected(name)
+        allowlist[name] = SettingRule(rule.get("min"), rule.get("max"), rule.get("values"))
+    return allowlist
+
+
+def parse_profiles(text: str) -> Dict[str, Dict[str, Any]]:
+    """Parse named profiles from their JSON configuration.
+
+    Raises:
+        ValueError: If the JSON is invalid or a profile sets a protected setting
+    """
+    profiles = json.loads(text)
+    for settings in profiles.values():
+        for name in settings:
+            _check_not_protected(name)
+    return profiles
+
+
+def get_settings_allowlist() -> Dict[str, SettingRule]:
+    """Get the configured allowlist, or the default one."""
+    text = get_mcp_config().query_settings_allowlist
+    return parse_allowlist(text) if text else DEFAULT_ALLOWLIST
+
+
+def get_query_profiles() -> Dict[str, Dict[str, Any]]:
+    """Get the configured profiles, or the default ones."""
+    text = get_mcp_config().query_profiles
+    return parse_profiles(text) if text else DEFAULT_PROFILES
+
+
+def resolve_query_settings(
+    settings: Optional[Dict[str, Any]] = None, profile: Optional[str] = None
+) -> Dict[str, Any]:
+    """Combine a profile and caller-supplied settings into the settings to apply.
+
+    Settings given by the caller override those of the profile.
+
+    Raises:
+        ValueError: For an unknown profile, or a setting that is not allowed or
+            out of bounds
+    """
+    resolved: Dict[str, Any] = {}
+    if profile is not None:
+        profiles = get_query_profiles()
+        if profile not in profiles:
+            raise ValueError(
+                f"Unknown settings profile '{profile}'. Available profiles: "
+                f"{', '.join(sorted(profiles))}"
+            )
+        resolved.update(profiles[profile])
+    if settings:
+        allowlist = get_settings_allowlist()
+        for name, value in settings.items():
+            _check_not_protected(name)
+            if name not in allowlist:
+                raise ValueError(
+                    f"Setting {name} is not allowed. Allowed settings: "
+                    f"{', '.join(sorted(allowlist))}"
+                )
+            resolved[name] = allowlist[name].check(name, value)
+    return resolved
@@ -0,0 +1,159 @@
+"""Rolling-window resource quotas for tool callers.
+
+Usage reported by ClickHouse for each query (rows and bytes read, elapsed
+time) is charged to the MCP session that ran it and, in HTTP mode, to the
+credential the session authenticated with. Once a caller has used up its
+quota within the window, further queries are rejected or delayed until older
+usage has aged out of the window.
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional, Tuple
+
+from cachetools import TTLCache
+
+from mcp_clickhouse.mcp_env import get_mcp_config
+
+# CLICKHOUSE_MCP_QUOTA_MODE values: fail calls over quota, or delay them until usage ages out
+QUOTA_MODE_REJECT = "reject"
+QUOTA_MODE_THROTTLE = "throttle"
+
+# Callers tracked at once; a caller idle for a whole window is forgotten
+MAX_TRACKED_CALLERS = 10000
+
+
+class QuotaExceededError(Exception):
+    """Raised when a caller has used up its quota for the current window."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class Usage:
+    read_rows: int = 0
+    read_bytes: int = 0
+    elapsed_seconds: float = 0.0
+
+    @classmethod
+    def from_summary(cls, summary: Dict[str, str], elapsed_seconds: float) -> "Usage":
+        """Build usage from a clickhouse_connect query summary.
+
+        The measured elapsed time is used when the summary does not report it.
+        """
+        elapsed_ns = int(summary.get("elapsed_ns", 0))
+        return cls(
+            read_rows=int(summary.get("read_rows", 0)),
+            read_bytes=int(summary.get("read_bytes", 0)),
+            elapsed_seconds=elapsed_ns / 1e9 if elapsed_ns else elapsed_seconds,
+        )
+
+
+@dataclass
+class QuotaLimits:
+    """Usage allowed per caller and window. 0 means unlimited."""
+
+    max_read_rows: int = 0
+    max_read_bytes: int = 0
+    max_elapsed_seconds: float = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_read_rows or self.max_read_bytes or self.max_elapsed_seconds)
+
+    def exceeded_by(self, usage: Usage) -> Optional[str]:
+        """Describe which limit the usage is over, or None if it is within all limits."""
+        if self.max_read_rows and usage.read_rows >= self.max_read_rows:
+            return f"{usage.read_rows} rows read (limit {self.max_read_rows})"
+        if self.max_read_bytes and usage.read_bytes >= self.max_read_bytes:
+            return f"{usage.read_bytes} bytes read (limit {self.max_read_bytes})"
+        if self.max_elapsed_seconds and usage.elapsed_seconds >= self.max_elapsed_seconds:
+            return (
+                f"{usage.elapsed_seconds:.1f}s of query time (limit {self.max_elapsed_seconds:g}s)"
+            )
+        return None
+
+
+class QuotaTracker:
+    """Tracks usage per caller over a rolling window.
+
+    Args:
+        limits: Usage allowed per caller within the window
+        window_seconds: Length of the rolling window
+    """
+
+    def __init__(self, limits: QuotaLimits, window_seconds: float = 3600):
+        self.limits = limits
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._history: TTLCache = TTLCache(maxsize=MAX_TRACKED_CALLERS, ttl=window_seconds)
+
+    def _prune(self, history: Deque[Tuple[float, Usage]], now: float) -> None:
+        while history and history[0][0] <= now - self.window_seconds:
+            history.popleft()
+
+    def usage(self, caller: str) -> Usage:
+        """Get the usage of a caller within the current window."""
+        total = Usage()
+        with self._lock:
+            history = self._history.get(caller)
+            if history is None:
+                return total
+            self._prune(history, time.monotonic())
+            for _, usage in history:
+                total.read_rows += usage.read_rows
+                total.read_bytes += usage.read_bytes
+                total.elapsed_seconds += usage.elapsed_seconds
+        return total
+
+    def record(self, caller: str, usage: Usage) -> None:
+        """Charge usage to a caller."""
+        now = time.monotonic()
+        with self._lock:
+            history = self._history.get(caller) or deque()
+            self._prune(history, now)
+            history.append((now, usage))
+            # Re-inserting restarts the caller's expiry
+            self._history[caller] = history
+
+    def check(self, caller: str) -> None:
+        """Check that a caller may run another query.
+
+        Raises:
+            QuotaExceededError: If the caller is over a limit. retry_after tells
+                when its oldest usage in the window expires.
+        """
+        reason = self.limits.exceeded_by(self.usage(caller))
+        if reason is None:
+            return
+        with self._lock:
+            history = self._history.get(caller)
+            oldest = history[0][0] if history else time.monotonic()
+        retry_after = max(oldest + self.window_seconds - time.monotonic(), 0.0)
+        raise QuotaExceededError(
+            f"Quota exceeded for {caller}: {reason} in the last {self.window_seconds:g}s",
+            retry_after,
+        )
+
+
+_QUOTA_TRACKER_INSTANCE = None
+
+
+def get_quota_tracker() -> QuotaTracker:
+    """Gets the singleton tracker of per-session and per-credential usage."""
+    global _QUOTA_TRACKER_INSTANCE
+    if _QUOTA_TRACKER_INSTANCE is None:
+        config = get_mcp_config()
+        _QUOTA_TRACKER_INSTANCE = QuotaTracker(
+            QuotaLimits(
+                config.quota_max_read_rows,
+                config.quota_max_read_bytes,
+                config.quota_max_query_seconds,
+            ),
+            config.quota_window,
+        )
+    return _QUOTA_TRACKER_INSTANCE
@@ -0,0 +1,145 @@
+"""Retries and hedged requests for idempotent ClickHouse reads.
+
+Transient failures (dropped connections, socket timeouts, overloaded servers)
+are retried with exponential backoff and full jitter. Latency-sensitive reads
+can additionally be hedged: if the first request has not answered within the
+recent p95 latency, a second one is sent and whichever finishes first wins.
+"""
+
+import concurrent.futures
+import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional, TypeVar
+
+from mcp_clickhouse.circuit_breaker import CircuitOpenError, is_connection_error
+
+logger = logging.getLogger("mcp-clickhouse")
+
+T = TypeVar("T")
+
+# ClickHouse error codes that describe a temporary condition rather than a bad query
+TRANSIENT_ERROR_CODES = {
+    3,  # UNEXPECTED_END_OF_FILE
+    32,  # ATTEMPT_TO_READ_AFTER_EOF
+    202,  # TOO_MANY_SIMULTANEOUS_QUERIES
+    209,  # SOCKET_TIMEOUT
+    210,  # NETWORK_ERROR
+    236,  # ABORTED
+    279,  # ALL_CONNECTION_TRIES_FAILED
+    425,  # SYSTEM_ERROR
+    999,  # KEEPER_EXCEPTION
+}
+
+_ERROR_CODE_RE = re.compile(r"\bCode:\s*(\d+)")
+
+
+def is_transient_error(err: BaseException) -> bool:
+    """Check whether a failed read is worth retrying."""
+    if isinstance(err, CircuitOpenError):
+        return False
+    if is_connection_error(err):
+        return True
+    code = getattr(err, "code", None)
+    if code is None:
+        match = _ERROR_CODE_RE.search(str(err))
+        code = int(match.group(1)) if match else None
+    return code in TRANSIENT_ERROR_CODES
+
+
+def retry_call(
+    fn: Callable[[], T],
+    retries: int,
+    backoff: float,
+    max_backoff: float,
+    on_retry: Optional[Callable[[BaseException], None]] = None,
+) -> T:
+    """Call fn, retrying transient errors with jittered exponential backoff.
+
+    Args:
+        fn: The idempotent operation to run
+        retries: Number of retries after the first attempt
+        backoff: Base backoff in seconds, doubled on every retry
+        max_backoff: Upper bound for a single backoff in seconds
+        on_retry: Optional callback invoked with the error before each retry
+
+    Returns:
+        The result of the first successful call
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as err:
+            if attempt >= retries or not is_transient_error(err):
+                raise
+            delay = random.uniform(0, min(max_backoff, backoff * 2**attempt))
+            attempt += 1
+            logger.warning(
+                f"Transient ClickHouse error, retrying in {delay:.2f}s "
+                f"(attempt {attempt + 1} of {retries + 1}): {err}"
+            )
+            if on_retry:
+                on_retry(err)
+            time.sleep(delay)
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies used to pick the hedging delay.
+
+    Args:
+        window: Number of most recent samples to keep
+        min_samples: Samples required before a percentile is reported
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self._samples: deque = deque(maxlen=window)
+        self._min_samples = min_samples
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Get the given percentile in seconds, or None without enough samples."""
+        with self._lock:
+            if len(self._samples) < self._min_samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+def hedged_call(
+    primary: Callable[[], T],
+    backup: Callable[[], T],
+    delay: float,
+    executor: concurrent.futures.Executor,
+) -> T:
+    """Run primary and, if it is still running after delay seconds, race it against backup.
+
+    The first request to succeed wins. The losing request is left to finish in
+    the background and its result is discarded. If both fail, the primary's
+    error is raised.
+    """
+    first = executor.submit(primary)
+    try:
+        return first.result(timeout=delay)
+    except concurrent.futures.TimeoutError:
+        pass
+
+    logger.info(f"Request still running after {delay * 1000:.0f}ms, sending hedged request")
+    second = executor.submit(backup)
+    pending = {first, second}
+    while pending:
+        done, pending = concurrent.futures.wait(
+            pending, return_when=concurrent.futures.FIRST_COMPLETED
+        )
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+    return first.result()
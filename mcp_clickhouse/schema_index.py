@@ -0,0 +1,253 @@
+"""In-memory search index over database, table and column names and comments.
+
+The index is built from one scan of system.tables and system.columns and then
+kept current incrementally: a refresh reads only the table list and re-reads
+the columns of tables whose metadata_modification_time changed. Names are
+indexed by trigram for substring search, names and comments by token
+(split on non-alphanumeric characters and underscores) for word search.
+"""
+
+import heapq
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from clickhouse_connect.driver.binding import format_query_value
+
+logger = logging.getLogger("mcp-clickhouse")
+
+KIND_TABLE = "table"
+KIND_COLUMN = "column"
+
+# Databases describing the server itself, never indexed
+EXCLUDED_DATABASES = ["system", "INFORMATION_SCHEMA", "information_schema"]
+
+# Above this many changed tables a refresh rescans all columns instead
+MAX_INCREMENTAL_TABLES = 500
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+TableKey = Tuple[str, str]
+
+
+@dataclass
+class SchemaEntry:
+    kind: str
+    database: str
+    table: str
+    column: Optional[str]
+    column_type: Optional[str]
+    comment: Optional[str]
+
+    @property
+    def name(self) -> str:
+        return self.column if self.kind == KIND_COLUMN else self.table
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _tokens(text: str) -> Set[str]:
+    return set(_TOKEN_RE.findall(text.lower()))
+
+
+class SchemaIndex:
+    """Searchable copy of the schema of all non-system databases."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._entries: Dict[int, SchemaEntry] = {}
+        self._names: Dict[int, str] = {}
+        self._trigram_postings: Dict[str, Set[int]] = {}
+        self._token_postings: Dict[str, Set[int]] = {}
+        self._table_entries: Dict[TableKey, List[int]] = {}
+        self._table_versions: Dict[TableKey, int] = {}
+        self._next_id = 0
+        self.refreshed_at: Optional[float] = None
+
+    def is_stale(self, max_age: float) -> bool:
+        """Check whether the index was never built or is older than max_age seconds."""
+        return self.refreshed_at is None or time.monotonic() - self.refreshed_at >= max_age
+
+    def refresh(self, run_query: Callable[[str], Any]) -> int:
+        """Bring the index up to date with the server.
+
+        Args:
+            run_query: Runs a query and returns its clickhouse_connect QueryResult
+
+        Returns:
+            Number of tables that were added, changed or removed
+        """
+        # Searches keep using the current index while a single refresh runs
+        with self._refresh_lock:
+            return self._refresh(run_query)
+
+    def _refresh(self, run_query: Callable[[str], Any]) -> int:
+        excluded = format_query_value(EXCLUDED_DATABASES)
+        tables = run_query(
+            "SELECT database, name, toUnixTimestamp(metadata_modification_time), comment "
+            f"FROM system.tables WHERE database NOT IN {excluded}"
+        ).result_rows
+        versions = {(db, name): version for db, name, version, _ in tables}
+
+        with self._lock:
+            known = self._table_versions
+            changed = [key for key, version in versions.items() if known.get(key) != version]
+            removed = [key for key in known if key not in versions]
+        if not changed and not removed:
+            self.refreshed_at = time.monotonic()
+            return 0
+
+        columns_query = (
+            "SELECT database, table, name, type, comment FROM system.columns "
+            f"WHERE database NOT IN {excluded}"
+        )
+        full_rebuild = self.refreshed_at is None or len(changed) > MAX_INCREMENTAL_TABLES
+        if not full_rebuild and changed:
+            keys = ", ".join(
+                f"({format_query_value(db)}, {format_query_value(name)})" for db, name in changed
+            )
+            columns_query += f" AND (database, table) IN ({keys})"
+        columns = run_query(columns_query).result_rows if changed else []
+
+        columns_by_table: Dict[TableKey, List[Tuple]] = {}
+        for db, table, name, column_type, comment in columns:
+            columns_by_table.setdefault((db, table), []).append((name, column_type, comment))
+        comments = {(db, name): comment for db, name, _, comment in tables}
+
+        with self._lock:
+            if full_rebuild:
+                removed = list(self._table_versions)
+                changed = list(versions)
+            for key in set(removed) | set(changed):
+                self._remove_table(key)
+            for key in changed:
+                self._add_table(key, comments[key], columns_by_table.get(key, []))
+                self._table_versions[key] = versions[key]
+            self.refreshed_at = time.monotonic()
+
+        logger.info(
+            f"Schema index refreshed: {len(changed)} tables updated, {len(removed)} removed, "
+            f"{len(self._entries)} entries"
+        )
+        return len(changed) + len(removed)
+
+    def _add_entry(self, entry: SchemaEntry) -> int:
+        entry_id = self._next_id
+        self._next_id += 1
+        name = entry.name.lower()
+        self._entries[entry_id] = entry
+        self._names[entry_id] = name
+        for trigram in _trigrams(name):
+            self._trigram_postings.setdefault(trigram, set()).add(entry_id)
+        for token in _tokens(name) | _tokens(entry.comment or ""):
+            self._token_postings.setdefault(token, set()).add(entry_id)
+        return entry_id
+
+    def _add_table(self, key: TableKey, comment: Optional[str], columns: Iterable[Tuple]) -> None:
+        db, table = key
+        ids = [self._add_entry(SchemaEntry(KIND_TABLE, db, table, None, None, comment))]
+        for name, column_type, column_comment in columns:
+            ids.append(
+                self._add_entry(
+                    SchemaEntry(KIND_COLUMN, db, table, name, column_type, column_comment)
+                )
+            )
+        self._table_entries[key] = ids
+
+    def _remove_table(self, key: TableKey) -> None:
+        for entry_id in self._table_entries.pop(key, []):
+            entry = self._entries.pop(entry_id)
+            name = self._names.pop(entry_id)
+            for trigram in _trigrams(name):
+                self._discard(self._trigram_postings, trigram, entry_id)
+            for token in _tokens(name) | _tokens(entry.comment or ""):
+                self._discard(self._token_postings, token, entry_id)
+        self._table_versions.pop(key, None)
+
+    @staticmethod
+    def _discard(postings: Dict[str, Set[int]], key: str, entry_id: int) -> None:
+        ids = postings.get(key)
+        if ids is not None:
+            ids.discard(entry_id)
+            if not ids:
+                del postings[key]
+
+    def _substring_matches(self, text: str) -> Set[int]:
+        if len(text) < 3:
+            return {entry_id for entry_id, name in self._names.items() if text in name}
+        postings = sorted(
+            (self._trigram_postings.get(trigram, set()) for trigram in _trigrams(text)), key=len
+        )
+        candidates = set(postings[0]).intersection(*postings[1:])
+        # Trigrams can match out of order, so confirm the substring
+        return {entry_id for entry_id in candidates if text in self._names[entry_id]}
+
+    def _token_matches(self, text: str) -> Set[int]:
+        tokens = _tokens(text)
+        if not tokens:
+            return set()
+        postings = sorted((self._token_postings.get(token, set()) for token in tokens), key=len)
+        return set(postings[0]).intersection(*postings[1:])
+
+    def search(
+        self,
+        text: str,
+        database: Optional[str] = None,
+        kind: Optional[str] = None,
+        limit: int = 50,
+    ) -> Tuple[List[SchemaEntry], int]:
+        """Find tables and columns whose name contains text or whose name or comment
+        contains all words of text.
+
+        Results are ranked exact name match first, then names starting with text,
+        other name matches, and finally comment matches.
+
+        Returns:
+            Tuple of (up to limit matching entries, total number of matches)
+        """
+        needle = text.strip().lower()
+        if not needle:
+            return [], 0
+        with self._lock:
+            matches = self._substring_matches(needle) | self._token_matches(needle)
+            ranked = []
+            for entry_id in matches:
+                entry = self._entries[entry_id]
+                if database is not None and entry.database != database:
+                    continue
+                if kind is not None and entry.kind != kind:
+                    continue
+                name = self._names[entry_id]
+                if name == needle:
+                    rank = 0
+                elif name.startswith(needle):
+                    rank = 1
+                elif needle in name:
+                    rank = 2
+                else:
+                    rank = 3
+                ranked.append((rank, entry.database, entry.table, entry.column or "", entry_id))
+            # Only the returned matches need to be fully ordered
+            best = heapq.nsmallest(limit, ranked)
+            return [self._entries[item[4]] for item in best], len(ranked)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "indexed_tables": len(self._table_entries),
+                "indexed_columns": len(self._entries) - len(self._table_entries),
+            }
+
+
+_SCHEMA_INDEX = SchemaIndex()
+
+
+def get_schema_index() -> SchemaIndex:
+    """Get the process-wide schema index."""
+    return _SCHEMA_INDEX
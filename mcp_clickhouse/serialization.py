@@ -0,0 +1,167 @@
+"""JSON serialization of query results.
+
+By default the MCP framework serializes a tool result several times, inferring
+the type of every value on each pass. For large results that dominates the
+tool's CPU time. Instead, a converter is chosen once per result column from
+its ClickHouse type, and the converted rows are encoded a single time, with
+orjson when it is installed.
+
+Values get the JSON representation the MCP framework's default serializer
+uses: ISO 8601 dates, strings for Decimal/UUID/IP values and null for
+non-finite floats.
+"""
+
+import datetime
+import decimal
+import ipaddress
+import json
+import math
+import operator
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from fastmcp.tools import ToolResult
+from mcp.types import TextContent
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the installed extras
+    orjson = None
+
+Converter = Callable[[Any], Any]
+
+TEMPORAL_TYPES = {"Date", "Date32", "DateTime", "DateTime64"}
+STRING_VALUE_TYPES = {"Decimal", "UUID", "IPv4", "IPv6"}
+FLOAT_TYPES = {"Float32", "Float64", "BFloat16"}
+BINARY_TYPES = {"String", "FixedString"}
+NATIVE_TYPES = {
+    "Int8", "Int16", "Int32", "Int64", "Int128", "Int256",
+    "UInt8", "UInt16", "UInt32", "UInt64", "UInt128", "UInt256",
+    "Bool", "Enum8", "Enum16", "Nothing",
+}  # fmt: skip
+STRING_VALUE_CLASSES = (decimal.Decimal, uuid.UUID, ipaddress.IPv4Address, ipaddress.IPv6Address)
+
+
+def _finite(value: float) -> Optional[float]:
+    return value if math.isfinite(value) else None
+
+
+def _text(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return value
+
+
+_isoformat = operator.methodcaller("isoformat")
+
+
+def to_jsonable(value: Any) -> Any:
+    """Convert a value of any supported type to its JSON representation.
+
+    Used for types without a dedicated converter (Variant, Dynamic, JSON, Tuple, ...).
+    """
+    if value is None or isinstance(value, (str, bool, int)):
+        return value
+    if isinstance(value, float):
+        return _finite(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    if isinstance(value, STRING_VALUE_CLASSES):
+        return str(value)
+    if isinstance(value, bytes):
+        return _text(value)
+    if isinstance(value, dict):
+        return {str(to_jsonable(k)): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [to_jsonable(item) for item in value]
+    return str(value)
+
+
+def _value_converter(ch_type: Any) -> Optional[Converter]:
+    """Choose the converter for non-null values of a ClickHouse type, None for JSON-native ones."""
+    base_type = getattr(ch_type, "base_type", None)
+    if base_type in NATIVE_TYPES:
+        return None
+    if base_type in TEMPORAL_TYPES:
+        return _isoformat
+    if base_type in STRING_VALUE_TYPES:
+        return str
+    if base_type in FLOAT_TYPES:
+        return _finite
+    if base_type in BINARY_TYPES:
+        return _text
+    if base_type == "Array":
+        element = column_converter(ch_type.element_type)
+        if element is None:
+            return None
+        return lambda value: [element(item) for item in value]
+    if base_type == "Map":
+        key = column_converter(ch_type.key_type) or str
+        item_value = column_converter(ch_type.value_type) or (lambda v: v)
+        return lambda value: {str(key(k)): item_value(v) for k, v in value.items()}
+    return to_jsonable
+
+
+def column_converter(ch_type: Any) -> Optional[Converter]:
+    """Choose the converter for values of a ClickHouse column type.
+
+    Args:
+        ch_type: A clickhouse_connect ClickHouseType from QueryResult.column_types
+
+    Returns:
+        A function converting one value, or None if values are already JSON-native
+    """
+    converter = _value_converter(ch_type)
+    if converter is None or not getattr(ch_type, "nullable", False):
+        return converter
+    return lambda value: None if value is None else converter(value)
+
+
+def convert_column(ch_type: Any, values: Sequence[Any]) -> Sequence[Any]:
+    """Convert the values of one result column to JSON-native values."""
+    converter = _value_converter(ch_type)
+    if converter is None:
+        return values
+    if getattr(ch_type, "nullable", False):
+        return [None if value is None else converter(value) for value in values]
+    return list(map(converter, values))
+
+
+def columns_to_rows(
+    column_types: Sequence[Any], columns: Sequence[Sequence[Any]]
+) -> List[List[Any]]:
+    """Convert a columnar query result to rows of JSON-native values.
+
+    Working column by column lets each converter run over all values of its
+    column without per-value dispatch on the type.
+
+    Args:
+        column_types: ClickHouse types of the result columns
+        columns: Result columns, as in clickhouse_connect's QueryResult.result_columns
+
+    Returns:
+        Rows as lists of JSON-native values
+    """
+    converted = [convert_column(ch_type, values) for ch_type, values in zip(column_types, columns)]
+    return [list(row) for row in zip(*converted)]
+
+
+def dumps(obj: Any) -> str:
+    """Encode JSON-native data as compact JSON, using orjson when available."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj).decode()
+        except TypeError:
+            # orjson rejects integers wider than 64 bits (Int128, UInt256, ...)
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def json_tool_result(payload: Dict[str, Any]) -> ToolResult:
+    """Build a tool result for JSON-native data, encoding it only once."""
+    return ToolResult(
+        content=[TextContent(type="text", text=dumps(payload))],
+        structured_content=payload,
+    )
@@ -0,0 +1,97 @@
+"""Coalescing of identical concurrent calls.
+
+When several agents ask the same question at the same moment, only the first
+call runs; callers arriving while it is in flight wait for it and receive the
+same result (or the same exception). Nothing is cached: once the call has
+finished, the next caller runs it again.
+"""
+
+import json
+import logging
+import re
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, TypeVar
+
+logger = logging.getLogger("mcp-clickhouse")
+
+T = TypeVar("T")
+
+# String literals and quoted identifiers, kept as they are, or runs of whitespace
+_QUERY_TOKEN_RE = re.compile(r"""'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|`(?:[^`\\]|\\.)*`|\s+""")
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for use in a coalescing key.
+
+    Runs of whitespace outside of quotes collapse to a single space, so queries
+    that differ only in formatting share a key. Quoted text is left untouched.
+    """
+
+    def replace(match: re.Match) -> str:
+        token = match.group(0)
+        return " " if token.isspace() else token
+
+    return _QUERY_TOKEN_RE.sub(replace, query).strip().rstrip(";").rstrip()
+
+
+def call_key(name: str, *args: Any) -> str:
+    """Build a coalescing key from a call's name and JSON-serializable arguments."""
+    return json.dumps([name, *args], sort_keys=True, default=str)
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time and shares its outcome."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """Run fn, or wait for the in-flight call with the same key.
+
+        Args:
+            key: Identifies calls that are interchangeable
+            fn: Computes the result; only called if no call with key is in flight
+
+        Returns:
+            The result of fn, possibly computed for another caller
+
+        Raises:
+            Whatever fn raised, in every caller that shared the call
+        """
+        with self._lock:
+            in_flight = self._calls.get(key)
+            if in_flight is None:
+                future: Future = Future()
+                self._calls[key] = future
+            else:
+                self.coalesced += 1
+        if in_flight is not None:
+            logger.debug(f"Joining in-flight call {key}")
+            return in_flight.result()
+
+        try:
+            result = fn()
+        except BaseException as err:
+            future.set_exception(err)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+_SINGLE_FLIGHT = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    """Get the process-wide coalescer for tool calls."""
+    return _SINGLE_FLIGHT
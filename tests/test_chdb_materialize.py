@@ -0,0 +1,67 @@
+import os
+
+import chdb.session as chs
+import pytest
+
+from mcp_clickhouse.chdb_materialize import (
+    MaterializedSources,
+    MaterializeError,
+    SourceVersion,
+    _load_lock,
+    default_table_name,
+    probe_source,
+    source_location,
+)
+
+
+def test_source_location():
+    """Test extracting the function and location of a table-function call."""
+    assert source_location("url('https://example.com/a.csv', 'CSV')") == (
+        "url",
+        "https://example.com/a.csv",
+    )
+    assert source_location(" S3('s3://bucket/it\\'s.parquet') ") == (
+        "s3",
+        "s3://bucket/it's.parquet",
+    )
+    assert source_location("numbers(10)") is None
+    assert default_table_name("numbers(10)") == default_table_name(" numbers(10)")
+
+
+def test_probe_files(tmp_path):
+    """Test that local files are versioned by modification time, size and matched paths."""
+    first = tmp_path / "a.csv"
+    first.write_text("x\n1\n")
+    os.utime(first, (1000, 1000))
+    version = probe_source(f"file('{first}', 'CSVWithNames')")
+    assert version == SourceVersion(last_modified="1000.0", size=4)
+
+    second = tmp_path / "b.csv"
+    second.write_text("x\n2\n")
+    os.utime(second, (1000, 1000))
+    globbed = probe_source(f"file('{tmp_path}/*.csv')")
+    assert globbed.etag.startswith("2:") and globbed.size == 8
+
+    # Sources without a checkable version are refreshed by age
+    assert not probe_source(f"file('{tmp_path}/{{a,b}}.csv')").known
+    assert not probe_source("s3('s3://bucket/*.parquet')").known
+    assert not probe_source("numbers(10)").known
+
+
+def test_loads_are_locked_per_table():
+    """Test that a load only waits for loads of the same table, and not forever."""
+    sources = MaterializedSources(chs.Session(), timeout=0.2)
+    with _load_lock("locked_test"):
+        assert sources.materialize("numbers(10)", name="unlocked_test")["rows"] == 10
+        with pytest.raises(MaterializeError, match="still being loaded"):
+            sources.materialize("numbers(10)", name="locked_test")
+    assert sources.materialize("numbers(10)", name="locked_test")["status"] == "loaded"
+
+
+def test_load_timeout():
+    """Test that a load running past the timeout fails and keeps the previous table."""
+    sources = MaterializedSources(chs.Session(), timeout=0.5)
+    sources.materialize("numbers(10)", name="timeout_test")
+    with pytest.raises(MaterializeError, match="TIMEOUT_EXCEEDED"):
+        sources.materialize("numbers(10000000000)", name="timeout_test")
+    assert sources.lookup("timeout_test")["rows"] == 10
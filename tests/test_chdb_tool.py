@@ -1,8 +1,12 @@
+import os
+import tempfile
 import unittest
 
 from dotenv import load_dotenv
 
-from mcp_clickhouse import create_chdb_client, run_chdb_select_query
+from fastmcp.exceptions import ToolError
+
+from mcp_clickhouse import create_chdb_client, materialize_source, run_chdb_select_query
 
 load_dotenv()
 
@@ -45,6 +49,35 @@ class TestChDBTools(unittest.TestCase):
         self.assertIsInstance(result, list)
         self.assertEqual(len(result), 0)
 
+    def test_materialize_source(self):
+        """Test loading a file into a local table and reloading it when it changes."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "events.csv")
+            with open(path, "w") as f:
+                f.write("id,kind\n1,login\n2,logout\n")
+            source = f"file('{path}', 'CSVWithNames')"
+
+            result = materialize_source(source, name="events_test")
+            self.assertEqual(result["table"], "materialized.events_test")
+            self.assertEqual(result["status"], "loaded")
+            self.assertEqual(result["rows"], 2)
+            self.assertEqual(materialize_source(source, name="events_test")["status"], "reused")
+
+            with open(path, "a") as f:
+                f.write("3,login\n")
+            os.utime(path, (0, 0))
+            result = materialize_source(source, name="events_test")
+            self.assertEqual(result["status"], "refreshed")
+            self.assertEqual(result["rows"], 3)
+
+            rows = run_chdb_select_query(
+                "SELECT kind, count() AS c FROM materialized.events_test GROUP BY kind ORDER BY kind"
+            )
+            self.assertEqual(rows, [{"kind": "login", "c": 2}, {"kind": "logout", "c": 1}])
+
+        with self.assertRaises(ToolError):
+            materialize_source("SELECT 1")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,85 @@
+import time
+
+import pytest
+
+from mcp_clickhouse.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+    is_connection_error,
+)
+from clickhouse_connect.driver.exceptions import DatabaseError, OperationalError
+
+
+def test_opens_after_consecutive_failures():
+    """Test that the breaker opens once the failure threshold is reached."""
+    breaker = CircuitBreaker(failure_threshold=3, cooldown_seconds=60)
+
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    with pytest.raises(CircuitOpenError, match="circuit breaker open"):
+        breaker.before_call()
+
+
+def test_success_resets_failure_count():
+    """Test that a success in between failures keeps the breaker closed."""
+    breaker = CircuitBreaker(failure_threshold=2, cooldown_seconds=60)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.consecutive_failures == 1
+
+
+def test_half_open_allows_single_probe():
+    """Test that only one probe is let through after the cool-down."""
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    assert breaker.state == CircuitState.HALF_OPEN
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    breaker.before_call()
+
+
+def test_failed_probe_reopens():
+    """Test that a failed half-open probe opens the breaker for another cool-down."""
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    breaker.before_call()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.snapshot() == {"state": "open", "consecutive_failures": 2, "times_opened": 2}
+
+
+def test_threshold_zero_disables_breaker():
+    """Test that a threshold of 0 never fails fast."""
+    breaker = CircuitBreaker(failure_threshold=0)
+
+    for _ in range(10):
+        breaker.record_failure()
+        breaker.before_call()
+
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_connection_error_classification():
+    """Test that only transport failures count against the breaker."""
+    assert is_connection_error(OperationalError("connection refused"))
+    assert is_connection_error(ConnectionRefusedError())
+    assert not is_connection_error(DatabaseError("Code: 60. Unknown table"))
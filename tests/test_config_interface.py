@@ -94,3 +94,58 @@ def test_role_configuration(monkeypatch: pytest.MonkeyPatch):
     client_config = config.get_client_config()
 
     assert client_config["settings"]["role"] == "analytics_reader"
+
+
+def test_multiple_endpoints(monkeypatch: pytest.MonkeyPatch):
+    """Test that CLICKHOUSE_HOST accepts a comma-separated list of host[:port] entries."""
+    monkeypatch.setenv("CLICKHOUSE_HOST", "ch-1, ch-2:9443,[::1]:8124")
+    monkeypatch.setenv("CLICKHOUSE_USER", "test")
+    monkeypatch.setenv("CLICKHOUSE_PASSWORD", "test")
+    monkeypatch.setenv("CLICKHOUSE_SECURE", "true")
+    monkeypatch.delenv("CLICKHOUSE_PORT", raising=False)
+    monkeypatch.delenv("CLICKHOUSE_METADATA_HOST", raising=False)
+
+    config = ClickHouseConfig()
+
+    assert config.endpoints == [("ch-1", 8443), ("ch-2", 9443), ("::1", 8124)]
+    assert config.metadata_endpoints == []
+    assert config.get_client_config()["host"] == "ch-1"
+
+    client_config = config.get_client_config(("ch-2", 9443))
+    assert client_config["host"] == "ch-2"
+    assert client_config["port"] == 9443
+
+
+def test_invalid_load_balancing_strategy(monkeypatch: pytest.MonkeyPatch):
+    """Test that an unknown CLICKHOUSE_LOAD_BALANCING value is rejected."""
+    monkeypatch.setenv("CLICKHOUSE_HOST", "localhost")
+    monkeypatch.setenv("CLICKHOUSE_USER", "test")
+    monkeypatch.setenv("CLICKHOUSE_PASSWORD", "test")
+    monkeypatch.setenv("CLICKHOUSE_LOAD_BALANCING", "random")
+
+    with pytest.raises(ValueError, match="Invalid load balancing strategy"):
+        ClickHouseConfig().load_balancing
+
+
+def test_compression_configuration(monkeypatch: pytest.MonkeyPatch):
+    """Test that CLICKHOUSE_COMPRESS selects the transfer compression codec."""
+    monkeypatch.setenv("CLICKHOUSE_HOST", "localhost")
+    monkeypatch.setenv("CLICKHOUSE_USER", "test")
+    monkeypatch.setenv("CLICKHOUSE_PASSWORD", "test")
+    monkeypatch.delenv("CLICKHOUSE_COMPRESS", raising=False)
+
+    config = ClickHouseConfig()
+    assert config.get_client_config()["compress"] == "lz4"
+
+    monkeypatch.setenv("CLICKHOUSE_COMPRESS", "ZSTD")
+    assert config.get_client_config()["compress"] == "zstd"
+
+    monkeypatch.setenv("CLICKHOUSE_COMPRESS", "auto")
+    assert config.get_client_config()["compress"] is True
+
+    monkeypatch.setenv("CLICKHOUSE_COMPRESS", "none")
+    assert config.get_client_config()["compress"] is False
+
+    monkeypatch.setenv("CLICKHOUSE_COMPRESS", "snappy")
+    with pytest.raises(ValueError, match="Invalid compression"):
+        config.compression
@@ -0,0 +1,82 @@
+import gc
+import time
+
+from mcp_clickhouse.endpoints import EndpointPool
+
+
+ADDRESSES = [("ch-1", 8123), ("ch-2", 8123), ("ch-3", 8123)]
+
+
+class _FakeClient:
+    pass
+
+
+def test_round_robin_rotates_first_candidate():
+    """Test that round robin starts each request at the next endpoint."""
+    pool = EndpointPool(ADDRESSES, "round_robin")
+
+    first_hosts = [pool.candidates()[0].host for _ in range(6)]
+
+    assert first_hosts == ["ch-1", "ch-2", "ch-3", "ch-1", "ch-2", "ch-3"]
+
+
+def test_least_in_flight_prefers_idle_endpoint():
+    """Test that least_in_flight picks the endpoint with the fewest live clients."""
+    pool = EndpointPool(ADDRESSES, "least_in_flight")
+    busy = [_FakeClient() for _ in range(3)]
+    pool.track(busy[0], pool.endpoints[0])
+    pool.track(busy[1], pool.endpoints[0])
+    pool.track(busy[2], pool.endpoints[2])
+
+    assert pool.candidates()[0].host == "ch-2"
+
+
+def test_in_flight_released_when_client_is_collected():
+    """Test that a tracked client stops counting once it is garbage collected."""
+    pool = EndpointPool(ADDRESSES[:1])
+    client = _FakeClient()
+    pool.track(client, pool.endpoints[0])
+    assert pool.endpoints[0].in_flight == 1
+
+    del client
+    gc.collect()
+
+    assert pool.endpoints[0].in_flight == 0
+
+
+def test_latency_weighted_favours_fast_endpoint():
+    """Test that latency_weighted orders the fastest endpoint first most of the time."""
+    pool = EndpointPool(ADDRESSES[:2], "latency_weighted")
+    pool.record_success(pool.endpoints[0], 0.001)
+    pool.record_success(pool.endpoints[1], 0.100)
+
+    firsts = [pool.candidates()[0].host for _ in range(200)]
+
+    assert firsts.count("ch-1") > 150
+
+
+def test_failed_endpoint_is_ejected_then_reprobed():
+    """Test that a failing endpoint moves to the back and returns after the cool-down."""
+    pool = EndpointPool(ADDRESSES[:2], "round_robin", eject_seconds=0.05)
+    pool.record_failure(pool.endpoints[0])
+
+    for _ in range(4):
+        assert pool.candidates()[0].host == "ch-2"
+    assert pool.candidates()[-1].host == "ch-1"
+    assert pool.snapshot()[0]["healthy"] is False
+
+    time.sleep(0.06)
+
+    assert "ch-1" in [pool.candidates()[0].host for _ in range(2)]
+    pool.record_success(pool.endpoints[0], 0.01)
+    assert pool.endpoints[0].consecutive_failures == 0
+    assert pool.snapshot()[0]["healthy"] is True
+
+
+def test_all_endpoints_ejected_still_returns_candidates():
+    """Test that requests still have endpoints to try when every endpoint is ejected."""
+    pool = EndpointPool(ADDRESSES[:2], eject_seconds=60)
+    pool.record_failure(pool.endpoints[1])
+    pool.record_failure(pool.endpoints[0])
+
+    assert [e.host for e in pool.candidates()] == ["ch-2", "ch-1"]
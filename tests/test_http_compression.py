@@ -0,0 +1,129 @@
+import gzip
+import json
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from mcp_clickhouse import http_compression
+from mcp_clickhouse.http_compression import CompressionMiddleware
+from mcp_clickhouse.main import create_app
+
+LARGE_BODY = "SELECT name, engine, create_table_query FROM system.tables\n" * 200
+
+
+def _client(minimum_size: int = 1024) -> TestClient:
+    async def large(request):
+        return PlainTextResponse(LARGE_BODY)
+
+    async def small(request):
+        return PlainTextResponse("ok")
+
+    async def events(request):
+        async def stream():
+            for i in range(3):
+                yield f"event: message\ndata: {LARGE_BODY[:100]} {i}\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    app = Starlette(
+        routes=[Route("/large", large), Route("/small", small), Route("/events", events)]
+    )
+    return TestClient(CompressionMiddleware(app, minimum_size=minimum_size))
+
+
+def _raw(client: TestClient, path: str, accept_encoding: str):
+    # Read the undecoded body so the test sees exactly what went over the wire
+    with client.stream("GET", path, headers={"Accept-Encoding": accept_encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+def test_gzip_when_zstd_not_accepted():
+    """Test that large responses are gzip-compressed for gzip-only clients."""
+    response, body = _raw(_client(), "/large", "gzip")
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(body) < len(LARGE_BODY) / 10
+    assert gzip.decompress(body).decode() == LARGE_BODY
+
+
+def test_small_responses_are_not_compressed():
+    """Test that responses below the size threshold are sent as is."""
+    response, body = _raw(_client(), "/small", "gzip, zstd")
+
+    assert "content-encoding" not in response.headers
+    assert body == b"ok"
+
+
+def test_no_compression_without_accept_encoding():
+    """Test that clients that do not accept compression get plain responses."""
+    response, body = _raw(_client(), "/large", "identity")
+
+    assert "content-encoding" not in response.headers
+    assert body.decode() == LARGE_BODY
+
+
+def test_refused_encoding_is_not_used():
+    """Test that an encoding refused with q=0 is not chosen."""
+    response, body = _raw(_client(), "/large", "gzip;q=0, identity")
+
+    assert "content-encoding" not in response.headers
+
+
+def test_event_streams_are_compressed():
+    """Test that streamed tool results are compressed as well."""
+    response, body = _raw(_client(), "/events", "gzip")
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(body).decode().count("event: message") == 3
+
+
+def test_zstd_preferred_when_available():
+    """Test that zstd is chosen over gzip when installed and accepted."""
+    zstandard = pytest.importorskip("zstandard")
+
+    response, body = _raw(_client(), "/large", "gzip, deflate, zstd")
+
+    assert response.headers["content-encoding"] == "zstd"
+    decompressed = zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    assert decompressed.decode() == LARGE_BODY
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "zstd"])
+def test_mcp_app_compresses_tool_lists(encoding: str):
+    """Test that the MCP HTTP app answers compressed requests with compressed event streams."""
+    if encoding == "zstd":
+        zstandard = pytest.importorskip("zstandard")
+        decompress = zstandard.ZstdDecompressor().decompressobj().decompress
+    else:
+        decompress = gzip.decompress
+    request = {"jsonrpc": "2.0", "id": 1, "method": "tools/list", "params": {}}
+    headers = {
+        "Accept": "application/json, text/event-stream",
+        "Accept-Encoding": encoding,
+        "Content-Type": "application/json",
+    }
+
+    with TestClient(create_app()) as client:
+        with client.stream(
+            "POST", "/mcp", content=json.dumps(request), headers=headers
+        ) as response:
+            body = b"".join(response.iter_raw())
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == encoding
+    assert b'"name":"run_select_query"' in decompress(body)
+
+
+def test_middleware_can_be_disabled(monkeypatch: pytest.MonkeyPatch):
+    """Test that CLICKHOUSE_MCP_HTTP_COMPRESSION=false removes the middleware."""
+    monkeypatch.setenv("CLICKHOUSE_MCP_HTTP_COMPRESSION", "false")
+    assert http_compression.get_http_middleware() is None
+
+    monkeypatch.setenv("CLICKHOUSE_MCP_HTTP_COMPRESSION", "true")
+    monkeypatch.setenv("CLICKHOUSE_MCP_HTTP_COMPRESSION_MIN_SIZE", "2048")
+    (middleware,) = http_compression.get_http_middleware()
+    assert middleware.cls is CompressionMiddleware
+    assert middleware.kwargs["minimum_size"] == 2048
@@ -0,0 +1,97 @@
+import threading
+import time
+
+import pytest
+
+from mcp_clickhouse.jobs import (
+    JOB_CANCELLED,
+    JOB_FAILED,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    JOB_SUCCEEDED,
+    JobError,
+    JobManager,
+)
+
+
+def wait_until_finished(job, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert job.finished
+
+
+def test_job_lifecycle():
+    """Test that jobs run in the background and keep their result or error."""
+    manager = JobManager(max_running=2)
+
+    job = manager.submit("SELECT 1", lambda job: {"rows": [[1]]})
+    wait_until_finished(job)
+    assert manager.get(job.job_id).status == JOB_SUCCEEDED
+    assert job.result == {"rows": [[1]]}
+
+    def fail(job):
+        raise RuntimeError("Unknown table")
+
+    failed = manager.submit("SELECT * FROM missing", fail)
+    wait_until_finished(failed)
+    assert failed.status == JOB_FAILED
+    assert failed.error == "Unknown table"
+
+    with pytest.raises(JobError, match="Unknown or expired"):
+        manager.get("no-such-job")
+
+
+def test_cancel_queued_and_running_jobs():
+    """Test that queued jobs never start and running jobs are killed."""
+    manager = JobManager(max_running=1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking(job):
+        started.set()
+        release.wait(5)
+        if job.cancel_requested:
+            raise RuntimeError("Query was cancelled")
+        return {}
+
+    running = manager.submit("SELECT sleep(3)", blocking)
+    started.wait(5)
+    queued = manager.submit("SELECT 2", lambda job: {})
+    assert running.status == JOB_RUNNING
+    assert queued.status == JOB_QUEUED
+
+    assert manager.cancel(queued.job_id, lambda job: None).status == JOB_CANCELLED
+
+    killed = []
+    manager.cancel(running.job_id, lambda job: (killed.append(job.job_id), release.set()))
+    wait_until_finished(running)
+    assert killed == [running.job_id]
+    assert running.status == JOB_CANCELLED
+    assert running.error is None
+
+
+def test_retention_and_job_limit():
+    """Test that finished jobs expire and make room for new ones."""
+    manager = JobManager(max_running=1, retention_seconds=3600, max_jobs=2)
+    release = threading.Event()
+
+    first = manager.submit("SELECT 1", lambda job: {})
+    wait_until_finished(first)
+    blocked = manager.submit("SELECT 2", lambda job: release.wait(5) and {})
+
+    # The oldest finished job is evicted when the limit is reached
+    third = manager.submit("SELECT 3", lambda job: {})
+    with pytest.raises(JobError):
+        manager.get(first.job_id)
+
+    # Only unfinished jobs are left, so nothing can be evicted
+    with pytest.raises(JobError, match="Too many query jobs"):
+        manager.submit("SELECT 4", lambda job: {})
+
+    release.set()
+    wait_until_finished(blocked)
+    wait_until_finished(third)
+    manager.retention_seconds = 0
+    with pytest.raises(JobError):
+        manager.get(third.job_id)
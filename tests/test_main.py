@@ -0,0 +1,79 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from mcp_clickhouse import main as main_module
+from mcp_clickhouse.mcp_env import MCPServerConfig
+
+
+def test_workers_default_to_one(monkeypatch: pytest.MonkeyPatch):
+    """Test that a single worker is used unless configured otherwise."""
+    monkeypatch.delenv("CLICKHOUSE_MCP_WORKERS", raising=False)
+
+    assert MCPServerConfig().workers == 1
+
+
+def test_invalid_worker_count(monkeypatch: pytest.MonkeyPatch):
+    """Test that a worker count below one is rejected."""
+    monkeypatch.setenv("CLICKHOUSE_MCP_WORKERS", "0")
+
+    with pytest.raises(ValueError, match="CLICKHOUSE_MCP_WORKERS"):
+        MCPServerConfig().workers
+
+
+def test_multiple_workers_require_http(monkeypatch: pytest.MonkeyPatch):
+    """Test that SSE cannot be served from several workers."""
+    monkeypatch.setattr(main_module, "get_mcp_config", MCPServerConfig)
+    monkeypatch.setenv("CLICKHOUSE_MCP_SERVER_TRANSPORT", "sse")
+    monkeypatch.setenv("CLICKHOUSE_MCP_WORKERS", "4")
+
+    with pytest.raises(ValueError, match="requires the http transport"):
+        main_module.main()
+
+
+def test_run_workers_shares_page_token_secret(monkeypatch: pytest.MonkeyPatch):
+    """Test that workers get a common page token secret and a worker app factory."""
+    calls = {}
+    monkeypatch.setattr(main_module, "get_mcp_config", MCPServerConfig)
+    # Registers the variable with monkeypatch so the generated secret is removed afterwards
+    monkeypatch.setenv("CLICKHOUSE_MCP_PAGE_TOKEN_SECRET", "")
+    monkeypatch.setattr(
+        main_module.uvicorn, "run", lambda app, **kwargs: calls.update(kwargs, app=app)
+    )
+
+    main_module.run_workers("127.0.0.1", 8000, 4)
+
+    assert MCPServerConfig().page_token_secret
+    assert calls["app"] == "mcp_clickhouse.main:create_app"
+    assert calls["factory"] is True
+    assert calls["workers"] == 4
+    assert main_module.create_app() is not None
+
+
+def test_job_tools_need_a_single_worker():
+    """Test that query job tools are only registered when one worker serves all requests."""
+    script = (
+        "import asyncio, json\n"
+        "from fastmcp import Client\n"
+        "from mcp_clickhouse.mcp_server import mcp\n"
+        "async def names():\n"
+        "    async with Client(mcp) as client:\n"
+        "        return [tool.name for tool in await client.list_tools()]\n"
+        "print(json.dumps(asyncio.run(names())))\n"
+    )
+
+    def tool_names(workers: str) -> list:
+        env = {**os.environ, "CLICKHOUSE_MCP_WORKERS": workers}
+        result = subprocess.run(
+            [sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True
+        )
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert "submit_query" in tool_names("1")
+    multi_worker_tools = tool_names("2")
+    assert "run_select_query" in multi_worker_tools
+    assert "submit_query" not in multi_worker_tools
+    assert "get_query_status" not in multi_worker_tools
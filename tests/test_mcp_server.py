@@ -3,9 +3,24 @@ import pytest_asyncio
 from fastmcp import Client
 from fastmcp.exceptions import ToolError
 import asyncio
-from mcp_clickhouse.mcp_server import mcp, create_clickhouse_client
+from mcp_clickhouse.mcp_server import (
+    mcp,
+    compute_column_stats,
+    create_clickhouse_client,
+    get_caller_query_settings,
+    get_preview_settings,
+    is_partial_result,
+    query_with_retry,
+    run_select_queries,
+)
+from mcp_clickhouse.quotas import QuotaLimits, QuotaTracker
 from dotenv import load_dotenv
 import json
+import threading
+import time
+from types import SimpleNamespace
+from clickhouse_connect.driver.exceptions import OperationalError
+from clickhouse_connect.driver.models import SettingDef
 
 # Load environment variables
 load_dotenv()
@@ -375,3 +390,517 @@ async def test_concurrent_queries(mcp_server, setup_test_database):
             query_result = json.loads(result.content[0].text)
             assert "rows" in query_result
             assert len(query_result["rows"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_describe_database_compact(mcp_server, setup_test_database):
+    """Test the compact one-line-per-table database digest."""
+    test_db, test_table, test_table2 = setup_test_database
+
+    async with Client(mcp_server) as client:
+        result = await client.call_tool(
+            "describe_database_compact", {"database": test_db, "use_cache": False}
+        )
+        response = json.loads(result.content[0].text)
+
+        assert response["database"] == test_db
+        assert response["total_tables"] == 2
+        assert response["omitted_tables"] == 0
+
+        lines = response["schema"].split("\n")
+        assert [line.split(" ")[0] for line in lines] == sorted([test_table, test_table2])
+        table_line = next(line for line in lines if line.startswith(f"{test_table} "))
+        assert "MergeTree ORDER BY id" in table_line
+        assert "rows=4" in table_line
+        assert table_line.endswith("id UInt32, name String, age UInt8, created_at DateTime")
+
+        # A tiny budget keeps the response bounded and reports what was left out
+        result = await client.call_tool(
+            "describe_database_compact", {"database": test_db, "max_bytes": 10}
+        )
+        response = json.loads(result.content[0].text)
+        assert response["schema"] == ""
+        assert response["omitted_tables"] == 2
+
+
+@pytest.mark.asyncio
+async def test_search_schema(mcp_server, setup_test_database):
+    """Test finding tables and columns across databases with search_schema."""
+    test_db, test_table, _ = setup_test_database
+
+    async with Client(mcp_server) as client:
+        result = await client.call_tool(
+            "search_schema", {"query": "created_at", "database": test_db}
+        )
+        response = json.loads(result.content[0].text)
+
+        assert response["total_matches"] >= 1
+        match = response["matches"][0]
+        assert match["kind"] == "column"
+        assert match["table"] == test_table
+        assert match["column"] == "created_at"
+        assert match["column_type"] == "DateTime"
+
+        # Comments are searched by word
+        result = await client.call_tool(
+            "search_schema", {"query": "creation timestamp", "database": test_db}
+        )
+        response = json.loads(result.content[0].text)
+        assert [m["column"] for m in response["matches"]] == ["created_at"]
+
+
+@pytest.mark.asyncio
+async def test_sample_table(mcp_server, setup_test_database):
+    """Test previewing a table with sample_table."""
+    test_db, test_table, _ = setup_test_database
+
+    async with Client(mcp_server) as client:
+        result = await client.call_tool(
+            "sample_table",
+            {"database": test_db, "table": test_table, "columns": ["id", "name"], "rows": 2},
+        )
+        response = json.loads(result.content[0].text)
+
+        # The table is a MergeTree table without a sampling key
+        assert response["method"] == "parts"
+        assert response["columns"] == ["id", "name"]
+        assert len(response["rows"]) == 2
+        assert response["total_rows"] == 4
+
+        with pytest.raises(ToolError) as exc_info:
+            await client.call_tool("sample_table", {"database": test_db, "table": "missing"})
+        assert "does not exist" in str(exc_info.value)
+
+
+@pytest.mark.asyncio
+async def test_column_stats(mcp_server, setup_test_database, monkeypatch):
+    """Test column statistics and their caching until the table changes."""
+    test_db, _, _ = setup_test_database
+    ch_client = create_clickhouse_client()
+    ch_client.command(f"""
+        CREATE TABLE {test_db}.stats_test (id UInt32, name Nullable(String))
+        ENGINE = MergeTree() ORDER BY id
+    """)
+    ch_client.command(
+        f"INSERT INTO {test_db}.stats_test VALUES (1, 'a'), (2, 'a'), (3, 'b'), (4, NULL)"
+    )
+    computed = []
+
+    def counting_compute(client, database, table, columns, *args):
+        computed.append(columns)
+        return compute_column_stats(client, database, table, columns, *args)
+
+    monkeypatch.setattr("mcp_clickhouse.mcp_server.compute_column_stats", counting_compute)
+    args = {"database": test_db, "table": "stats_test", "top_k": 1}
+
+    try:
+        async with Client(mcp_server) as client:
+            result = await client.call_tool("column_stats", args)
+            response = json.loads(result.content[0].text)
+
+            assert response["total_rows"] == 4
+            id_stats, name_stats = response["columns"]
+            assert (id_stats["name"], id_stats["type"]) == ("id", "UInt32")
+            assert (id_stats["min"], id_stats["max"]) == (1, 4)
+            assert id_stats["min_max_source"] == "primary_index"
+            assert name_stats["distinct"] == 2
+            assert name_stats["null_fraction"] == 0.25
+            assert name_stats["top_values"] == ["a"]
+            assert name_stats["exact"] and name_stats["sampled_rows"] == 4
+
+            # Cached until the table's data parts change
+            await client.call_tool("column_stats", {**args, "columns": ["name"]})
+            assert computed == [["id", "name"]]
+
+            ch_client.command(f"INSERT INTO {test_db}.stats_test VALUES (5, 'b')")
+            result = await client.call_tool("column_stats", args)
+            assert json.loads(result.content[0].text)["columns"][0]["max"] == 5
+            assert len(computed) == 2
+
+            with pytest.raises(ToolError) as exc_info:
+                await client.call_tool("column_stats", {**args, "columns": ["missing"]})
+            assert "Unknown columns" in str(exc_info.value)
+    finally:
+        ch_client.command(f"DROP TABLE IF EXISTS {test_db}.stats_test")
+
+
+@pytest.mark.asyncio
+async def test_analyze_query(mcp_server, setup_test_database):
+    """Test reporting primary key pruning and hinting at the sorting key."""
+    test_db, _, _ = setup_test_database
+    ch_client = create_clickhouse_client()
+    ch_client.command(f"""
+        CREATE TABLE {test_db}.pruning_test (id UInt32, name String)
+        ENGINE = MergeTree() ORDER BY id SETTINGS index_granularity = 10
+    """)
+    ch_client.command(
+        f"INSERT INTO {test_db}.pruning_test SELECT number, toString(number) FROM numbers(100)"
+    )
+
+    try:
+        async with Client(mcp_server) as client:
+            result = await client.call_tool(
+                "analyze_query",
+                {
+                    "query": f"SELECT * FROM {test_db}.pruning_test WHERE id = {{id:UInt32}}",
+                    "parameters": {"id": 42},
+                },
+            )
+            (read,) = json.loads(result.content[0].text)["tables"]
+            assert read["table"] == f"{test_db}.pruning_test"
+            assert (read["selected_granules"], read["total_granules"]) == (1, 10)
+            assert read["sorting_key"] == "id"
+            primary_key = next(i for i in read["indexes"] if i["type"] == "PrimaryKey")
+            assert primary_key["keys"] == ["id"]
+            assert "hint" not in read
+
+            result = await client.call_tool(
+                "analyze_query",
+                {"query": f"SELECT count() FROM {test_db}.pruning_test WHERE name = '42'"},
+            )
+            response = json.loads(result.content[0].text)
+            assert (response["selected_granules"], response["total_granules"]) == (10, 10)
+            assert "does not use the primary key" in response["tables"][0]["hint"]
+            assert "starting with id" in response["tables"][0]["hint"]
+    finally:
+        ch_client.command(f"DROP TABLE IF EXISTS {test_db}.pruning_test")
+
+
+@pytest.mark.asyncio
+async def test_run_select_query_preview(mcp_server, monkeypatch):
+    """Test that preview mode stops reading at the configured limit."""
+    monkeypatch.setenv("CLICKHOUSE_MCP_ESCALATE_READONLY", "true")
+    monkeypatch.setenv("CLICKHOUSE_MCP_PREVIEW_MAX_ROWS_TO_READ", "100000")
+
+    async with Client(mcp_server) as client:
+        query = "SELECT count() AS total FROM numbers(10000000)"
+        result = await client.call_tool("run_select_query", {"query": query, "mode": "preview"})
+        response = json.loads(result.content[0].text)
+
+        assert response["columns"] == ["total"]
+        assert response["rows"][0][0] < 10000000
+        assert "partial" in response
+        assert "read_rows" in response and "read_bytes" in response
+
+        with pytest.raises(ToolError) as exc_info:
+            await client.call_tool("run_select_query", {"query": query, "mode": "fast"})
+        assert "Invalid mode" in str(exc_info.value)
+
+
+def test_caller_queries_only_escalate_for_table_functions(monkeypatch):
+    """Test that caller queries keep readonly=1 unless they call allowed table functions."""
+    client = SimpleNamespace(server_settings={"readonly": SettingDef("readonly", "0", 0)})
+    query = "SELECT count() FROM numbers(10)"
+
+    settings = get_caller_query_settings(client, "SELECT 1", {"max_threads": 2})
+    assert settings == {"readonly": "1", "max_threads": 2}
+    assert get_caller_query_settings(client, query)["readonly"] == "1"
+
+    monkeypatch.setenv("CLICKHOUSE_MCP_ESCALATE_READONLY", "true")
+    assert get_caller_query_settings(client, "SELECT 1")["readonly"] == "1"
+    assert get_caller_query_settings(client, query)["readonly"] == "2"
+    with pytest.raises(ToolError, match="Table functions url cannot be used"):
+        get_caller_query_settings(client, "SELECT * FROM url('http://example.com/a.csv')")
+
+
+def test_preview_limits_cannot_be_dropped():
+    """Test that preview fails instead of running unbounded when its limits cannot apply."""
+    pinned = SimpleNamespace(server_settings={"readonly": SettingDef("readonly", "1", 1)})
+
+    with pytest.raises(ToolError, match="pinned to readonly=1"):
+        get_caller_query_settings(pinned, "SELECT 1", get_preview_settings())
+
+    unpinned = SimpleNamespace(server_settings={"readonly": SettingDef("readonly", "0", 0)})
+    with pytest.raises(ToolError, match="SETTINGS clause"):
+        get_caller_query_settings(
+            unpinned,
+            "SELECT count() FROM numbers(10) SETTINGS max_rows_to_read = 0",
+            get_preview_settings(),
+        )
+    settings = get_caller_query_settings(unpinned, "SELECT 1", get_preview_settings())
+    assert settings["readonly"] == "1"
+    assert settings["read_overflow_mode"] == "break"
+
+
+def test_query_with_id_is_not_retried(monkeypatch):
+    """Test that a query sent with a query_id is not resent after a transient error."""
+    monkeypatch.setenv("CLICKHOUSE_RETRY_BACKOFF", "0")
+    sent = []
+
+    class DroppingClient:
+        def query(self, query, parameters=None, settings=None):
+            sent.append((settings or {}).get("query_id"))
+            raise OperationalError("connection reset")
+
+    monkeypatch.setattr(
+        "mcp_clickhouse.mcp_server.create_clickhouse_client", lambda *args: DroppingClient()
+    )
+    with pytest.raises(OperationalError):
+        query_with_retry(DroppingClient(), "SELECT 1", settings={"query_id": "q1"})
+    assert sent == ["q1"]
+
+    sent.clear()
+    with pytest.raises(OperationalError):
+        query_with_retry(DroppingClient(), "SELECT 1", settings={"readonly": "1"})
+    assert len(sent) > 1
+
+
+def test_is_partial_result():
+    """Test detecting from the query summary that a read limit was hit."""
+    settings = {"max_rows_to_read": 1000, "max_bytes_to_read": 10000, "read_overflow_mode": "break"}
+
+    assert is_partial_result({"read_rows": "1024", "read_bytes": "8192"}, settings)
+    assert is_partial_result({"read_rows": "10", "read_bytes": "20000"}, settings)
+    assert not is_partial_result({"read_rows": "999", "read_bytes": "7992"}, settings)
+    assert is_partial_result(
+        {"read_rows": "1", "read_bytes": "8", "elapsed_ns": "3000000000"},
+        {"max_execution_time": 2.5, "timeout_overflow_mode": "break"},
+    )
+
+
+@pytest.mark.asyncio
+async def test_run_select_queries(mcp_server, setup_test_database):
+    """Test running several queries in one call with per-query errors."""
+    test_db, test_table, test_table2 = setup_test_database
+
+    async with Client(mcp_server) as client:
+        queries = [
+            f"SELECT count() AS total FROM {test_db}.{test_table}",
+            f"SELECT * FROM {test_db}.missing_table",
+            f"SELECT min(event_id) AS first FROM {test_db}.{test_table2}",
+        ]
+        result = await client.call_tool("run_select_queries", {"queries": queries})
+        response = json.loads(result.content[0].text)
+
+        assert response["failed"] == 1
+        first, missing, earliest = response["results"]
+        assert first["status"] == "success" and first["rows"] == [[4]]
+        assert missing["status"] == "error" and "Query execution failed" in missing["error"]
+        assert earliest["status"] == "success" and earliest["rows"] == [[1001]]
+
+        with pytest.raises(ToolError) as exc_info:
+            await client.call_tool("run_select_queries", {"queries": ["SELECT 1"] * 11})
+        assert "At most 10 queries" in str(exc_info.value)
+
+
+def test_run_select_queries_kills_timed_out_queries(monkeypatch):
+    """Test that queries still running at the batch deadline are killed on the server."""
+    monkeypatch.setenv("CLICKHOUSE_MCP_QUERY_TIMEOUT", "1")
+    killed = []
+    released = threading.Event()
+
+    def fake_execute(query, mode, query_id=None, query_settings=None, on_usage=None):
+        if query == "SELECT slow":
+            released.wait(5)
+            raise ToolError("Query execution failed: killed")
+        return {"columns": ["x"], "rows": [[1]]}
+
+    def fake_kill(query_id):
+        killed.append(query_id)
+        released.set()
+
+    monkeypatch.setattr("mcp_clickhouse.mcp_server.execute_query", fake_execute)
+    monkeypatch.setattr("mcp_clickhouse.mcp_server.kill_running_query", fake_kill)
+
+    response = run_select_queries(["SELECT 1", "SELECT slow"])
+    assert response["failed"] == 1
+    assert response["results"][0]["rows"] == [[1]]
+    assert "timed out" in response["results"][1]["error"]
+    assert len(killed) == 1 and killed[0]
+
+
+@pytest.mark.asyncio
+async def test_query_jobs(mcp_server, setup_test_database):
+    """Test running a query as a background job and paging through its result."""
+    test_db, test_table, _ = setup_test_database
+
+    async with Client(mcp_server) as client:
+        query = f"SELECT id, name FROM {test_db}.{test_table} ORDER BY id"
+        result = await client.call_tool("submit_query", {"query": query})
+        job_id = json.loads(result.content[0].text)["job_id"]
+
+        for _ in range(100):
+            result = await client.call_tool("get_query_status", {"job_id": job_id})
+            status = json.loads(result.content[0].text)
+            if status["status"] not in ("queued", "running"):
+                break
+            await asyncio.sleep(0.05)
+        assert status["status"] == "succeeded"
+        assert status["result_rows"] == 4
+
+        result = await client.call_tool(
+            "fetch_query_result", {"job_id": job_id, "offset": 1, "limit": 2}
+        )
+        page = json.loads(result.content[0].text)
+        assert page["columns"] == ["id", "name"]
+        assert page["rows"] == [[2, "Bob"], [3, "Charlie"]]
+        assert page["total_rows"] == 4
+        assert page["next_offset"] == 3
+
+        result = await client.call_tool("cancel_query", {"job_id": job_id})
+        assert json.loads(result.content[0].text)["status"] == "succeeded"
+
+        with pytest.raises(ToolError) as exc_info:
+            await client.call_tool("get_query_status", {"job_id": "unknown"})
+        assert "Unknown or expired query job" in str(exc_info.value)
+
+
+@pytest.mark.asyncio
+async def test_query_job_result_cap(mcp_server, monkeypatch):
+    """Test that query job results are cut client-side and flagged only when cut."""
+    monkeypatch.setenv("CLICKHOUSE_MCP_JOB_MAX_RESULT_ROWS", "5")
+
+    async with Client(mcp_server) as client:
+        for numbers, truncated in ((5, False), (6, True), (100000, True)):
+            result = await client.call_tool(
+                "submit_query", {"query": f"SELECT number FROM system.numbers LIMIT {numbers}"}
+            )
+            job_id = json.loads(result.content[0].text)["job_id"]
+            for _ in range(100):
+                result = await client.call_tool("get_query_status", {"job_id": job_id})
+                status = json.loads(result.content[0].text)
+                if status["status"] not in ("queued", "running"):
+                    break
+                await asyncio.sleep(0.05)
+            assert status["status"] == "succeeded"
+            assert status["result_rows"] == 5
+            assert status["truncated"] is truncated
+
+
+@pytest.mark.asyncio
+async def test_run_select_query_progress(mcp_server, monkeypatch):
+    """Test that query progress is forwarded to clients that ask for it."""
+    monkeypatch.setenv("CLICKHOUSE_MCP_PROGRESS_INTERVAL", "0.05")
+    snapshots = iter([None, (100, 1000), (100, 1000), (600, 1000)])
+
+    def slow_query(
+        query, mode, settings=None, profile=None, parameters=None, query_id=None, on_usage=None
+    ):
+        time.sleep(0.5)
+        return {"columns": ["total"], "rows": [[1]]}
+
+    monkeypatch.setattr("mcp_clickhouse.mcp_server.run_select_query", slow_query)
+    monkeypatch.setattr(
+        "mcp_clickhouse.mcp_server.read_query_progress",
+        lambda query_id: next(snapshots, (600, 1000)),
+    )
+
+    notifications = []
+
+    async def on_progress(progress, total, message):
+        notifications.append((progress, total))
+
+    async with Client(mcp_server) as client:
+        result = await client.call_tool(
+            "run_select_query", {"query": "SELECT 1"}, progress_handler=on_progress
+        )
+
+    assert json.loads(result.content[0].text)["rows"] == [[1]]
+    # Unchanged progress is not reported twice
+    assert notifications == [(100, 1000), (600, 1000)]
+
+
+@pytest.mark.asyncio
+async def test_run_select_query_settings(mcp_server, setup_test_database):
+    """Test running a query with a settings profile and allowed settings only."""
+    test_db, test_table, _ = setup_test_database
+
+    async with Client(mcp_server) as client:
+        query = f"SELECT getSetting('max_threads') AS threads FROM {test_db}.{test_table} LIMIT 1"
+        result = await client.call_tool(
+            "run_select_query", {"query": query, "profile": "interactive"}
+        )
+        assert json.loads(result.content[0].text)["rows"] == [[2]]
+
+        result = await client.call_tool(
+            "run_select_query",
+            {"query": query, "profile": "interactive", "settings": {"max_threads": 3}},
+        )
+        assert json.loads(result.content[0].text)["rows"] == [[3]]
+
+        with pytest.raises(ToolError) as exc_info:
+            await client.call_tool(
+                "run_select_query", {"query": query, "settings": {"max_threads": 512}}
+            )
+        assert "outside the allowed range" in str(exc_info.value)
+
+        for arguments in ({}, {"settings": {"max_threads": 3}}):
+            with pytest.raises(ToolError) as exc_info:
+                await client.call_tool(
+                    "run_select_query",
+                    {"query": "SELECT 1 SETTINGS max_threads=1000", **arguments},
+                )
+            assert "cannot have a SETTINGS clause" in str(exc_info.value)
+
+        result = await client.call_tool(
+            "run_select_query",
+            {"query": "SELECT name, value FROM system.settings WHERE name = 'max_threads'"},
+        )
+        assert json.loads(result.content[0].text)["rows"][0][0] == "max_threads"
+
+
+@pytest.mark.asyncio
+async def test_run_select_query_parameters(mcp_server, setup_test_database):
+    """Test running a query with parameters bound by the server."""
+    test_db, test_table, _ = setup_test_database
+
+    async with Client(mcp_server) as client:
+        query = (
+            f"SELECT name FROM {test_db}.{test_table} "
+            "WHERE id = {id:UInt32} OR name IN {names:Array(String)} ORDER BY id"
+        )
+        result = await client.call_tool(
+            "run_select_query",
+            {"query": query, "parameters": {"id": 2, "names": ["Diana", "x' OR 1=1 --"]}},
+        )
+        assert json.loads(result.content[0].text)["rows"] == [["Bob"], ["Diana"]]
+
+        with pytest.raises(ToolError) as exc_info:
+            await client.call_tool(
+                "run_select_query",
+                {"query": f"SELECT name FROM {test_db}.{test_table}", "parameters": {"id": 2}},
+            )
+        assert "placeholder for parameters id" in str(exc_info.value)
+
+
+@pytest.mark.asyncio
+async def test_session_quota(mcp_server, setup_test_database, monkeypatch):
+    """Test that a session over its quota of query time is rejected."""
+    test_db, test_table, _ = setup_test_database
+    tracker = QuotaTracker(QuotaLimits(max_elapsed_seconds=1e-9), window_seconds=60)
+    monkeypatch.setattr("mcp_clickhouse.mcp_server.get_quota_tracker", lambda: tracker)
+    # The in-memory transport has no stable session id, so pin the caller
+    monkeypatch.setattr("mcp_clickhouse.mcp_server.quota_callers", lambda ctx: ["session test"])
+
+    async with Client(mcp_server) as client:
+        query = f"SELECT count() FROM {test_db}.{test_table} WHERE age > 0"
+        await client.call_tool("run_select_query", {"query": query})
+
+        with pytest.raises(ToolError) as exc_info:
+            await client.call_tool("run_select_query", {"query": query})
+        assert "Quota exceeded for session test" in str(exc_info.value)
+
+        for tool, arguments in (
+            ("sample_table", {"database": test_db, "table": test_table}),
+            ("column_stats", {"database": test_db, "table": test_table}),
+            ("submit_query", {"query": query}),
+        ):
+            with pytest.raises(ToolError) as exc_info:
+                await client.call_tool(tool, arguments)
+            assert "Quota exceeded for session test" in str(exc_info.value)
+
+
+@pytest.mark.asyncio
+async def test_quota_charges_sample_table(mcp_server, setup_test_database, monkeypatch):
+    """Test that table samples are charged to the caller's quota."""
+    test_db, test_table, _ = setup_test_database
+    tracker = QuotaTracker(QuotaLimits(max_elapsed_seconds=1e-9), window_seconds=60)
+    monkeypatch.setattr("mcp_clickhouse.mcp_server.get_quota_tracker", lambda: tracker)
+    monkeypatch.setattr("mcp_clickhouse.mcp_server.quota_callers", lambda ctx: ["session test"])
+
+    async with Client(mcp_server) as client:
+        await client.call_tool("sample_table", {"database": test_db, "table": test_table})
+
+        with pytest.raises(ToolError) as exc_info:
+            await client.call_tool("run_select_query", {"query": "SELECT 1"})
+        assert "Quota exceeded for session test" in str(exc_info.value)
@@ -1,16 +1,17 @@
 import unittest
 
 from dotenv import load_dotenv
+from fastmcp.exceptions import ToolError
 
 from mcp_clickhouse import (
+    count_tables,
     create_clickhouse_client,
     create_page_token,
-    fetch_table_names_from_system,
     get_paginated_table_data,
     list_tables,
-    table_pagination_cache,
 )
 from mcp_clickhouse.mcp_server import Table
+from mcp_clickhouse.page_tokens import decode_page_token, encode_page_token
 
 load_dotenv()
 
@@ -74,6 +75,15 @@ class TestPagination(unittest.TestCase):
         result4 = list_tables(self.test_db, page_token=page_token, page_size=3)
         self.assertEqual(len(result4["tables"]), 1)
         self.assertIsNone(result4["next_page_token"])
+        self.assertEqual(result4["total_tables"], 10)
+
+        all_names = [
+            table["name"]
+            for page in (result, result2, result3, result4)
+            for table in page["tables"]
+        ]
+        self.assertEqual(all_names, sorted(all_names))
+        self.assertEqual(len(set(all_names)), 10)
 
     def test_invalid_page_token(self):
         """Test that list_tables handles invalid page tokens gracefully."""
@@ -122,35 +132,58 @@ class TestPagination(unittest.TestCase):
     def test_page_token_expiry(self):
         """Test that page tokens expire after their TTL."""
         result = list_tables(self.test_db, page_size=3)
-        page_token = result["next_page_token"]
+        state = decode_page_token(result["next_page_token"])
+        self.assertIsNotNone(state)
 
-        self.assertIn(page_token, table_pagination_cache)
-
-        # For this test manually remove the token from the cache to simulate expiration
-        # since we can't easily wait for the actual TTL (1 hour) to expire
-        if page_token in table_pagination_cache:
-            del table_pagination_cache[page_token]
+        # Re-issue the same state with a TTL that has already elapsed
+        expired_token = encode_page_token(state, ttl=-1)
+        self.assertIsNone(decode_page_token(expired_token))
 
         # Try to use the expired token
-        result2 = list_tables(self.test_db, page_token=page_token, page_size=3)
+        result2 = list_tables(self.test_db, page_token=expired_token, page_size=3)
         # Should fall back to first page
         self.assertEqual(len(result2["tables"]), 3)
+        self.assertEqual(result2["tables"], result["tables"])
         self.assertIsNotNone(result2["next_page_token"])
 
+    def test_tampered_page_token(self):
+        """Test that a page token with a modified payload is rejected."""
+        result = list_tables(self.test_db, page_size=3)
+        payload, signature = result["next_page_token"].split(".")
+        forged = encode_page_token({"last_name": "zzz"}).split(".")[0]
+
+        self.assertIsNone(decode_page_token(f"{forged}.{signature}"))
+        self.assertIsNotNone(decode_page_token(f"{payload}.{signature}"))
+
+        result2 = list_tables(self.test_db, page_token=f"{forged}.{signature}", page_size=3)
+        self.assertEqual(result2["tables"], result["tables"])
+
+    def test_page_token_is_reusable(self):
+        """Test that a stateless page token can be replayed and yields the same page."""
+        result = list_tables(self.test_db, page_size=4)
+        page_token = result["next_page_token"]
+
+        result2 = list_tables(self.test_db, page_token=page_token, page_size=4)
+        result3 = list_tables(self.test_db, page_token=page_token, page_size=4)
+
+        self.assertEqual(
+            [t["name"] for t in result2["tables"]], [t["name"] for t in result3["tables"]]
+        )
+
     def test_helper_functions(self):
         """Test the individual helper functions used for pagination."""
         client = create_clickhouse_client()
 
-        table_names = fetch_table_names_from_system(client, self.test_db)
-        self.assertEqual(len(table_names), 10)
-        for i in range(1, 11):
-            self.assertIn(f"test_table_{i}", table_names)
+        table_names = sorted(f"test_table_{i}" for i in range(1, 11))
+
+        self.assertEqual(count_tables(client, self.test_db), 10)
+        self.assertEqual(count_tables(client, self.test_db, like="test_table_1%"), 2)
 
-        tables, end_idx, has_more = get_paginated_table_data(
-            client, self.test_db, table_names, 0, 3
+        tables, last_name, has_more = get_paginated_table_data(
+            client, self.test_db, None, None, None, 3
         )
         self.assertEqual(len(tables), 3)
-        self.assertEqual(end_idx, 3)
+        self.assertEqual(last_name, table_names[2])
         self.assertTrue(has_more)
 
         for table in tables:
@@ -158,13 +191,19 @@ class TestPagination(unittest.TestCase):
             self.assertEqual(table.database, self.test_db)
             self.assertIsInstance(table.columns, list)
 
-        token = create_page_token(self.test_db, None, None, table_names, 3, True)
-        self.assertIn(token, table_pagination_cache)
-        cached_state = table_pagination_cache[token]
-        self.assertEqual(cached_state["database"], self.test_db)
-        self.assertEqual(cached_state["start_idx"], 3)
-        self.assertEqual(cached_state["table_names"], table_names)
-        self.assertEqual(cached_state["include_detailed_columns"], True)
+        tables, last_name, has_more = get_paginated_table_data(
+            client, self.test_db, None, None, table_names[8], 3
+        )
+        self.assertEqual([t.name for t in tables], table_names[9:])
+        self.assertEqual(last_name, table_names[9])
+        self.assertFalse(has_more)
+
+        token = create_page_token(self.test_db, None, None, table_names[2], True)
+        token_state = decode_page_token(token)
+        self.assertEqual(token_state["database"], self.test_db)
+        self.assertEqual(token_state["last_name"], table_names[2])
+        self.assertNotIn("table_names", token_state)
+        self.assertEqual(token_state["include_detailed_columns"], True)
 
     def test_filters_with_pagination(self):
         """Test pagination with LIKE and NOT LIKE filters."""
@@ -216,6 +255,78 @@ class TestPagination(unittest.TestCase):
             self.assertIsInstance(table["create_table_query"], str)
             self.assertGreater(len(table["create_table_query"]), 0)
 
+    def test_field_projection(self):
+        """Test that the fields parameter limits the table fields returned."""
+        result = list_tables(self.test_db, page_size=3, fields="minimal")
+        for table in result["tables"]:
+            self.assertEqual(set(table), {"database", "name", "engine", "comment", "columns"})
+            self.assertEqual(table["engine"], "MergeTree")
+
+        result = list_tables(self.test_db, page_size=3, fields="stats")
+        for table in result["tables"]:
+            self.assertIn("total_rows", table)
+            self.assertNotIn("create_table_query", table)
+            self.assertNotIn("engine_full", table)
+
+        result = list_tables(
+            self.test_db, page_size=3, fields=["total_rows"], include_detailed_columns=False
+        )
+        self.assertEqual(set(result["tables"][0]), {"database", "name", "total_rows", "columns"})
+
+        # Paging continues with the same projection
+        result2 = list_tables(
+            self.test_db,
+            page_token=result["next_page_token"],
+            page_size=3,
+            fields=["total_rows"],
+            include_detailed_columns=False,
+        )
+        self.assertEqual(result2["tables"][0]["name"], "test_table_3")
+        self.assertNotIn("engine", result2["tables"][0])
+
+        with self.assertRaises(ToolError):
+            list_tables(self.test_db, fields=["no_such_field"])
+        with self.assertRaises(ToolError):
+            list_tables(self.test_db, fields="tiny")
+
+    def test_multiple_databases(self):
+        """Test listing tables of several databases in one paginated result."""
+        other_db = f"{self.test_db}_other"
+        self.client.command(f"CREATE DATABASE IF NOT EXISTS {other_db}")
+        self.addCleanup(self.client.command, f"DROP DATABASE IF EXISTS {other_db}")
+        for name in ["alpha", "beta"]:
+            self.client.command(
+                f"CREATE TABLE IF NOT EXISTS {other_db}.{name} (id UInt32) "
+                "ENGINE = MergeTree() ORDER BY id"
+            )
+
+        for kwargs in [
+            {"database": [self.test_db, other_db]},
+            {"database_like": f"{self.test_db}%"},
+        ]:
+            seen = []
+            page_token = None
+            while True:
+                result = list_tables(page_token=page_token, page_size=5, **kwargs)
+                self.assertEqual(result["total_tables"], 12)
+                for table in result["tables"]:
+                    self.assertGreater(len(table["columns"]), 0)
+                    self.assertEqual(table["columns"][0]["table"], table["name"])
+                seen.extend((t["database"], t["name"]) for t in result["tables"])
+                page_token = result["next_page_token"]
+                if page_token is None:
+                    break
+
+            self.assertEqual(len(seen), 12)
+            self.assertEqual(seen, sorted(seen))
+            self.assertEqual(
+                seen[:2], [(self.test_db, "test_table_1"), (self.test_db, "test_table_10")]
+            )
+            self.assertEqual(seen[-2:], [(other_db, "alpha"), (other_db, "beta")])
+
+        with self.assertRaises(ToolError):
+            list_tables()
+
     def test_metadata_trimming_with_pagination(self):
         """Test that metadata trimming works across multiple pages."""
         result1 = list_tables(self.test_db, page_size=3, include_detailed_columns=False)
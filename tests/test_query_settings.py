@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from mcp_clickhouse.query_settings import (
+    DEFAULT_PROFILES,
+    has_settings_clause,
+    parse_allowlist,
+    parse_profiles,
+    resolve_query_settings,
+    table_functions,
+)
+
+
+def test_default_allowlist_bounds():
+    """Test that settings are checked against the default allowlist."""
+    assert resolve_query_settings({"max_threads": 4, "use_query_cache": True}) == {
+        "max_threads": 4,
+        "use_query_cache": 1,
+    }
+    with pytest.raises(ValueError, match="outside the allowed range"):
+        resolve_query_settings({"max_threads": 1000})
+    with pytest.raises(ValueError, match="must be a number"):
+        resolve_query_settings({"max_threads": "auto"})
+    with pytest.raises(ValueError, match="not allowed"):
+        resolve_query_settings({"max_bytes_to_read": 0})
+    with pytest.raises(ValueError, match="controlled by the server"):
+        resolve_query_settings({"readonly": 0})
+
+
+def test_profiles_and_overrides():
+    """Test that caller settings override the selected profile."""
+    resolved = resolve_query_settings({"max_threads": 1}, profile="interactive")
+
+    assert resolved == {**DEFAULT_PROFILES["interactive"], "max_threads": 1}
+    with pytest.raises(ValueError, match="Unknown settings profile 'tiny'"):
+        resolve_query_settings(profile="tiny")
+
+
+def test_configured_allowlist_and_profiles(monkeypatch):
+    """Test operator-defined allowlists and profiles."""
+    monkeypatch.setenv(
+        "CLICKHOUSE_MCP_QUERY_SETTINGS_ALLOWLIST",
+        json.dumps({"join_algorithm": {"values": ["hash", "grace_hash"]}}),
+    )
+    monkeypatch.setenv("CLICKHOUSE_MCP_QUERY_PROFILES", json.dumps({"batch": {"max_threads": 32}}))
+
+    assert resolve_query_settings({"join_algorithm": "grace_hash"}, profile="batch") == {
+        "max_threads": 32,
+        "join_algorithm": "grace_hash",
+    }
+    with pytest.raises(ValueError, match="Allowed values"):
+        resolve_query_settings({"join_algorithm": "full_sorting_merge"})
+    with pytest.raises(ValueError, match="not allowed"):
+        resolve_query_settings({"max_threads": 2})
+
+    with pytest.raises(ValueError, match="controlled by the server"):
+        parse_allowlist('{"readonly": {"values": [0]}}')
+    with pytest.raises(ValueError, match="controlled by the server"):
+        parse_profiles('{"admin": {"readonly": 0}}')
+
+
+def test_settings_clause_detection():
+    """Test that SETTINGS clauses are found in code but not in literals or comments."""
+    assert has_settings_clause("SELECT 1 SETTINGS max_threads=1000")
+    assert has_settings_clause("SELECT 1\n-- trailing\nsettings max_threads = 1000")
+    assert not has_settings_clause("SELECT 'SETTINGS max_threads=1000'")
+    assert not has_settings_clause("SELECT 1 -- SETTINGS max_threads=1000")
+    assert not has_settings_clause("SELECT `settings` FROM t /* SETTINGS */")
+    # Tables and columns named settings are not clauses
+    assert not has_settings_clause("SELECT name, value FROM system.settings WHERE changed")
+    assert not has_settings_clause("SELECT Settings FROM system.query_log")
+    assert not has_settings_clause("SELECT Settings['max_threads'] FROM system.query_log")
+    assert not has_settings_clause("SELECT * FROM t JOIN settings s ON s.name = t.name")
+
+
+def test_table_function_detection():
+    """Test that table functions are found where a query reads from them."""
+    assert table_functions("SELECT count() FROM numbers(10)") == ["numbers"]
+    assert table_functions("SELECT * FROM t JOIN url('http://x/a.csv') u ON 1") == ["url"]
+    assert table_functions("SELECT toDate(x) FROM t WHERE x IN (SELECT 1)") == []
+    assert table_functions("SELECT 'FROM numbers(10)' FROM t") == []
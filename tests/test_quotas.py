@@ -0,0 +1,41 @@
+import time
+
+import pytest
+
+from mcp_clickhouse.quotas import QuotaExceededError, QuotaLimits, QuotaTracker, Usage
+
+
+def test_usage_from_summary():
+    """Test reading usage from a query summary, with the measured time as fallback."""
+    summary = {"read_rows": "1000", "read_bytes": "8000", "elapsed_ns": "2500000000"}
+    assert Usage.from_summary(summary, 9.0) == Usage(1000, 8000, 2.5)
+    assert Usage.from_summary({"read_rows": "10"}, 0.25) == Usage(10, 0, 0.25)
+
+
+def test_callers_over_quota_are_rejected():
+    """Test that usage is counted per caller and checked against the limits."""
+    tracker = QuotaTracker(QuotaLimits(max_read_rows=1000), window_seconds=60)
+
+    tracker.record("session a", Usage(read_rows=600))
+    tracker.check("session a")
+    tracker.record("session a", Usage(read_rows=600))
+
+    with pytest.raises(QuotaExceededError, match="1200 rows read") as exc_info:
+        tracker.check("session a")
+    assert 0 < exc_info.value.retry_after <= 60
+
+    # Other callers have their own budget
+    tracker.check("session b")
+
+
+def test_usage_ages_out_of_window():
+    """Test that only usage within the rolling window counts."""
+    tracker = QuotaTracker(QuotaLimits(max_elapsed_seconds=1), window_seconds=0.05)
+
+    tracker.record("credential x", Usage(elapsed_seconds=5))
+    with pytest.raises(QuotaExceededError):
+        tracker.check("credential x")
+
+    time.sleep(0.06)
+    tracker.check("credential x")
+    assert tracker.usage("credential x") == Usage()
@@ -0,0 +1,112 @@
+import concurrent.futures
+import time
+
+import pytest
+from clickhouse_connect.driver.exceptions import DatabaseError, OperationalError
+
+from mcp_clickhouse.circuit_breaker import CircuitOpenError
+from mcp_clickhouse.retry import LatencyTracker, hedged_call, is_transient_error, retry_call
+
+
+@pytest.fixture(scope="module")
+def executor():
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+    yield pool
+    pool.shutdown(wait=True)
+
+
+def _flaky(failures, error):
+    calls = {"count": 0}
+
+    def fn():
+        calls["count"] += 1
+        if calls["count"] <= failures:
+            raise error
+        return "ok"
+
+    return fn, calls
+
+
+def test_transient_error_classification():
+    """Test which errors are considered worth retrying."""
+    assert is_transient_error(OperationalError("connection reset"))
+    assert is_transient_error(DatabaseError("Code: 209. DB::NetException: Timeout exceeded"))
+    assert is_transient_error(DatabaseError("Code: 202. Too many simultaneous queries"))
+    assert not is_transient_error(DatabaseError("Code: 62. DB::Exception: Syntax error"))
+    assert not is_transient_error(CircuitOpenError("open"))
+
+
+def test_retry_recovers_from_transient_errors():
+    """Test that transient errors are retried until the call succeeds."""
+    fn, calls = _flaky(2, OperationalError("connection reset"))
+    retried = []
+
+    assert (
+        retry_call(fn, retries=2, backoff=0.001, max_backoff=0.01, on_retry=retried.append) == "ok"
+    )
+    assert calls["count"] == 3
+    assert len(retried) == 2
+
+
+def test_retry_gives_up_after_budget():
+    """Test that the last transient error is raised once retries are exhausted."""
+    fn, calls = _flaky(5, OperationalError("connection reset"))
+
+    with pytest.raises(OperationalError):
+        retry_call(fn, retries=1, backoff=0.001, max_backoff=0.01)
+    assert calls["count"] == 2
+
+
+def test_retry_does_not_repeat_query_errors():
+    """Test that errors caused by the query itself are raised immediately."""
+    fn, calls = _flaky(1, DatabaseError("Code: 60. Unknown table"))
+
+    with pytest.raises(DatabaseError):
+        retry_call(fn, retries=3, backoff=0.001, max_backoff=0.01)
+    assert calls["count"] == 1
+
+
+def test_latency_tracker_percentile():
+    """Test that the tracker reports a percentile only with enough samples."""
+    tracker = LatencyTracker(window=100, min_samples=10)
+    for i in range(9):
+        tracker.record(i / 100)
+    assert tracker.percentile(95) is None
+
+    for i in range(9, 100):
+        tracker.record(i / 100)
+    assert tracker.percentile(95) == pytest.approx(0.94)
+
+
+def test_hedged_call_fast_primary_skips_backup(executor):
+    """Test that no hedged request is sent when the primary answers in time."""
+    backup_calls = []
+
+    result = hedged_call(lambda: "primary", lambda: backup_calls.append(1), 0.5, executor)
+
+    assert result == "primary"
+    assert backup_calls == []
+
+
+def test_hedged_call_slow_primary_uses_backup(executor):
+    """Test that a slow primary is raced against a hedged request."""
+
+    def slow_primary():
+        time.sleep(0.5)
+        return "primary"
+
+    started = time.monotonic()
+    result = hedged_call(slow_primary, lambda: "backup", 0.02, executor)
+
+    assert result == "backup"
+    assert time.monotonic() - started < 0.4
+
+
+def test_hedged_call_survives_one_failure(executor):
+    """Test that a failed primary does not fail the call when the backup succeeds."""
+
+    def failing_primary():
+        time.sleep(0.05)
+        raise OperationalError("connection reset")
+
+    assert hedged_call(failing_primary, lambda: "backup", 0.01, executor) == "backup"
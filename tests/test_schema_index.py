@@ -0,0 +1,118 @@
+import time
+from types import SimpleNamespace
+
+from mcp_clickhouse.schema_index import KIND_COLUMN, KIND_TABLE, SchemaIndex
+
+
+class FakeServer:
+    """Serves system.tables and system.columns rows to SchemaIndex.refresh."""
+
+    def __init__(self):
+        self.tables = {}
+        self.queries = []
+
+    def add_table(self, database, table, columns, version=1, comment=""):
+        self.tables[(database, table)] = (version, comment, columns)
+
+    def run_query(self, query):
+        self.queries.append(query)
+        if "FROM system.tables" in query:
+            rows = [
+                (db, t, version, comment) for (db, t), (version, comment, _) in self.tables.items()
+            ]
+        else:
+            rows = [
+                (db, t, name, column_type, comment)
+                for (db, t), (_, _, columns) in self.tables.items()
+                if "IN (" not in query or f"('{db}', '{t}')" in query
+                for name, column_type, comment in columns
+            ]
+        return SimpleNamespace(result_rows=rows)
+
+
+def _server():
+    server = FakeServer()
+    server.add_table(
+        "shop",
+        "orders",
+        [
+            ("order_id", "UInt64", ""),
+            ("buyer_user_id", "UInt64", "Customer who placed the order"),
+            ("created_at", "DateTime", ""),
+        ],
+        comment="One row per checkout",
+    )
+    server.add_table("crm", "users", [("user_id", "UInt64", ""), ("email", "String", "")])
+    return server
+
+
+def test_substring_and_token_search():
+    """Test that names match by substring and names or comments by words."""
+    server = _server()
+    index = SchemaIndex()
+    index.refresh(server.run_query)
+
+    matches, total = index.search("user_id")
+    assert total == 2
+    # The exact name match ranks first
+    assert [(m.table, m.column) for m in matches] == [
+        ("users", "user_id"),
+        ("orders", "buyer_user_id"),
+    ]
+
+    matches, _ = index.search("checkout")
+    assert [(m.kind, m.table) for m in matches] == [(KIND_TABLE, "orders")]
+
+    matches, _ = index.search("placed order")
+    assert [m.column for m in matches] == ["buyer_user_id"]
+
+    matches, _ = index.search("USER", database="crm", kind=KIND_COLUMN)
+    assert [m.column for m in matches] == ["user_id"]
+
+    assert index.search("  ") == ([], 0)
+    assert index.stats() == {"indexed_tables": 2, "indexed_columns": 5}
+
+
+def test_incremental_refresh():
+    """Test that a refresh only re-reads the columns of changed tables."""
+    server = _server()
+    index = SchemaIndex()
+    index.refresh(server.run_query)
+
+    server.queries.clear()
+    assert index.refresh(server.run_query) == 0
+    assert len(server.queries) == 1  # only the table list is read
+
+    server.add_table(
+        "crm", "users", [("user_id", "UInt64", ""), ("phone", "String", "")], version=2
+    )
+    del server.tables[("shop", "orders")]
+    server.queries.clear()
+    assert index.refresh(server.run_query) == 2
+
+    columns_query = server.queries[1]
+    assert "('crm', 'users')" in columns_query
+    assert "orders" not in columns_query
+    assert index.search("email") == ([], 0)
+    assert [m.column for m in index.search("phone")[0]] == ["phone"]
+    assert index.search("buyer")[1] == 0
+    assert index.stats() == {"indexed_tables": 1, "indexed_columns": 2}
+
+
+def test_lookup_speed_on_large_schema():
+    """Test that lookups stay fast with a hundred thousand indexed columns."""
+    server = FakeServer()
+    for t in range(1000):
+        columns = [(f"metric_{t}_{c}", "Float64", "") for c in range(99)]
+        columns.append((f"tenant_{t}_user_id", "UInt64", ""))
+        server.add_table("warehouse", f"table_{t}", columns)
+    index = SchemaIndex()
+    index.refresh(server.run_query)
+
+    started = time.perf_counter()
+    matches, total = index.search("tenant_42_user", limit=10)
+    elapsed = time.perf_counter() - started
+
+    assert total == 1
+    assert matches[0].column == "tenant_42_user_id"
+    assert elapsed < 0.05
@@ -0,0 +1,104 @@
+import datetime
+import decimal
+import ipaddress
+import json
+import uuid
+
+from clickhouse_connect.datatypes.registry import get_from_name
+from fastmcp.tools import Tool
+
+from mcp_clickhouse.serialization import column_converter, columns_to_rows, dumps, json_tool_result
+
+
+def _types(*names):
+    return [get_from_name(name) for name in names]
+
+
+def test_native_columns_need_no_converter():
+    """Test that integer and enum columns are passed through untouched."""
+    assert column_converter(get_from_name("UInt64")) is None
+    assert column_converter(get_from_name("Array(Int32)")) is None
+    assert column_converter(get_from_name("Enum8('a' = 1)")) is None
+
+
+def test_columns_to_rows_by_column_type():
+    """Test that values are converted according to their column types."""
+    column_types = _types(
+        "Nullable(DateTime64(3))",
+        "Decimal(10, 2)",
+        "UUID",
+        "IPv4",
+        "FixedString(2)",
+        "Float64",
+        "Array(Date)",
+        "Map(UInt8, Decimal(5, 1))",
+        "Tuple(a Int8, b DateTime)",
+    )
+    moment = datetime.datetime(2024, 5, 1, 12, 30, 0, 123000)
+    identifier = uuid.UUID("61f0c404-5cb3-11e7-907b-a6006ad3dba0")
+    rows = [
+        (
+            moment,
+            decimal.Decimal("12.50"),
+            identifier,
+            ipaddress.IPv4Address("10.0.0.1"),
+            b"\xffA",
+            float("nan"),
+            [datetime.date(2024, 1, 2)],
+            {1: decimal.Decimal("0.5")},
+            (1, moment),
+        ),
+        (
+            None,
+            decimal.Decimal("0"),
+            identifier,
+            ipaddress.IPv4Address("10.0.0.2"),
+            b"ok",
+            1.5,
+            [],
+            {},
+            (2, moment),
+        ),
+    ]
+
+    converted = columns_to_rows(column_types, list(zip(*rows)))
+
+    assert converted[0] == [
+        "2024-05-01T12:30:00.123000",
+        "12.50",
+        "61f0c404-5cb3-11e7-907b-a6006ad3dba0",
+        "10.0.0.1",
+        "�A",
+        None,
+        ["2024-01-02"],
+        {"1": "0.5"},
+        [1, "2024-05-01T12:30:00.123000"],
+    ]
+    assert converted[1][0] is None
+    assert converted[1][5] == 1.5
+    assert json.loads(dumps({"rows": converted}))["rows"] == converted
+
+
+def test_dumps_handles_wide_integers():
+    """Test that 128 and 256 bit integers are encoded as JSON numbers."""
+    assert json.loads(dumps({"value": 2**200})) == {"value": 2**200}
+
+
+def test_tool_result_matches_default_serialization():
+    """Test that pre-converted results encode like the framework's default serializer."""
+    payload = {
+        "columns": ["id", "name", "created"],
+        "rows": [[1, "Zoë", datetime.date(2024, 1, 2)], [2, None, datetime.date(2024, 1, 3)]],
+    }
+    default = Tool.from_function(lambda: payload, name="query").convert_result(payload)
+
+    converted = {
+        "columns": payload["columns"],
+        "rows": columns_to_rows(
+            _types("UInt32", "Nullable(String)", "Date"), list(zip(*payload["rows"]))
+        ),
+    }
+    result = json_tool_result(converted)
+
+    assert json.loads(result.content[0].text) == json.loads(default.content[0].text)
+    assert result.structured_content == default.structured_content
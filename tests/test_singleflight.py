@@ -0,0 +1,81 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from mcp_clickhouse.singleflight import SingleFlight, call_key, normalize_query
+
+
+def _wait_for_coalesced(single_flight: SingleFlight, count: int, timeout: float = 5) -> bool:
+    """Wait until count calls joined an in-flight call, or give up after timeout seconds."""
+    deadline = time.monotonic() + timeout
+    while single_flight.coalesced < count:
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+def test_concurrent_calls_share_one_execution():
+    """Test that identical calls arriving while one is in flight reuse its result."""
+    single_flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_query():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"rows": [[1]]}
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        leader = executor.submit(single_flight.do, "key", slow_query)
+        started.wait(5)
+        followers = [executor.submit(single_flight.do, "key", slow_query) for _ in range(3)]
+        joined = _wait_for_coalesced(single_flight, 3)
+        release.set()
+        assert joined, "followers did not join the in-flight call"
+        results = [leader.result(5)] + [f.result(5) for f in followers]
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert single_flight.in_flight() == 0
+
+    # Nothing is cached once the call has finished
+    single_flight.do("key", slow_query)
+    assert len(calls) == 2
+
+
+def test_errors_are_shared_and_not_retained():
+    """Test that every waiter sees the leader's exception and the key is released."""
+    single_flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing_query():
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(single_flight.do, "key", failing_query)
+        started.wait(5)
+        follower = executor.submit(single_flight.do, "key", failing_query)
+        joined = _wait_for_coalesced(single_flight, 1)
+        release.set()
+        assert joined, "follower did not join the in-flight call"
+        for future in (leader, follower):
+            with pytest.raises(ValueError, match="boom"):
+                future.result(5)
+
+    assert single_flight.do("key", lambda: "ok") == "ok"
+
+
+def test_normalize_query_keeps_quoted_text():
+    """Test that only formatting outside of quotes is normalized."""
+    assert normalize_query("SELECT  1\n FROM\tt ;") == "SELECT 1 FROM t"
+    assert normalize_query("SELECT 'a  b'") != normalize_query("SELECT 'a b'")
+    assert normalize_query("SELECT `x  y`, 'it\\'s  ok'") == "SELECT `x  y`, 'it\\'s  ok'"
+    assert call_key("q", ["a", "b"], None) != call_key("q", ["a"], "b")